@@ -1,20 +1,73 @@
 __version__ = "0.0.1"
 
+import sys
 
 # DATEV PDF Override - Monkey Patch
-# App yüklendiğinde otomatik uygulanır
-def _patch_datev():
+# erpnext_datev modülü ve bağımlılıkları her worker'da import edilmesin diye
+# patch tembel uygulanır: DATEV modülü ilk import edildiğinde (ilk DATEV işleminde)
+_DATEV_MODULE = (
+	"erpnext_datev.erpnext_datev.doctype.datev_unternehmen_online_settings.datev_unternehmen_online_settings"
+)
+
+
+def _apply_datev_patch(datev_module):
 	"""erpnext_datev attach_print fonksiyonunu override eder"""
-	try:
-		from culinary_order_management.custom_datev import attach_print_custom
-		import erpnext_datev.erpnext_datev.doctype.datev_unternehmen_online_settings.datev_unternehmen_online_settings as datev_module
-		
-		# Orijinal fonksiyonu custom ile değiştir
-		datev_module.attach_print = attach_print_custom
-		
-	except Exception:
-		pass  # erpnext_datev kurulu değilse sessizce geç
-
-
-# Patch'i uygula
+	from culinary_order_management.custom_datev import attach_print_custom
+
+	# Orijinal fonksiyonu custom ile değiştir
+	datev_module.attach_print = attach_print_custom
+
+
+class _DatevPatchingLoader:
+	"""Asıl loader'ı sarar, modül çalıştırıldıktan hemen sonra patch'i uygular."""
+
+	def __init__(self, loader):
+		self.loader = loader
+
+	def create_module(self, spec):
+		return self.loader.create_module(spec)
+
+	def exec_module(self, module):
+		self.loader.exec_module(module)
+		try:
+			_apply_datev_patch(module)
+		except Exception:
+			pass  # Patch uygulanamazsa DATEV orijinal fonksiyonla çalışmaya devam eder
+
+	def __getattr__(self, name):
+		return getattr(self.loader, name)
+
+
+class _DatevPatchFinder:
+	"""DATEV settings modülü import edilirken loader'ını patch uygulayan loader ile değiştirir."""
+
+	def find_spec(self, fullname, path, target=None):
+		if fullname != _DATEV_MODULE:
+			return None
+
+		for finder in sys.meta_path:
+			if finder is self or not hasattr(finder, "find_spec"):
+				continue
+			spec = finder.find_spec(fullname, path, target)
+			if spec is not None and spec.loader is not None:
+				spec.loader = _DatevPatchingLoader(spec.loader)
+				return spec
+		return None
+
+
+def _patch_datev():
+	"""DATEV modülü zaten yüklüyse hemen, değilse ilk import anında patch uygula."""
+	module = sys.modules.get(_DATEV_MODULE)
+	if module is not None:
+		try:
+			_apply_datev_patch(module)
+		except Exception:
+			pass  # erpnext_datev kurulu değilse sessizce geç
+		return
+
+	if not any(isinstance(finder, _DatevPatchFinder) for finder in sys.meta_path):
+		sys.meta_path.insert(0, _DatevPatchFinder())
+
+
+# Patch'i kaydet (import maliyeti yok)
 _patch_datev()
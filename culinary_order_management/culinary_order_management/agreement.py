@@ -5,9 +5,17 @@ Culinary Order Management - Agreement Integration (price lists & item prices)
 import frappe
 from frappe import msgprint, _
 from frappe.exceptions import ValidationError, DoesNotExistError
+from frappe.utils import getdate, nowdate
 from typing import Optional
 import traceback
 
+from culinary_order_management.culinary_order_management.price_drift import invalidate_price_drift_cache
+from culinary_order_management.culinary_order_management.price_sheet_feed import (
+	record_agreement_price_events,
+	record_price_events,
+	record_price_events_for,
+)
+
 
 def _handle_agreement_error(
 	error: Exception, 
@@ -83,10 +91,69 @@ def _get_standard_selling_rate(item_code: str, currency: str) -> float:
 	return 0.0
 
 
+def _current_price_condition(alias: str = "") -> str:
+	"""Bugün geçerli Item Price koşulu - "güncel fiyat"ın tek tanımı (%(today)s parametresi gerekir).
+
+	İleri tarihli ve süresi dolmuş fiyatlar hariç tutulur.
+	"""
+	prefix = f"{alias}." if alias else ""
+	return (
+		f"ifnull({prefix}valid_from, '2000-01-01') <= %(today)s"
+		f" and ifnull({prefix}valid_upto, '2099-12-31') >= %(today)s"
+	)
+
+
+def _get_standard_selling_rates(item_codes: list, currencies=None) -> dict:
+	"""_get_standard_selling_rate'in toplu hali.
+
+	Sadece bugün geçerli fiyatlar kullanılır (_current_price_condition).
+	Önce sadece Standard Selling satırları okunur; Standard Selling fiyatı olmayan
+	(item, currency) çiftleri için para birimi başına tek windowed fallback sorgusu
+	(_get_fallback_selling_rates) çalışır.
+
+	Args:
+		item_codes: Item kodları
+		currencies: Fallback aranacak para birimleri (varsayılan: şirket para birimi)
+
+	Returns:
+		dict: {(item_code, currency): rate}
+	"""
+	item_codes = list(set(item_codes or []))
+	if not item_codes:
+		return {}
+
+	rows = frappe.db.sql(
+		f"""
+		select item_code, currency, price_list_rate
+		from `tabItem Price`
+		where price_list = 'Standard Selling'
+		  and selling = 1
+		  and item_code in %(item_codes)s
+		  and {_current_price_condition()}
+		order by (valid_from is null), valid_from desc, modified desc
+		""",
+		{"item_codes": tuple(item_codes), "today": getdate(nowdate())},
+		as_dict=True,
+	)
+
+	rates = {}
+	for row in rows:
+		# Aynı item/currency için en güncel satır kazanır
+		rates.setdefault((row.item_code, row.currency), float(row.price_list_rate or 0))
+
+	for currency in set(currencies or [_get_company_currency()]):
+		if not currency:
+			continue
+		missing = [code for code in item_codes if not rates.get((code, currency))]
+		for item_code, rate in _get_fallback_selling_rates(missing, currency).items():
+			rates[(item_code, currency)] = rate
+	return rates
+
+
 def _find_existing_item_price(price_list: str, item_code: str, currency: str, valid_from, valid_upto, agreement_name: str = None):
 	"""Find existing Item Price by agreement name (öncelikli) veya price list + item kombinasyonu.
 	
-	Agreement name kullanarak aynı anlaşmaya ait fiyatı bulur.
+	Agreement name kullanarak aynı anlaşmaya ait fiyatı bulur (indexli Item Price.agreement alanı).
 	Tarih kontrolü YAPILMAZ - sadece agreement name ile eşleşme.
 	"""
 	query = """
@@ -100,8 +167,8 @@ def _find_existing_item_price(price_list: str, item_code: str, currency: str, va
 	
 	# Agreement referansı varsa onu da filtrele (EN ÖNEMLİ)
 	if agreement_name:
-		query += " AND (note = %s OR note LIKE %s)"
-		params.extend([agreement_name, f"%{agreement_name}%"])
+		query += " AND agreement = %s"
+		params.append(agreement_name)
 	
 	result = frappe.db.sql(query, tuple(params), as_dict=False)
 	return [row[0] for row in result] if result else []
@@ -141,8 +208,8 @@ def _delete_overlapping_item_prices(price_list: str, item_code: str, new_from, n
 		
 		# Agreement filtresi - sadece aynı anlaşmaya ait fiyatları sil
 		if agreement_name:
-			conditions.append("(note = %s OR note LIKE %s)")
-			values.extend([agreement_name, f"%{agreement_name}%"])
+			conditions.append("agreement = %s")
+			values.append(agreement_name)
 		
 		# Overlap logic
 		if new_from and new_upto:
@@ -244,45 +311,160 @@ def get_supplier_items_with_standard_prices(supplier: str, currency: str | None
 
 	Returns: [{"item_code", "item_name", "uom", "standard_selling_rate", "price_list_rate", "currency"}]
 	price_list_rate is initialized with standard_selling_rate.
+	Büyük kataloglar için sayfalı varyant: get_supplier_items_page
+	
+	Requires: Item and Supplier read permission
+	"""
+	_check_supplier_item_permissions()
+	
+	if not supplier:
+		return []
+
+	items = _get_supplier_items(supplier)
+	if not items:
+		return []
+
+	return _with_standard_prices(items, _resolve_supplier_currency(supplier, currency))
+
+
+SUPPLIER_ITEMS_PAGE_LENGTH = 500
+
+
+@frappe.whitelist()
+def get_supplier_items_page(
+	supplier: str,
+	currency: str | None = None,
+	after_item_name: str | None = None,
+	after_item_code: str | None = None,
+	page_length: int = SUPPLIER_ITEMS_PAGE_LENGTH,
+):
+	"""get_supplier_items_with_standard_prices'in keyset sayfalı hali.
+
+	Sayfalar (item_name, item_code) sırasıyla ilerler; bir sonraki sayfa için dönen
+	next_cursor değerleri after_item_name/after_item_code olarak gönderilir.
+	OFFSET kullanılmadığı için 10k+ item'lık kataloglarda da her sayfa aynı maliyettedir.
+
+	Returns:
+		dict: {"items": [...], "currency": str, "next_cursor": {"item_name", "item_code"} | None}
 	
 	Requires: Item and Supplier read permission
 	"""
+	_check_supplier_item_permissions()
+	
+	if not supplier:
+		return {"items": [], "currency": currency, "next_cursor": None}
+	
+	page_length = frappe.utils.cint(page_length) or SUPPLIER_ITEMS_PAGE_LENGTH
+	currency = _resolve_supplier_currency(supplier, currency)
+	cursor = (after_item_name or "", after_item_code) if after_item_code else None
+	
+	# Bir fazla oku - sonraki sayfa var mı?
+	items = _get_supplier_items(supplier, after=cursor, limit=page_length + 1)
+	has_more = len(items) > page_length
+	items = items[:page_length]
+	
+	return {
+		"items": _with_standard_prices(items, currency),
+		"currency": currency,
+		"next_cursor": {"item_name": items[-1].item_name or "", "item_code": items[-1].item_code} if has_more else None,
+	}
+
+
+def _check_supplier_item_permissions() -> None:
 	if not frappe.has_permission("Item", "read"):
 		frappe.throw(_("You don't have permission to read Item"), frappe.PermissionError)
 	
 	if not frappe.has_permission("Supplier", "read"):
 		frappe.throw(_("You don't have permission to read Supplier"), frappe.PermissionError)
+
+
+def _resolve_supplier_currency(supplier: str, currency: str | None = None) -> str:
+	"""Currency: parametre > supplier default > company default > EUR."""
+	if currency:
+		return currency
 	
-	if not supplier:
-		return []
+	supplier_currency = frappe.db.get_value("Supplier", supplier, "default_currency")
+	if supplier_currency:
+		return supplier_currency
+	
+	return frappe.db.get_value("Company", {"is_group": 0}, "default_currency") or "EUR"
 
-	items = frappe.db.sql(
+
+def _get_supplier_items(supplier: str, after: tuple | None = None, limit: int | None = None) -> list:
+	"""Supplier'ın aktif satış item'ları (item_name, item_code sıralı).
+
+	Args:
+		after: Keyset cursor (item_name, item_code) - bu satırdan sonrakiler
+		limit: Maksimum satır sayısı
+	"""
+	conditions = ""
+	params = {"supplier": supplier}
+	if after:
+		conditions = """
+		  and (ifnull(i.item_name, '') > %(after_name)s
+		       or (ifnull(i.item_name, '') = %(after_name)s and i.name > %(after_code)s))
 		"""
+		params.update({"after_name": after[0], "after_code": after[1]})
+	
+	limit_clause = ""
+	if limit:
+		limit_clause = "limit %(limit)s"
+		params["limit"] = frappe.utils.cint(limit)
+
+	return frappe.db.sql(
+		f"""
 		select i.name as item_code, i.item_name, i.item_group,
 		       i.is_kitchen_item as kitchen_item,
 		       i.stock_uom as uom
 		from `tabItem` i
-		join `tabItem Supplier` s on s.parent = i.name and s.supplier = %s
+		join `tabItem Supplier` s on s.parent = i.name and s.supplier = %(supplier)s
 		where i.disabled = 0 and i.is_sales_item = 1
-		order by i.item_name
+		{conditions}
+		order by ifnull(i.item_name, ''), i.name
+		{limit_clause}
 		""",
-		supplier,
+		params,
 		as_dict=True,
 	)
 
-	if not items:
-		return []
 
-	if not currency:
-		supplier_currency = frappe.db.get_value("Supplier", supplier, "default_currency")
-		if not supplier_currency:
-			company_currency = frappe.db.get_value("Company", {"is_group": 0}, "default_currency")
-			currency = company_currency or "EUR"
-		else:
-			currency = supplier_currency
+def _get_fallback_selling_rates(item_codes: list, currency: str) -> dict:
+	"""Standard Selling fiyatı olmayan item'lar için en güncel selling fiyatı.
+
+	_get_standard_selling_rate fallback'inin toplu hali: tek windowed sorgu.
+
+	Returns:
+		dict: {item_code: rate}
+	"""
+	if not item_codes:
+		return {}
+
+	rows = frappe.db.sql(
+		f"""
+		select item_code, price_list_rate
+		from (
+			select item_code, price_list_rate,
+			       row_number() over (
+			           partition by item_code
+			           order by (valid_from is null), valid_from desc, modified desc
+			       ) as rn
+			from `tabItem Price`
+			where selling = 1
+			  and currency = %(currency)s
+			  and item_code in %(item_codes)s
+			  and {_current_price_condition()}
+		) ranked
+		where rn = 1
+		""",
+		{"currency": currency, "item_codes": tuple(item_codes), "today": getdate(nowdate())},
+		as_dict=True,
+	)
+	return {r.item_code: float(r.price_list_rate or 0) for r in rows}
+
 
+def _with_standard_prices(items: list, currency: str) -> list:
+	"""Item listesine Standard Selling fiyatlarını ekle (Standard Selling + tek fallback sorgusu)."""
 	item_codes = [it.item_code for it in items]
-	placeholders = ",".join(["%s"] * len(item_codes))
 	price_rows = []
 	if item_codes:
 		price_rows = frappe.db.sql(
@@ -290,19 +472,21 @@ def get_supplier_items_with_standard_prices(supplier: str, currency: str | None
 			select item_code, price_list_rate
 			from `tabItem Price`
 			where price_list = 'Standard Selling' and selling = 1
-			  and currency = %s and item_code in ({placeholders})
+			  and currency = %(currency)s and item_code in %(item_codes)s
+			  and {_current_price_condition()}
+			order by (valid_from is null) desc, valid_from, modified
 			""",
-			[currency, *item_codes],
+			{"currency": currency, "item_codes": tuple(item_codes), "today": getdate(nowdate())},
 			as_dict=True,
 		)
 
 	price_map = {r.item_code: float(r.price_list_rate) for r in price_rows}
+	missing = [code for code in item_codes if not price_map.get(code)]
+	price_map.update(_get_fallback_selling_rates(missing, currency))
 
 	result = []
 	for it in items:
 		std_rate = price_map.get(it.item_code, 0.0)
-		if not std_rate:
-			std_rate = _get_standard_selling_rate(it.item_code, currency)
 		result.append(
 			{
 				"item_code": it.item_code,
@@ -443,11 +627,302 @@ def create_price_list_for_agreement(doc, method):
 		_handle_agreement_error(e, "Price List Creation", doc.name)
 
 
+PRICE_UPDATE_CHUNK_SIZE = 1000
+
+
+def _bulk_update_item_price_rates(rates: dict) -> int:
+	"""Item Price kayıtlarının fiyatlarını toplu güncelle (UPDATE ... CASE).
+
+	ORM kullanılmaz - Item Price hook'ları tetiklenmez.
+
+	Args:
+		rates: {item_price_name: new_rate}
+
+	Returns:
+		Number of updated rows
+	"""
+	if not rates:
+		return 0
+
+	now = frappe.utils.now()
+	user = frappe.session.user
+	names = list(rates)
+
+	for start in range(0, len(names), PRICE_UPDATE_CHUNK_SIZE):
+		chunk = names[start:start + PRICE_UPDATE_CHUNK_SIZE]
+		case_sql = " ".join(["WHEN %s THEN %s"] * len(chunk))
+		placeholders = ", ".join(["%s"] * len(chunk))
+		values = []
+		for name in chunk:
+			values.extend([name, rates[name]])
+		values.extend([now, user, *chunk])
+
+		frappe.db.sql(
+			f"""
+			UPDATE `tabItem Price`
+			SET price_list_rate = CASE name {case_sql} END,
+			    modified = %s,
+			    modified_by = %s
+			WHERE name IN ({placeholders})
+			""",
+			tuple(values),
+		)
+
+	record_price_events_for(names, "Update")
+	invalidate_price_drift_cache()
+	return len(names)
+
+
+def _bulk_insert_item_prices(rows: list) -> int:
+	"""Agreement Item Price kayıtlarını tek bir multi-row insert ile ekle.
+
+	ORM'in validate sırasında doldurduğu item detayları (item_name, uom, brand,
+	description) tek sorguda Item'dan alınır.
+
+	Args:
+		rows: [{"item_code", "price_list", "currency", "price_list_rate", "valid_from",
+		        "valid_upto", "agreement", "customer"}]
+
+	Returns:
+		Number of inserted rows
+	"""
+	if not rows:
+		return 0
+
+	item_details = {
+		d.name: d
+		for d in frappe.db.sql(
+			"""
+			SELECT name, item_name, stock_uom, brand, description
+			FROM `tabItem`
+			WHERE name IN %(item_codes)s
+			""",
+			{"item_codes": tuple({row["item_code"] for row in rows})},
+			as_dict=True,
+		)
+	}
+
+	now = frappe.utils.now()
+	user = frappe.session.user
+	fields = [
+		"name", "owner", "creation", "modified", "modified_by", "docstatus",
+		"item_code", "item_name", "uom", "brand", "item_description",
+		"price_list", "selling", "buying", "customer", "currency", "price_list_rate",
+		"valid_from", "valid_upto", "note", "agreement",
+	]
+
+	values = []
+	for row in rows:
+		item = item_details.get(row["item_code"]) or frappe._dict()
+		values.append((
+			frappe.generate_hash(length=10), user, now, now, user, 0,
+			row["item_code"], item.item_name, item.stock_uom, item.brand, item.description,
+			row["price_list"], 1, 0, row.get("customer"), row["currency"], row["price_list_rate"],
+			row.get("valid_from"), row.get("valid_upto"), row["agreement"], row["agreement"],
+		))
+
+	frappe.db.bulk_insert("Item Price", fields, values)
+	record_price_events(rows, "Insert")
+	invalidate_price_drift_cache()
+	return len(values)
+
+
+def _bulk_delete_item_prices(names: list) -> int:
+	"""Item Price kayıtlarını toplu sil (ORM hook'ları tetiklenmez)."""
+	if not names:
+		return 0
+
+	record_price_events_for(names, "Delete")
+	for start in range(0, len(names), PRICE_UPDATE_CHUNK_SIZE):
+		chunk = names[start:start + PRICE_UPDATE_CHUNK_SIZE]
+		frappe.db.sql("DELETE FROM `tabItem Price` WHERE name IN %(names)s", {"names": tuple(chunk)})
+
+	invalidate_price_drift_cache()
+	return len(names)
+
+
+def _bulk_update_item_price_dates(updates: dict) -> int:
+	"""Item Price geçerlilik tarihlerini güncelle.
+
+	Args:
+		updates: {(valid_from, valid_upto): [item_price_name, ...]}
+	"""
+	count = 0
+	for (valid_from, valid_upto), names in updates.items():
+		frappe.db.sql(
+			"""
+			UPDATE `tabItem Price`
+			SET valid_from = %(valid_from)s, valid_upto = %(valid_upto)s,
+			    modified = %(now)s, modified_by = %(user)s
+			WHERE name IN %(names)s
+			""",
+			{
+				"valid_from": valid_from,
+				"valid_upto": valid_upto,
+				"now": frappe.utils.now(),
+				"user": frappe.session.user,
+				"names": tuple(names),
+			},
+		)
+		record_price_events_for(names, "Update")
+		count += len(names)
+	return count
+
+
+def _load_agreement_item_prices(agreement_names: list) -> dict:
+	"""Agreement'lara ait mevcut Item Price satırlarını tek sorguda yükle.
+
+	Returns:
+		dict: {agreement_name: [row, ...]}
+	"""
+	result = {name: [] for name in agreement_names}
+	if not agreement_names:
+		return result
+
+	rows = frappe.db.sql(
+		"""
+		SELECT name, agreement, price_list, item_code, currency, price_list_rate, valid_from, valid_upto
+		FROM `tabItem Price`
+		WHERE agreement IN %(agreements)s
+		ORDER BY creation
+		""",
+		{"agreements": tuple(agreement_names)},
+		as_dict=True,
+	)
+	for row in rows:
+		result.setdefault(row.agreement, []).append(row)
+	return result
+
+
+def _get_desired_item_prices(doc, company_ccy: str) -> tuple:
+	"""Agreement item'larından olması gereken Item Price fiyatlarını hesapla.
+
+	Returns:
+		tuple: ({(item_code, currency): rate}, [(item_code, reason), ...])
+	"""
+	discount_rate = frappe.utils.flt(getattr(doc, "discount_rate", 0))
+	desired = {}
+	failed_items = []
+
+	for item in doc.agreement_items:
+		if not item.item_code:
+			frappe.log_error(
+				message=f"Item code is empty in row {item.idx}",
+				title="Agreement Item Price Sync - Missing Item Code"
+			)
+			continue
+
+		item_ccy = item.currency or company_ccy
+		row_agreement_rate = frappe.utils.flt(getattr(item, "price_list_rate", 0))
+		if row_agreement_rate:
+			effective_rate = row_agreement_rate
+		else:
+			std_rate = frappe.utils.flt(getattr(item, "standard_selling_rate", 0))
+			if not std_rate:
+				try:
+					std_rate = _get_standard_selling_rate(item.item_code, item_ccy)
+				except Exception as e:
+					frappe.log_error(
+						message=f"Could not get standard selling rate for {item.item_code}: {str(e)}",
+						title="Agreement Item Price Sync - Rate Not Found"
+					)
+					std_rate = 0.0
+
+			effective_rate = std_rate * (1.0 - (discount_rate / 100.0)) if discount_rate else std_rate
+
+		if effective_rate <= 0:
+			error_msg = "Valid price not found or zero"
+			frappe.log_error(
+				message=f"{error_msg} (Item: {item.item_code}, Rate: {effective_rate})",
+				title="Agreement Item Price Sync - Invalid Rate"
+			)
+			failed_items.append((item.item_code, error_msg))
+			continue
+
+		desired[(item.item_code, item_ccy)] = effective_rate
+
+	return desired, failed_items
+
+
+def _plan_item_price_sync(doc, desired: dict, existing_rows: list) -> dict:
+	"""Mevcut Item Price satırları ile olması gereken fiyatlar arasındaki farkı çıkar.
+
+	Returns:
+		dict: {"insert": [row], "rates": {name: rate}, "dates": {(from, upto): [name]}, "delete": [name]}
+	"""
+	price_list_name = f"{doc.customer}"
+	valid_from = getdate(doc.valid_from) if doc.valid_from else None
+	valid_upto = getdate(doc.valid_to) if doc.valid_to else None
+
+	plan = {"insert": [], "rates": {}, "dates": {}, "delete": []}
+	matched = {}
+
+	for row in existing_rows:
+		key = (row.item_code, row.currency)
+		if row.price_list != price_list_name or key not in desired or key in matched:
+			# Kaldırılmış item, farklı price list veya aynı item için fazladan satır
+			plan["delete"].append(row.name)
+			continue
+
+		matched[key] = row
+		if abs(frappe.utils.flt(row.price_list_rate) - desired[key]) >= 0.005:
+			plan["rates"][row.name] = desired[key]
+		if row.valid_from != valid_from or row.valid_upto != valid_upto:
+			plan["dates"].setdefault((valid_from, valid_upto), []).append(row.name)
+
+	for (item_code, currency), rate in desired.items():
+		if (item_code, currency) in matched:
+			continue
+		plan["insert"].append({
+			"item_code": item_code,
+			"price_list": price_list_name,
+			"currency": currency,
+			"price_list_rate": rate,
+			"valid_from": valid_from,
+			"valid_upto": valid_upto,
+			"agreement": doc.name,
+			"customer": doc.customer,
+		})
+
+	return plan
+
+
+def _apply_item_price_plan(plan: dict) -> dict:
+	"""Fark planını toplu SQL ifadeleri ile uygula."""
+	return {
+		"inserted": _bulk_insert_item_prices(plan["insert"]),
+		"updated": _bulk_update_item_price_rates(plan["rates"]),
+		"redated": _bulk_update_item_price_dates(plan["dates"]),
+		"deleted": _bulk_delete_item_prices(plan["delete"]),
+	}
+
+
+def _get_company_currency() -> str:
+	"""Varsayılan şirket para birimi (bulunamazsa EUR)."""
+	try:
+		company_ccy = frappe.db.get_value("Company", {"is_group": 0}, "default_currency")
+		if not company_ccy:
+			company_ccy = "EUR"
+			frappe.log_error(
+				message="No default currency found, using EUR",
+				title="Agreement Item Price Sync - Missing Currency"
+			)
+	except Exception as e:
+		company_ccy = "EUR"
+		frappe.log_error(
+			message=f"Could not get company currency: {str(e)}",
+			title="Agreement Item Price Sync - Currency Error"
+		)
+	return company_ccy
+
+
 def sync_item_prices(doc, method):
 	"""Sync Item Prices when Agreement is updated.
 	
 	Each item is added to price list based on its currency.
-	Overlapping records are cleaned using ORM (triggers hooks).
+	Agreement'ın mevcut Item Price satırları tek sorguda yüklenir, agreement_items ile
+	karşılaştırılır ve sadece farklar (insert/update/delete) toplu SQL ile uygulanır.
+	Toplu yazımlar ORM kullanmaz (Item Price hook'ları tetiklenmez).
 	
 	Raises:
 		ValidationError: Item Price synchronization failed
@@ -472,154 +947,25 @@ def sync_item_prices(doc, method):
 		frappe.throw(error_msg, ValidationError)
 		
 	try:
-		discount_rate = frappe.utils.flt(getattr(doc, "discount_rate", 0))
-		
-		try:
-			company_ccy = frappe.db.get_value("Company", {"is_group": 0}, "default_currency")
-			if not company_ccy:
-				company_ccy = "EUR"
-				frappe.log_error(
-					message="No default currency found, using EUR",
-					title="Agreement Item Price Sync - Missing Currency"
-				)
-		except Exception as e:
-			company_ccy = "EUR"
-			frappe.log_error(
-				message=f"Could not get company currency: {str(e)}",
-				title="Agreement Item Price Sync - Currency Error"
-			)
+		desired, failed_items = _get_desired_item_prices(doc, _get_company_currency())
+		existing_rows = _load_agreement_item_prices([doc.name])[doc.name]
 		
-		processed_items = 0
-		deleted_prices = 0
-		failed_items = []
+		plan = _plan_item_price_sync(doc, desired, existing_rows)
+		counts = _apply_item_price_plan(plan)
+		processed_items = len(desired)
 		
-		for item in doc.agreement_items:
-			if not item.item_code:
-				frappe.log_error(
-					message=f"Item code is empty in row {item.idx}",
-					title="Agreement Item Price Sync - Missing Item Code"
-				)
-				continue
-				
-			try:
-				item_ccy = item.currency or company_ccy
-				price_list_name = f"{doc.customer}"
-				
-				try:
-					# Sadece bu anlaşmaya ait fiyatları temizle
-					deleted_count = _delete_overlapping_item_prices(
-						price_list_name, 
-						item.item_code, 
-						doc.valid_from, 
-						doc.valid_to,
-						doc.name  # Agreement name ekledik
-					)
-					deleted_prices += deleted_count
-				except ValidationError as e:
-					frappe.log_error(
-						message=f"Cleanup failed for item {item.item_code}: {str(e)}",
-						title="Agreement Item Price Sync - Cleanup Failed"
-					)
-				
-				if not frappe.db.exists("Price List", price_list_name):
-					error_msg = f"Price List '{price_list_name}' not found"
-					frappe.log_error(
-						message=f"{error_msg} (Item: {item.item_code})",
-						title="Agreement Item Price Sync - Price List Not Found"
-					)
-					failed_items.append((item.item_code, error_msg))
-					continue
-					
-				row_agreement_rate = frappe.utils.flt(getattr(item, "price_list_rate", 0))
-				if row_agreement_rate:
-					effective_rate = row_agreement_rate
-				else:
-					std_rate = frappe.utils.flt(getattr(item, "standard_selling_rate", 0))
-					if not std_rate:
-						try:
-							std_rate = _get_standard_selling_rate(item.item_code, item_ccy)
-						except Exception as e:
-							frappe.log_error(
-								message=f"Could not get standard selling rate for {item.item_code}: {str(e)}",
-								title="Agreement Item Price Sync - Rate Not Found"
-							)
-							std_rate = 0.0
-					
-					effective_rate = std_rate * (1.0 - (discount_rate / 100.0)) if discount_rate else std_rate
-				
-				if effective_rate <= 0:
-					error_msg = "Valid price not found or zero"
-					frappe.log_error(
-						message=f"{error_msg} (Item: {item.item_code}, Rate: {effective_rate})",
-						title="Agreement Item Price Sync - Invalid Rate"
-					)
-					failed_items.append((item.item_code, error_msg))
-					continue
-				
-				# Bu anlaşmaya ait mevcut fiyatı bul
-				existing = _find_existing_item_price(
-					price_list_name, 
-					item.item_code, 
-					item_ccy, 
-					doc.valid_from, 
-					doc.valid_to,
-					doc.name  # Agreement name ekledik
-				)
-				
-				try:
-					if existing:
-						ip = frappe.get_doc("Item Price", existing[0])
-						ip.price_list_rate = effective_rate
-						if hasattr(ip, "customer"):
-							setattr(ip, "customer", doc.customer)
-						# Agreement referansını güncelle
-						ip.note = doc.name
-						ip.save(ignore_permissions=True)
-					else:
-						ip = frappe.new_doc("Item Price")
-						ip.item_code = item.item_code
-						ip.price_list = price_list_name
-						ip.price_list_rate = effective_rate
-						ip.currency = item_ccy
-						ip.valid_from = doc.valid_from
-						ip.valid_upto = doc.valid_to
-						# Agreement referansını kaydet (note alanına)
-						ip.note = doc.name
-						if hasattr(ip, "customer"):
-							setattr(ip, "customer", doc.customer)
-						ip.insert(ignore_permissions=True)
-					
-					processed_items += 1
-					
-				except frappe.exceptions.MandatoryError as e:
-					error_msg = f"Mandatory field missing: {str(e)}"
-					failed_items.append((item.item_code, error_msg))
-					frappe.log_error(
-						message=f"{error_msg} (Item: {item.item_code})",
-						title="Agreement Item Price Sync - Mandatory Error"
-					)
-					
-				except ValidationError as e:
-					error_msg = f"Validation error: {str(e)}"
-					failed_items.append((item.item_code, error_msg))
-					frappe.log_error(
-						message=f"{error_msg} (Item: {item.item_code})",
-						title="Agreement Item Price Sync - Validation Error"
-					)
-					
-			except Exception as e:
-				error_msg = f"Unexpected error: {str(e)}"
-				failed_items.append((item.item_code, error_msg))
-				frappe.log_error(
-					message=f"{error_msg}\n{traceback.format_exc()}",
-					title="Agreement Item Price Sync - Item Error"
-				)
+		frappe.logger().info(
+			f"Agreement {doc.name} price sync: {counts['inserted']} inserted, {counts['updated']} updated, "
+			f"{counts['redated']} re-dated, {counts['deleted']} deleted"
+		)
 		
 		if processed_items > 0:
-			msg = _("✅ {0} item prices updated").format(processed_items)
-			if deleted_prices > 0:
-				msg += _(" ({0} old records cleaned)").format(deleted_prices)
-			msgprint(msg, indicator="green", alert=True)
+			# Sadece gerçekten değişen fiyatlar raporlanır; hiçbir şey değişmediyse mesaj yok
+			if any(counts.values()):
+				msg = _("✅ Item prices synced: {0} inserted, {1} updated, {2} re-dated, {3} deleted").format(
+					counts["inserted"], counts["updated"], counts["redated"], counts["deleted"]
+				)
+				msgprint(msg, indicator="green", alert=True)
 		else:
 			# Hiç item işlenemediyse uyarı ver
 			if not failed_items:
@@ -649,71 +995,182 @@ def sync_item_prices(doc, method):
 		_handle_agreement_error(e, "Item Price Sync", doc.name)
 
 
-def cleanup_item_prices(doc, method):
-	"""Clean up Item Prices when Agreement is cancelled.
-	
-	Overlapping records are deleted using ORM (triggers hooks).
-	
-	Raises:
-		ValidationError: Item Price cleanup failed
+def sync_item_prices_batch(docs: list) -> dict:
+	"""Birden fazla agreement için Item Price senkronizasyonu (toplu yenileme vb.).
+
+	Mevcut satırlar tüm agreement'lar için tek sorguda yüklenir, her agreement için
+	fark planı çıkarılır ve planlar birleştirilerek tek seferde uygulanır. Price List'in
+	var olduğu varsayılır (çağıran taraf kontrol eder).
+
+	Returns:
+		dict: {"inserted", "updated", "redated", "deleted", "failed_items": {agreement: [(item_code, reason)]}}
 	"""
-	if not doc.customer:
-		error_msg = _("Customer field is empty, cannot cleanup prices")
-		frappe.log_error(
-			message=error_msg,
-			title="Agreement Item Price Cleanup - Missing Customer"
-		)
-		msgprint(f"⚠️ {error_msg}", indicator="orange", alert=True)
-		return
+	company_ccy = _get_company_currency()
+	existing = _load_agreement_item_prices([doc.name for doc in docs])
 
-	try:
-		price_list_name = f"{doc.customer}"
-		total_removed = 0
-		failed_items = []
-		
-		if not frappe.db.exists("Price List", price_list_name):
-			msg = _("Price List '{0}' not found, no prices to cleanup").format(price_list_name)
-			frappe.log_error(
-				message=msg,
-				title="Agreement Item Price Cleanup - Price List Not Found"
-			)
-			msgprint(f"ℹ️ {msg}", indicator="blue", alert=True)
-			return
-		
-		for item in doc.agreement_items:
-			if not item.item_code:
-				frappe.log_error(
-					message=f"Item code is empty in row {item.idx}",
-					title="Agreement Item Price Cleanup - Missing Item Code"
-				)
-				continue
-			
-			try:
-				# Sadece bu anlaşmaya ait fiyatları temizle
-				removed = _delete_overlapping_item_prices(
-					price_list_name, 
-					item.item_code, 
-					doc.valid_from, 
-					doc.valid_to,
-					doc.name  # Agreement name ekledik
-				)
-				total_removed += removed
-				
-			except ValidationError as e:
-				error_msg = f"Cleanup error: {str(e)}"
-				failed_items.append((item.item_code, error_msg))
-				frappe.log_error(
-					message=f"{error_msg} (Item: {item.item_code})",
-					title="Agreement Item Price Cleanup - Critical Error"
-				)
-				
-			except Exception as e:
-				error_msg = f"Unexpected error: {str(e)}"
-				failed_items.append((item.item_code, error_msg))
+	merged = {"insert": [], "rates": {}, "dates": {}, "delete": []}
+	failed = {}
+	for doc in docs:
+		desired, failed_items = _get_desired_item_prices(doc, company_ccy)
+		if failed_items:
+			failed[doc.name] = failed_items
+		plan = _plan_item_price_sync(doc, desired, existing.get(doc.name, []))
+		merged["insert"].extend(plan["insert"])
+		merged["rates"].update(plan["rates"])
+		merged["delete"].extend(plan["delete"])
+		for dates, names in plan["dates"].items():
+			merged["dates"].setdefault(dates, []).extend(names)
+
+	counts = _apply_item_price_plan(merged) if docs else {"inserted": 0, "updated": 0, "redated": 0, "deleted": 0}
+	counts["failed_items"] = failed
+	return counts
+
+
+def _use_orm_price_cleanup(doc) -> bool:
+	"""Item Price silme hook'larına ihtiyaç duyan siteler için ORM temizliği (opt-in).
+
+	Site config: culinary_item_price_orm_cleanup = 1 veya doc.flags.orm_price_cleanup
+	"""
+	return bool(doc.flags.get("orm_price_cleanup") or frappe.conf.get("culinary_item_price_orm_cleanup"))
+
+
+def _bulk_delete_agreement_item_prices(agreement_name: str) -> int:
+	"""Agreement'a ait tüm Item Price satırlarını tek indexli DELETE ile sil.
+
+	ORM kullanılmaz - Item Price hook'ları tetiklenmez.
+
+	Returns:
+		Number of deleted records
+	"""
+	count = frappe.db.count("Item Price", {"agreement": agreement_name})
+	if count:
+		record_agreement_price_events(agreement_name, "Delete")
+		frappe.db.sql("DELETE FROM `tabItem Price` WHERE agreement = %s", (agreement_name,))
+		invalidate_price_drift_cache()
+	return count
+
+
+def _transfer_agreement_item_prices(old_agreement: str, new_doc) -> int:
+	"""Eski agreement'ın Item Price satırlarını tek UPDATE ile yeni agreement'a devret.
+
+	Satırlar silinip yeniden yazılmaz; ardından çalışan sync_item_prices sadece farkları
+	(değişen fiyat, eklenen/kaldırılan item, farklı price list) uygular.
+
+	Returns:
+		Number of transferred records
+	"""
+	frappe.db.sql(
+		"""
+		UPDATE `tabItem Price`
+		SET agreement = %(new)s, note = %(new)s,
+		    valid_from = %(valid_from)s, valid_upto = %(valid_upto)s,
+		    modified = %(now)s, modified_by = %(user)s
+		WHERE agreement = %(old)s
+		""",
+		{
+			"old": old_agreement,
+			"new": new_doc.name,
+			"valid_from": getdate(new_doc.valid_from),
+			"valid_upto": getdate(new_doc.valid_to),
+			"now": frappe.utils.now(),
+			"user": frappe.session.user,
+		},
+	)
+	count = frappe.db.count("Item Price", {"agreement": new_doc.name})
+	record_agreement_price_events(new_doc.name, "Update")
+	invalidate_price_drift_cache()
+	return count
+
+
+def _cleanup_item_prices_orm(doc, price_list_name: str) -> tuple:
+	"""Item bazında overlap sorgusu + ORM delete ile temizlik (hook'ları tetikler).
+
+	Returns:
+		tuple: (total_removed, failed_items)
+	"""
+	total_removed = 0
+	failed_items = []
+
+	for item in doc.agreement_items:
+		if not item.item_code:
+			frappe.log_error(
+				message=f"Item code is empty in row {item.idx}",
+				title="Agreement Item Price Cleanup - Missing Item Code"
+			)
+			continue
+		
+		try:
+			# Sadece bu anlaşmaya ait fiyatları temizle
+			removed = _delete_overlapping_item_prices(
+				price_list_name, 
+				item.item_code, 
+				doc.valid_from, 
+				doc.valid_to,
+				doc.name  # Agreement name ekledik
+			)
+			total_removed += removed
+			
+		except ValidationError as e:
+			error_msg = f"Cleanup error: {str(e)}"
+			failed_items.append((item.item_code, error_msg))
+			frappe.log_error(
+				message=f"{error_msg} (Item: {item.item_code})",
+				title="Agreement Item Price Cleanup - Critical Error"
+			)
+			
+		except Exception as e:
+			error_msg = f"Unexpected error: {str(e)}"
+			failed_items.append((item.item_code, error_msg))
+			frappe.log_error(
+				message=f"{error_msg}\n{traceback.format_exc()}",
+				title="Agreement Item Price Cleanup - Unexpected Error"
+			)
+
+	return total_removed, failed_items
+
+
+def cleanup_item_prices(doc, method):
+	"""Clean up Item Prices when Agreement is cancelled.
+	
+	Agreement'a ait tüm Item Price satırları tek indexli DELETE ile silinir.
+	Item Price hook'larına ihtiyaç duyan siteler ORM ile item bazında silmeyi
+	açabilir (bkz. _use_orm_price_cleanup).
+	
+	replace_agreement fiyatları yeni agreement'a devrederken (doc.flags.skip_price_cleanup)
+	silme yapılmaz.
+	
+	Raises:
+		ValidationError: Item Price cleanup failed
+	"""
+	if doc.flags.get("skip_price_cleanup"):
+		return
+	
+	if not doc.customer:
+		error_msg = _("Customer field is empty, cannot cleanup prices")
+		frappe.log_error(
+			message=error_msg,
+			title="Agreement Item Price Cleanup - Missing Customer"
+		)
+		msgprint(f"⚠️ {error_msg}", indicator="orange", alert=True)
+		return
+
+	try:
+		price_list_name = f"{doc.customer}"
+		failed_items = []
+		
+		if not _use_orm_price_cleanup(doc):
+			total_removed = _bulk_delete_agreement_item_prices(doc.name)
+		else:
+			if not frappe.db.exists("Price List", price_list_name):
+				msg = _("Price List '{0}' not found, no prices to cleanup").format(price_list_name)
 				frappe.log_error(
-					message=f"{error_msg}\n{traceback.format_exc()}",
-					title="Agreement Item Price Cleanup - Unexpected Error"
+					message=msg,
+					title="Agreement Item Price Cleanup - Price List Not Found"
 				)
+				msgprint(f"ℹ️ {msg}", indicator="blue", alert=True)
+				return
+			
+			total_removed, failed_items = _cleanup_item_prices_orm(doc, price_list_name)
 		
 		if total_removed > 0:
 			msgprint(_("✅ {0} price records removed").format(total_removed), indicator="green", alert=True)
@@ -745,11 +1202,190 @@ def cleanup_item_prices(doc, method):
 		_handle_agreement_error(e, "Item Price Cleanup", doc.name)
 
 
+def _bulk_insert_price_history(rows: list) -> int:
+	"""Price History satırlarını tek bir multi-row insert ile ekle.
+
+	Args:
+		rows: [{"agreement_name", "item_code", "old_price", "new_price", "currency",
+		        "old_standard", "new_standard", "source", "change_date" (opsiyonel)}]
+
+	Returns:
+		Number of inserted rows
+	"""
+	if not rows:
+		return 0
+
+	now = frappe.utils.now()
+	user = frappe.session.user
+	fields = [
+		"name", "owner", "creation", "modified", "modified_by", "docstatus",
+		"agreement", "change_date", "item_code", "old_standard_rate", "new_standard_rate",
+		"old_agreement_rate", "new_agreement_rate", "currency", "change_percentage",
+		"changed_by", "source",
+	]
+
+	values = []
+	for row in rows:
+		old_price = frappe.utils.flt(row["old_price"])
+		new_price = frappe.utils.flt(row["new_price"])
+		diff_pct = ((new_price - old_price) / old_price * 100) if old_price > 0 else 0
+		values.append((
+			frappe.generate_hash(length=10), user, now, now, user, 0,
+			row["agreement_name"], row.get("change_date") or now, row["item_code"], frappe.utils.flt(row.get("old_standard")), frappe.utils.flt(row.get("new_standard")),
+			old_price, new_price, row["currency"], diff_pct,
+			user, row.get("source") or "Automatic",
+		))
+
+	frappe.db.bulk_insert("Agreement Item Price History", fields, values)
+	return len(values)
+
+
+def _get_price_history_buffer() -> list:
+	"""Mevcut transaction için fiyat geçmişi buffer'ı.
+
+	İlk kullanımda buffer oluşturulur ve transaction'a bağlanır: commit öncesi
+	tek multi-row insert ile yazılır, rollback olursa atılır.
+	"""
+	buffer = getattr(frappe.local, "agreement_price_history_buffer", None)
+	if buffer is None:
+		buffer = frappe.local.agreement_price_history_buffer = []
+		frappe.db.before_commit.add(flush_price_history_buffer)
+		frappe.db.after_rollback.add(_discard_price_history_buffer)
+	return buffer
+
+
+def flush_price_history_buffer() -> int:
+	"""Buffer'daki fiyat geçmişi satırlarını tek insert ile yaz.
+
+	Returns:
+		Number of inserted rows
+	"""
+	rows = getattr(frappe.local, "agreement_price_history_buffer", None) or []
+	frappe.local.agreement_price_history_buffer = None
+	return _bulk_insert_price_history(rows)
+
+
+def _discard_price_history_buffer() -> None:
+	frappe.local.agreement_price_history_buffer = None
+
+
+def _reprice_agreement_items(standard_rates: dict, source: str = "Automatic") -> dict:
+	"""Standard Selling fiyat değişikliklerini tüm aktif Agreement'lara set-based uygula.
+
+	Tek sorguda etkilenen Agreement Item + Item Price satırlarını yükler,
+	yeni indirimli fiyatları hesaplar, Item Price'ları toplu günceller ve
+	history satırlarını toplu ekler. Ara commit yapılmaz (tek transaction).
+
+	Args:
+		standard_rates: {item_code: {currency: new_standard_rate}}
+		source: History kaynağı ("Automatic" / "Manual")
+
+	Returns:
+		dict: {"updated": int, "agreements": int, "changes": list, "missing": list}
+	"""
+	result = {"updated": 0, "agreements": 0, "changes": [], "missing": []}
+	if not standard_rates:
+		return result
+
+	rows = frappe.db.sql("""
+		SELECT
+			a.name AS agreement,
+			a.customer,
+			a.discount_rate,
+			ai.item_code,
+			ai.currency,
+			ai.standard_selling_rate,
+			ip.name AS item_price,
+			ip.currency AS item_price_currency,
+			ip.price_list_rate AS old_rate
+		FROM `tabAgreement` a
+		JOIN `tabAgreement Item` ai ON ai.parent = a.name AND ai.parenttype = 'Agreement'
+		LEFT JOIN `tabItem Price` ip
+			ON ip.price_list = a.customer
+			AND ip.item_code = ai.item_code
+			AND ip.agreement = a.name
+		WHERE a.docstatus = 1
+		  AND a.status = 'Active'
+		  AND ai.item_code IN %(item_codes)s
+		ORDER BY a.name, ai.idx
+	""", {"item_codes": tuple(standard_rates)}, as_dict=True)
+
+	# (agreement, item_code) -> satır grubu (bir item için birden fazla Item Price olabilir)
+	grouped = {}
+	for row in rows:
+		grouped.setdefault((row.agreement, row.item_code), []).append(row)
+
+	rate_updates = {}
+	history_rows = []
+	touched_agreements = set()
+
+	for (agreement_name, item_code), candidates in grouped.items():
+		first = candidates[0]
+		std_by_currency = standard_rates.get(item_code) or {}
+		currencies = [first.currency] if first.currency else list(std_by_currency)
+		discount_rate = frappe.utils.flt(first.discount_rate or 0)
+
+		for currency in currencies:
+			new_standard_rate = std_by_currency.get(currency)
+			if new_standard_rate is None:
+				continue
+
+			new_price = new_standard_rate * (1 - discount_rate / 100.0) if discount_rate > 0 else new_standard_rate
+
+			item_price = next(
+				(c for c in candidates if c.item_price and c.item_price_currency == currency and c.item_price not in rate_updates),
+				None,
+			)
+			if not item_price:
+				result["missing"].append((agreement_name, item_code, currency))
+				continue
+
+			old_price = frappe.utils.flt(item_price.old_rate)
+			if abs(old_price - new_price) < 0.005:
+				continue
+
+			rate_updates[item_price.item_price] = new_price
+			touched_agreements.add(agreement_name)
+			history_rows.append({
+				"agreement_name": agreement_name,
+				"item_code": item_code,
+				"old_price": old_price,
+				"new_price": new_price,
+				"currency": currency,
+				"old_standard": frappe.utils.flt(first.standard_selling_rate),
+				"new_standard": new_standard_rate,
+				"source": source,
+			})
+
+	_bulk_update_item_price_rates(rate_updates)
+	# Geçmiş satırları commit öncesi tek insert ile yazılır
+	_get_price_history_buffer().extend(history_rows)
+
+	if result["missing"]:
+		frappe.log_error(
+			message="Item Price not found for:\n" + "\n".join(
+				f"{item_code} ({currency}) - Agreement: {agreement_name}"
+				for agreement_name, item_code, currency in result["missing"][:50]
+			),
+			title="Agreement Price Update - Item Price Not Found"
+		)
+
+	result["updated"] = len(rate_updates)
+	result["agreements"] = len(touched_agreements)
+	result["changes"] = history_rows
+	return result
+
+
 def sync_agreement_prices_on_standard_change(doc, method):
-	"""Item Price (Standard Selling) güncellendiğinde ilgili Agreement'ların Item Price kayıtlarını güncelle.
+	"""Item Price (Standard Selling) değiştiğinde item kodunu reprice kuyruğuna ekle.
 	
 	ÖNEMLİ: Agreement Item'a DOKUNULMAZ (submitted belge)
-	Sadece Item Price kayıtları güncellenir.
+	Fiyatlar hook içinde güncellenmez; reprice_queue.drain_reprice_queue scheduler
+	job'u kuyruğu toplu işleyip Agreement Item Price kayıtlarını günceller.
+	Böylece Data Import gibi toplu değişiklikler her satırda reprice yapmaz ve
+	aynı item'ın tekrar eden değişiklikleri tek reprice'a indirgenir.
+	Aktif agreement'ta geçmeyen item'lar agreement_item_index ile DB sorgusu
+	yapılmadan elenir.
 	
 	Args:
 		doc: Item Price document
@@ -768,109 +1404,18 @@ def sync_agreement_prices_on_standard_change(doc, method):
 		return
 	
 	try:
-		# Bu item'ı içeren aktif agreement'ları bul
-		agreements = frappe.db.sql("""
-			SELECT DISTINCT 
-				a.name, 
-				a.customer, 
-				a.discount_rate,
-				a.valid_from,
-				a.valid_to,
-				ai.item_code,
-				ai.currency
-			FROM `tabAgreement` a
-			JOIN `tabAgreement Item` ai ON ai.parent = a.name
-			WHERE a.docstatus = 1
-			  AND a.status = 'Active'
-			  AND ai.item_code = %s
-		""", (doc.item_code,), as_dict=True)
-		
-		if not agreements:
-			frappe.logger().info(f"No active agreements found for item {doc.item_code}")
-			return
-		
-		updated_count = 0
-		failed_agreements = []
+		from culinary_order_management.culinary_order_management.agreement_item_index import is_agreement_item
+		from culinary_order_management.culinary_order_management.reprice_queue import enqueue_item_reprice
 		
-		for agreement_data in agreements:
-			try:
-				# Yeni fiyatı hesapla
-				new_standard_rate = doc.price_list_rate
-				discount_rate = frappe.utils.flt(agreement_data.discount_rate or 0)
-				
-				if discount_rate > 0:
-					new_price = new_standard_rate * (1 - discount_rate / 100.0)
-				else:
-					new_price = new_standard_rate
-				
-				# Price List name
-				price_list_name = agreement_data.customer
-				currency = agreement_data.currency or doc.currency
-				
-				# Item Price'ı güncelle (eski fiyatı da döndürür)
-				updated, old_agr_price = update_agreement_item_price(
-					price_list=price_list_name,
-					item_code=agreement_data.item_code,
-					currency=currency,
-					new_price=new_price,
-					valid_from=agreement_data.valid_from,
-					valid_upto=agreement_data.valid_to,
-					agreement_name=agreement_data.name
-				)
-				
-				if updated:
-					updated_count += 1
-					frappe.logger().info(
-						f"✅ Agreement {agreement_data.name} - {agreement_data.item_code}: "
-						f"Price updated from {old_agr_price} to {new_price} {currency}"
-					)
-					
-					# Eski standard rate bul (Agreement Item'dan)
-					old_std_rate = frappe.db.get_value("Agreement Item", {
-						"parent": agreement_data.name,
-						"item_code": agreement_data.item_code
-					}, "standard_selling_rate") or 0
-					
-					# Child table'a kaydet
-					create_price_change_log(
-						agreement_name=agreement_data.name,
-						item_code=agreement_data.item_code,
-						old_price=old_agr_price,
-						new_price=new_price,
-						currency=currency,
-						old_standard=float(old_std_rate),
-						new_standard=new_standard_rate,
-						source="Automatic"
-					)
-					
-			except Exception as e:
-				failed_agreements.append((agreement_data.name, str(e)))
-				frappe.log_error(
-					message=f"Agreement {agreement_data.name} price update failed: {str(e)}\n{traceback.format_exc()}",
-					title="Agreement Price Sync - Item Update Failed"
-				)
+		# Aktif agreement'ta geçmeyen item'lar için sorgu/kuyruk yok
+		if not is_agreement_item(doc.item_code):
+			return
 		
-		# Sonuç mesajı
-		if updated_count > 0:
-			msg = _("✅ {0} agreement price updated for {1}").format(updated_count, doc.item_code)
-			msgprint(msg, indicator="green", alert=True)
-			
-			# Log oluştur
-			frappe.logger().info(f"Standard price change: {doc.item_code} - {updated_count} agreements updated")
+		enqueue_item_reprice(doc.item_code)
 		
-		if failed_agreements:
-			error_msg = _("⚠️ {0} agreement(s) could not be updated:").format(len(failed_agreements)) + "\n"
-			for name, error in failed_agreements[:3]:
-				error_msg += f"  - {name}: {error}\n"
-			
-			if len(failed_agreements) > 3:
-				error_msg += f"  ... and {len(failed_agreements) - 3} more\n"
-			
-			msgprint(error_msg, indicator="orange", alert=True)
-			
 	except Exception as e:
 		frappe.log_error(
-			message=f"Failed to sync agreement prices for {doc.item_code}: {str(e)}\n{traceback.format_exc()}",
+			message=f"Failed to queue agreement reprice for {doc.item_code}: {str(e)}\n{traceback.format_exc()}",
 			title="Agreement Price Sync - Critical Error"
 		)
 		# Re-raise etme - Item Price update'i iptal etmesin
@@ -899,7 +1444,7 @@ def update_agreement_item_price(
 		new_price: New price
 		valid_from: Valid from date
 		valid_upto: Valid to date
-		agreement_name: Agreement name (for note field)
+		agreement_name: Agreement name (Item Price.agreement)
 		
 	Returns:
 		tuple: (success: bool, old_price: float) - Eski fiyatı da döndür
@@ -928,12 +1473,10 @@ def update_agreement_item_price(
 		old_price = item_price_doc.price_list_rate
 		
 		# Item Price'ı güncelle (ORM ile - hook'lar tetiklenir!)
+		# Commit çağıranın unit of work'ünde yapılır
 		item_price_doc.price_list_rate = new_price
 		item_price_doc.save(ignore_permissions=True)
 		
-		# Commit et (önemli!)
-		frappe.db.commit()
-		
 		frappe.logger().info(
 			f"Item Price {item_price_name} updated: {old_price} → {new_price} {currency} (ORM - hooks triggered)"
 		)
@@ -975,90 +1518,99 @@ def manual_update_agreement_prices(agreement_name: str):
 				"error": _("Only active agreements can be updated")
 			}
 		
+		from culinary_order_management.culinary_order_management.unit_of_work import UnitOfWork
+		
 		updated_count = 0
 		price_changes = []
 		failed_items = []
+		company_ccy = frappe.db.get_value("Company", {"is_group": 0}, "default_currency") or "EUR"
+		discount_rate = frappe.utils.flt(agreement.discount_rate or 0)
 		
-		for item in agreement.agreement_items:
-			if not item.item_code:
-				continue
-			
-			try:
-				# Güncel Standard Selling fiyatını çek
-				currency = item.currency or frappe.db.get_value("Company", {"is_group": 0}, "default_currency") or "EUR"
-				new_standard_rate = _get_standard_selling_rate(item.item_code, currency)
-				
-				if not new_standard_rate or new_standard_rate <= 0:
-					failed_items.append((item.item_code, "Standard Selling price not found"))
+		# Her item kendi savepoint'inde; tek commit (büyük agreement'larda chunk bazlı)
+		with UnitOfWork() as uow:
+			for item in agreement.agreement_items:
+				if not item.item_code:
 					continue
 				
-				# Yeni fiyatı hesapla
-				discount_rate = frappe.utils.flt(agreement.discount_rate or 0)
-				if discount_rate > 0:
-					new_price = new_standard_rate * (1 - discount_rate / 100.0)
-				else:
-					new_price = new_standard_rate
-				
-				# Eski fiyatı al
-				price_list_name = agreement.customer
-				existing = _find_existing_item_price(
-					price_list_name,
-					item.item_code,
-					currency,
-					agreement.valid_from,
-					agreement.valid_to,
-					agreement.name
-				)
-				
-				if not existing:
-					failed_items.append((item.item_code, "Item Price not found"))
-					continue
-				
-				# Eski fiyatı oku
-				old_price = frappe.db.get_value("Item Price", existing[0], "price_list_rate")
-				
-				# Fiyat değişti mi?
-				if abs(float(old_price) - new_price) < 0.01:
-					continue
-				
-				# Güncelle (eski fiyatı döndürür)
-				updated, returned_old_price = update_agreement_item_price(
-					price_list=price_list_name,
-					item_code=item.item_code,
-					currency=currency,
-					new_price=new_price,
-					valid_from=agreement.valid_from,
-					valid_upto=agreement.valid_to,
-					agreement_name=agreement.name
-				)
-				
-				if updated:
-					updated_count += 1
-					price_changes.append({
-						"item_code": item.item_code,
-						"old_price": returned_old_price,
-						"new_price": new_price,
-						"currency": currency
-					})
-					
-					# Log oluştur (child table'a kaydet)
-					create_price_change_log(
-						agreement_name=agreement.name,
-						item_code=item.item_code,
-						old_price=returned_old_price,
-						new_price=new_price,
-						currency=currency,
-						old_standard=frappe.utils.flt(item.standard_selling_rate),
-						new_standard=new_standard_rate,
-						source="Manual"
+				try:
+					with uow.item(item.item_code):
+						# Güncel Standard Selling fiyatını çek
+						currency = item.currency or company_ccy
+						new_standard_rate = _get_standard_selling_rate(item.item_code, currency)
+						
+						if not new_standard_rate or new_standard_rate <= 0:
+							failed_items.append((item.item_code, "Standard Selling price not found"))
+							continue
+						
+						# Yeni fiyatı hesapla
+						if discount_rate > 0:
+							new_price = new_standard_rate * (1 - discount_rate / 100.0)
+						else:
+							new_price = new_standard_rate
+						
+						# Eski fiyatı al
+						price_list_name = agreement.customer
+						existing = _find_existing_item_price(
+							price_list_name,
+							item.item_code,
+							currency,
+							agreement.valid_from,
+							agreement.valid_to,
+							agreement.name
+						)
+						
+						if not existing:
+							failed_items.append((item.item_code, "Item Price not found"))
+							continue
+						
+						# Eski fiyatı oku
+						old_price = frappe.db.get_value("Item Price", existing[0], "price_list_rate")
+						
+						# Fiyat değişti mi?
+						if abs(float(old_price) - new_price) < 0.01:
+							continue
+						
+						# Güncelle (eski fiyatı döndürür)
+						updated, returned_old_price = update_agreement_item_price(
+							price_list=price_list_name,
+							item_code=item.item_code,
+							currency=currency,
+							new_price=new_price,
+							valid_from=agreement.valid_from,
+							valid_upto=agreement.valid_to,
+							agreement_name=agreement.name
+						)
+						
+						if not updated:
+							# Savepoint'e geri dön - item yarım kalmasın
+							raise ValidationError(_("Item Price update failed"))
+						
+						# Log oluştur (commit öncesi toplu yazılır)
+						create_price_change_log(
+							agreement_name=agreement.name,
+							item_code=item.item_code,
+							old_price=returned_old_price,
+							new_price=new_price,
+							currency=currency,
+							old_standard=frappe.utils.flt(item.standard_selling_rate),
+							new_standard=new_standard_rate,
+							source="Manual"
+						)
+						
+						updated_count += 1
+						price_changes.append({
+							"item_code": item.item_code,
+							"old_price": returned_old_price,
+							"new_price": new_price,
+							"currency": currency
+						})
+						
+				except Exception as e:
+					failed_items.append((item.item_code, str(e)))
+					frappe.log_error(
+						message=f"Failed to update price for {item.item_code}: {str(e)}\n{traceback.format_exc()}",
+						title="Manual Agreement Price Update - Item Failed"
 					)
-					
-			except Exception as e:
-				failed_items.append((item.item_code, str(e)))
-				frappe.log_error(
-					message=f"Failed to update price for {item.item_code}: {str(e)}\n{traceback.format_exc()}",
-					title="Manual Agreement Price Update - Item Failed"
-				)
 		
 		# Sonuç mesajı
 		result = {
@@ -1073,7 +1625,6 @@ def manual_update_agreement_prices(agreement_name: str):
 				error_msg += f"  - {item_code}: {reason}\n"
 			result["warning"] = error_msg
 		
-		frappe.db.commit()
 		return result
 		
 	except Exception as e:
@@ -1098,7 +1649,10 @@ def create_price_change_log(
 	new_standard: float = 0,
 	source: str = "Automatic"
 ):
-	"""Fiyat değişiklik logu oluştur (child table'a kaydet).
+	"""Fiyat değişiklik logu oluştur (Agreement Item Price History log'una kaydet).
+	
+	Satır hemen yazılmaz ve commit yapılmaz; transaction buffer'ına eklenir ve
+	commit öncesi diğer satırlarla birlikte tek multi-row insert ile yazılır.
 	
 	Args:
 		agreement_name: Agreement name
@@ -1111,30 +1665,20 @@ def create_price_change_log(
 		source: "Automatic" or "Manual"
 	"""
 	try:
-		# Child table'a doğrudan SQL ile ekle (submitted belge için)
-		diff = new_price - old_price
-		diff_pct = (diff / old_price * 100) if old_price > 0 else 0
-		
-		# Yeni row oluştur
-		row = frappe.new_doc("Agreement Item Price History")
-		row.parent = agreement_name
-		row.parenttype = "Agreement"
-		row.parentfield = "price_history"
-		row.change_date = frappe.utils.now()
-		row.item_code = item_code
-		row.old_standard_rate = old_standard
-		row.new_standard_rate = new_standard
-		row.old_agreement_rate = old_price
-		row.new_agreement_rate = new_price
-		row.currency = currency
-		row.change_percentage = diff_pct
-		row.changed_by = frappe.session.user
-		row.source = source
-		row.insert(ignore_permissions=True)
-		
-		frappe.db.commit()
-		
-		frappe.logger().info(f"Price change logged to child table: {agreement_name} - {item_code}: {old_price} → {new_price}")
+		# Buffer'a ekle - transaction commit edilirken tek insert ile yazılır
+		_get_price_history_buffer().append({
+			"agreement_name": agreement_name,
+			"item_code": item_code,
+			"old_price": old_price,
+			"new_price": new_price,
+			"currency": currency,
+			"old_standard": old_standard,
+			"new_standard": new_standard,
+			"source": source,
+			"change_date": frappe.utils.now(),
+		})
+		
+		frappe.logger().info(f"Price change logged: {agreement_name} - {item_code}: {old_price} → {new_price}")
 		
 	except Exception as e:
 		frappe.log_error(
@@ -1143,10 +1687,259 @@ def create_price_change_log(
 		)
 
 
+PRICE_HISTORY_PAGE_LENGTH = 20
+
+
+@frappe.whitelist()
+def get_price_history(
+	agreement_name: str,
+	item_code: str = None,
+	start: int = 0,
+	page_length: int = PRICE_HISTORY_PAGE_LENGTH,
+	include_archived: int = 0,
+):
+	"""Agreement'ın fiyat geçmişini sayfalı getir (en yeni önce).
+	
+	Args:
+		agreement_name: Agreement name
+		item_code: Opsiyonel - Belirli bir ürün için filtrele
+		start: Başlangıç offset'i
+		page_length: Sayfa boyutu
+		include_archived: 1 ise retention job'ın arşivlediği satırlar DB satırlarından sonra gelir
+		
+	Returns:
+		dict: {"rows": [...], "total": int, "has_more": bool}
+	"""
+	frappe.has_permission("Agreement", "read", agreement_name, throw=True)
+	
+	filters = {"agreement": agreement_name}
+	if item_code:
+		filters["item_code"] = item_code
+	
+	start = frappe.utils.cint(start)
+	page_length = frappe.utils.cint(page_length) or PRICE_HISTORY_PAGE_LENGTH
+	
+	rows = frappe.get_all(
+		"Agreement Item Price History",
+		filters=filters,
+		fields=[
+			"name", "change_date", "item_code", "old_standard_rate", "new_standard_rate",
+			"old_agreement_rate", "new_agreement_rate", "currency", "change_percentage",
+			"changed_by", "source", "change_count",
+		],
+		order_by="change_date desc",
+		limit_start=start,
+		limit_page_length=page_length,
+		ignore_permissions=True,
+	)
+	total = frappe.db.count("Agreement Item Price History", filters)
+	
+	if frappe.utils.cint(include_archived):
+		from culinary_order_management.culinary_order_management.price_history_retention import read_archived_history
+		
+		archived = read_archived_history(agreement_name, item_code)
+		if len(rows) < page_length:
+			archived_start = max(0, start - total)
+			rows += archived[archived_start:archived_start + page_length - len(rows)]
+		total += len(archived)
+	
+	return {
+		"rows": rows,
+		"total": total,
+		"has_more": start + len(rows) < total,
+	}
+
+
+@frappe.whitelist()
+def get_price_history_summary(agreement_name: str):
+	"""Agreement'ın fiyat geçmişini ürün bazında özetle (tek GROUP BY sorgusu).
+	
+	Returns:
+		dict: {"total": int, "items": [{"item_code", "currency", "change_count",
+		       "first_change", "last_change", "min_rate", "max_rate"}]}
+	"""
+	frappe.has_permission("Agreement", "read", agreement_name, throw=True)
+	
+	items = frappe.db.sql(
+		"""
+		SELECT item_code, currency,
+			SUM(IFNULL(NULLIF(change_count, 0), 1)) AS change_count,
+			MIN(change_date) AS first_change,
+			MAX(change_date) AS last_change,
+			MIN(new_agreement_rate) AS min_rate,
+			MAX(new_agreement_rate) AS max_rate
+		FROM `tabAgreement Item Price History`
+		WHERE agreement = %(agreement)s
+		GROUP BY item_code, currency
+		ORDER BY last_change DESC
+		""",
+		{"agreement": agreement_name},
+		as_dict=True,
+	)
+	
+	return {
+		"total": sum(row.change_count for row in items),
+		"items": items,
+	}
+
+
+PRICE_SERIES_MAX_POINTS = 200
+PRICE_SERIES_BUCKETS = {
+	"day": "%%Y-%%m-%%d",
+	"week": "%%x-W%%v",
+	"month": "%%Y-%%m",
+}
+
+
+def _auto_series_bucket(agreement_name: str, item_code: str = None) -> str:
+	"""Geçmişin zaman aralığına göre bucket seç (≤90 gün: gün, ≤2 yıl: hafta, üstü: ay)."""
+	item_condition = "AND item_code = %(item_code)s" if item_code else ""
+	first, last = frappe.db.sql(
+		f"""
+		SELECT MIN(change_date), MAX(change_date)
+		FROM `tabAgreement Item Price History`
+		WHERE agreement = %(agreement)s {item_condition}
+		""",
+		{"agreement": agreement_name, "item_code": item_code},
+	)[0]
+	if not first or not last:
+		return "day"
+	span = (frappe.utils.get_datetime(last) - frappe.utils.get_datetime(first)).days
+	return "day" if span <= 90 else "week" if span <= 730 else "month"
+
+
+def _lttb(points: list, threshold: int) -> list:
+	"""Largest-Triangle-Three-Buckets downsampling.
+
+	Args:
+		points: [(x: float, y: float, payload)] x'e göre sıralı
+		threshold: Hedef nokta sayısı
+	"""
+	if threshold >= len(points) or threshold < 3:
+		return points
+
+	sampled = [points[0]]
+	bucket_size = (len(points) - 2) / (threshold - 2)
+	a = 0
+	for i in range(threshold - 2):
+		start = int(i * bucket_size) + 1
+		end = int((i + 1) * bucket_size) + 1
+
+		# Sonraki bucket'ın ortalaması
+		next_start = end
+		next_end = min(int((i + 2) * bucket_size) + 1, len(points))
+		next_bucket = points[next_start:next_end] or [points[-1]]
+		avg_x = sum(p[0] for p in next_bucket) / len(next_bucket)
+		avg_y = sum(p[1] for p in next_bucket) / len(next_bucket)
+
+		ax, ay = points[a][0], points[a][1]
+		best, best_area = start, -1.0
+		for j in range(start, min(end, len(points))):
+			area = abs((ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay))
+			if area > best_area:
+				best, best_area = j, area
+		sampled.append(points[best])
+		a = best
+
+	sampled.append(points[-1])
+	return sampled
+
+
+@frappe.whitelist()
+def get_price_history_series(
+	agreement_name: str,
+	item_code: str = None,
+	bucket: str = "auto",
+	method: str = "bucket",
+	max_points: int = PRICE_SERIES_MAX_POINTS,
+):
+	"""Fiyat geçmişini grafik için sunucu tarafında seyreltilmiş seri olarak getir.
+	
+	(agreement, item_code, change_date) index'i üzerinden çalışır; log ne kadar uzun
+	olursa olsun tarayıcıya sadece özet noktalar gider.
+	
+	Args:
+		agreement_name: Agreement name
+		item_code: Opsiyonel - verilirse item fiyat serisi, yoksa agreement geneli değişim serisi
+		bucket: "day" / "week" / "month" / "auto"
+		method: "bucket" (periyot başına min/max/son) veya "lttb" (sadece item serisi)
+		max_points: LTTB hedef nokta sayısı
+		
+	Returns:
+		dict: {"bucket", "method", "points": [...]}
+	"""
+	frappe.has_permission("Agreement", "read", agreement_name, throw=True)
+	
+	if item_code and method == "lttb":
+		rows = frappe.db.sql(
+			"""
+			SELECT change_date, new_agreement_rate
+			FROM `tabAgreement Item Price History`
+			WHERE agreement = %(agreement)s AND item_code = %(item_code)s
+			ORDER BY change_date
+			""",
+			{"agreement": agreement_name, "item_code": item_code},
+		)
+		points = [
+			(frappe.utils.get_datetime(change_date).timestamp(), frappe.utils.flt(rate), change_date)
+			for change_date, rate in rows
+		]
+		max_points = frappe.utils.cint(max_points) or PRICE_SERIES_MAX_POINTS
+		return {
+			"bucket": None,
+			"method": "lttb",
+			"points": [{"date": p[2], "rate": p[1]} for p in _lttb(points, max_points)],
+		}
+	
+	if bucket not in PRICE_SERIES_BUCKETS:
+		bucket = _auto_series_bucket(agreement_name, item_code)
+	date_format = PRICE_SERIES_BUCKETS[bucket]
+	
+	if item_code:
+		points = frappe.db.sql(
+			f"""
+			SELECT DATE_FORMAT(change_date, '{date_format}') AS period,
+				MIN(change_date) AS period_start,
+				MIN(new_agreement_rate) AS min_rate,
+				MAX(new_agreement_rate) AS max_rate,
+				SUBSTRING_INDEX(GROUP_CONCAT(new_agreement_rate ORDER BY change_date DESC), ',', 1) + 0 AS last_rate,
+				SUM(IFNULL(NULLIF(change_count, 0), 1)) AS changes
+			FROM `tabAgreement Item Price History`
+			WHERE agreement = %(agreement)s AND item_code = %(item_code)s
+			GROUP BY period
+			ORDER BY period_start
+			""",
+			{"agreement": agreement_name, "item_code": item_code},
+			as_dict=True,
+		)
+	else:
+		points = frappe.db.sql(
+			f"""
+			SELECT DATE_FORMAT(change_date, '{date_format}') AS period,
+				MIN(change_date) AS period_start,
+				SUM(IFNULL(NULLIF(change_count, 0), 1)) AS changes,
+				COUNT(DISTINCT item_code) AS items,
+				AVG(change_percentage) AS avg_change_pct,
+				MIN(change_percentage) AS min_change_pct,
+				MAX(change_percentage) AS max_change_pct
+			FROM `tabAgreement Item Price History`
+			WHERE agreement = %(agreement)s
+			GROUP BY period
+			ORDER BY period_start
+			""",
+			{"agreement": agreement_name},
+			as_dict=True,
+		)
+	
+	return {"bucket": bucket, "method": "bucket", "points": points}
+
+
 @frappe.whitelist()
 def clear_price_history(agreement_name: str, item_code: str = None):
 	"""Agreement'ın fiyat değişiklik geçmişini temizle.
 	
+	Retention job'ın arşivlediği satırlar da (arşiv dosyaları) aynı filtre ile silinir.
+	
 	Args:
 		agreement_name: Agreement name
 		item_code: Opsiyonel - Belirli bir ürün için temizle
@@ -1163,13 +1956,24 @@ def clear_price_history(agreement_name: str, item_code: str = None):
 			}
 		
 		# Silme filtreleri
-		filters = {"parent": agreement_name}
+		filters = {"agreement": agreement_name}
 		if item_code:
 			filters["item_code"] = item_code
 		
+		from culinary_order_management.culinary_order_management.price_history_retention import delete_archived_history
+		from culinary_order_management.culinary_order_management.unit_of_work import UnitOfWork
+		
 		# Kaç kayıt silinecek?
 		count = frappe.db.count("Agreement Item Price History", filters)
 		
+		# SQL ile toplu silme (hızlı) - tek commit
+		if count:
+			with UnitOfWork():
+				frappe.db.delete("Agreement Item Price History", filters)
+		
+		# Arşiv dosyaları DB commit'inden sonra yeniden yazılır
+		count += delete_archived_history(agreement_name, item_code=item_code)
+		
 		if count == 0:
 			return {
 				"success": True,
@@ -1177,10 +1981,6 @@ def clear_price_history(agreement_name: str, item_code: str = None):
 				"message": _("No records to delete")
 			}
 		
-		# SQL ile toplu silme (hızlı)
-		frappe.db.delete("Agreement Item Price History", filters)
-		frappe.db.commit()
-		
 		frappe.logger().info(f"Price history cleared: {agreement_name} - {count} records deleted")
 		
 		return {
@@ -1202,15 +2002,42 @@ def clear_price_history(agreement_name: str, item_code: str = None):
 
 
 @frappe.whitelist()
-def delete_price_history_row(row_name: str):
+def delete_price_history_row(row_name: str, agreement_name: str = None):
 	"""Tek bir price history kaydını sil.
 	
 	Args:
 		row_name: Price history row name
+		agreement_name: Arşivlenmiş satırlar için zorunlu (archived=1)
 		
 	Returns:
 		dict: {"success": bool}
 	"""
+	result = delete_price_history_rows([row_name], agreement_name=agreement_name)
+	if result.get("success") and result.get("failed"):
+		return {
+			"success": False,
+			"error": result["failed"][0]["error"]
+		}
+	return result
+
+
+@frappe.whitelist()
+def delete_price_history_rows(row_names, agreement_name: str = None):
+	"""Birden fazla price history kaydını tek unit of work içinde sil.
+	
+	Her satır kendi savepoint'inde silinir; hatalı satır geri alınır, diğerleri
+	silinmeye devam eder. Sonda tek commit yapılır. DB'de olmayan satırlar
+	agreement_name verilmişse agreement'ın arşiv dosyalarından silinir.
+	
+	Args:
+		row_names: Price history row names (list veya JSON)
+		agreement_name: Arşivlenmiş satırlar için agreement (get_price_history archived=1)
+		
+	Returns:
+		dict: {"success": bool, "deleted_count": int, "failed": [{"name", "error"}]}
+	"""
+	from culinary_order_management.culinary_order_management.unit_of_work import UnitOfWork
+	
 	try:
 		# Permission check
 		if not frappe.has_permission("Agreement", "write"):
@@ -1219,21 +2046,72 @@ def delete_price_history_row(row_name: str):
 				"error": _("You don't have permission to modify Agreement")
 			}
 		
-		# ORM ile sil (hooks tetiklenir)
-		frappe.delete_doc("Agreement Item Price History", row_name, ignore_permissions=True, force=True)
-		frappe.db.commit()
+		if isinstance(row_names, str):
+			row_names = frappe.parse_json(row_names)
+		row_names = list(row_names or [])
+		
+		if agreement_name and not frappe.has_permission("Agreement", "write", agreement_name):
+			return {
+				"success": False,
+				"error": _("You don't have permission to modify Agreement")
+			}
+		
+		db_rows = set(frappe.get_all(
+			"Agreement Item Price History", filters={"name": ["in", row_names]}, pluck="name"
+		)) if row_names else set()
+		archived_rows = [name for name in row_names if name not in db_rows]
 		
-		frappe.logger().info(f"Price history row deleted: {row_name}")
+		failed = []
+		with UnitOfWork() as uow:
+			for row_name in row_names:
+				if row_name not in db_rows:
+					continue
+				try:
+					with uow.item(row_name):
+						# ORM ile sil (hooks tetiklenir)
+						frappe.delete_doc("Agreement Item Price History", row_name, ignore_permissions=True, force=True)
+				except Exception as e:
+					failed.append({"name": row_name, "error": str(e)})
+		
+		deleted_count = uow.completed
+		if archived_rows:
+			if agreement_name:
+				from culinary_order_management.culinary_order_management.price_history_retention import (
+					delete_archived_history
+				)
+				removed = delete_archived_history(agreement_name, row_names=archived_rows)
+				deleted_count += removed
+				if removed < len(archived_rows):
+					failed.append({
+						"name": ", ".join(archived_rows),
+						"error": _("Some rows were not found in the database or the agreement archive")
+					})
+			else:
+				for row_name in archived_rows:
+					failed.append({
+						"name": row_name,
+						"error": _("Row not found. Archived price history rows can only be deleted with agreement_name")
+					})
+		
+		frappe.logger().info(f"Price history rows deleted: {deleted_count} deleted, {len(failed)} failed")
+		
+		if failed:
+			frappe.log_error(
+				message="\n".join(f"{row['name']}: {row['error']}" for row in failed),
+				title="Delete Price History Row - Failed"
+			)
 		
 		return {
 			"success": True,
-			"message": _("Record deleted")
+			"deleted_count": deleted_count,
+			"failed": failed,
+			"message": _("Record deleted") if deleted_count == 1 else _("{0} records deleted").format(deleted_count)
 		}
 		
 	except Exception as e:
 		frappe.db.rollback()
 		frappe.log_error(
-			message=f"Failed to delete price history row: {str(e)}\n{traceback.format_exc()}",
+			message=f"Failed to delete price history rows: {str(e)}\n{traceback.format_exc()}",
 			title="Delete Price History Row - Failed"
 		)
 		return {
@@ -0,0 +1,280 @@
+"""
+Culinary Order Management - High-volume Agreement Item import
+
+Taslak (draft) Agreement'a CSV/XLSX'ten binlerce item yükler. Dosya satır satır
+okunur (CSV reader / openpyxl read_only) ve sabit boyutlu batch'ler halinde işlenir;
+tüm dosya belleğe alınmaz. Her batch için item'lar ve Standard Selling fiyatları tek
+sorgularla önceden yüklenir, doğrulama bellekte yapılır ve geçerli satırlar Agreement
+Item tablosuna multi-row insert ile yazılır; Agreement belgesi kaydedilmez (satır
+başına validate/child save yok). Mükerrer item kontrolü batch'ler arasında korunur.
+Hatalı satırlar satır numarası ile raporlanır.
+
+Kolonlar: item_code, price_list_rate (veya rate / price), currency (opsiyonel),
+standard_selling_rate (opsiyonel)
+"""
+
+import csv
+import os
+from itertools import chain, islice
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt
+
+RATE_COLUMNS = ("price_list_rate", "rate", "price")
+MAX_REPORTED_ERRORS = 500
+IMPORT_BATCH_SIZE = 1000
+AGREEMENT_ITEM_COLUMNS = [
+	"name", "owner", "creation", "modified", "modified_by", "docstatus",
+	"parent", "parenttype", "parentfield", "idx",
+	"item_code", "item_name", "item_group", "kitchen_item", "uom",
+	"standard_selling_rate", "price_list_rate", "currency",
+]
+
+
+def _normalize_row(raw: dict) -> dict:
+	return {
+		str(k or "").strip().lower().replace(" ", "_"): (str(v).strip() if v is not None else "")
+		for k, v in raw.items()
+	}
+
+
+def _iter_csv(path: str):
+	with open(path, newline="", encoding="utf-8-sig") as f:
+		for line_no, raw in enumerate(csv.DictReader(f), start=2):
+			yield line_no, _normalize_row(raw)
+
+
+def _iter_xlsx(path: str):
+	from openpyxl import load_workbook
+
+	workbook = load_workbook(path, read_only=True, data_only=True)
+	try:
+		rows = workbook.active.iter_rows(values_only=True)
+		header = next(rows, None) or ()
+		for line_no, values in enumerate(rows, start=2):
+			if not any(v not in (None, "") for v in values):
+				continue
+			yield line_no, _normalize_row(dict(zip(header, values)))
+	finally:
+		workbook.close()
+
+
+def _iter_file_rows(file_url: str):
+	"""Yüklenen dosyayı satır satır oku: (line_no, {kolon: değer})"""
+	file_doc = frappe.get_doc("File", {"file_url": file_url})
+	# Private dosyalar sadece okuma yetkisi olan kullanıcıya açılır
+	file_doc.check_permission("read")
+	path = file_doc.get_full_path()
+	extension = os.path.splitext(path)[1].lower()
+
+	if extension == ".csv":
+		return _iter_csv(path)
+	if extension in (".xlsx", ".xlsm"):
+		return _iter_xlsx(path)
+	frappe.throw(_("Only CSV and XLSX files are supported"))
+
+
+def _parse_rate(value: str):
+	if not value:
+		return None
+	try:
+		return float(value.replace(",", "."))
+	except ValueError:
+		return False
+
+
+def _load_items(item_codes: set) -> dict:
+	if not item_codes:
+		return {}
+	rows = frappe.db.sql(
+		"""
+		select name, item_name, item_group, is_kitchen_item, stock_uom, disabled, is_sales_item
+		from `tabItem`
+		where name in %(item_codes)s
+		""",
+		{"item_codes": tuple(item_codes)},
+		as_dict=True,
+	)
+	return {row.name: row for row in rows}
+
+
+def _validate_rows(doc, rows: list, seen: set, fallback_to_standard: bool, company_ccy: str, currencies: set) -> tuple:
+	"""Bir batch satırı önceden yüklenmiş set'lere karşı doğrula.
+
+	Args:
+		rows: [(line_no, row)]
+		seen: Şimdiye kadar kabul edilen item kodları (yerinde güncellenir, batch'ler arası mükerrer kontrolü)
+		currencies: Aktif para birimleri
+
+	Returns:
+		tuple: (valid_rows: [dict], errors: [{"row", "item_code", "error"}])
+	"""
+	from culinary_order_management.culinary_order_management.agreement import _get_standard_selling_rates
+
+	item_codes = {row.get("item_code") for _line, row in rows if row.get("item_code")}
+	items = _load_items(item_codes)
+	row_currencies = {row.get("currency") or company_ccy for _line, row in rows}
+	standard_rates = _get_standard_selling_rates(list(item_codes), row_currencies) if item_codes else {}
+	discount = flt(doc.discount_rate)
+
+	valid = []
+	errors = []
+
+	def error(line_no, item_code, message):
+		errors.append({"row": line_no, "item_code": item_code, "error": message})
+
+	for line_no, row in rows:
+		item_code = row.get("item_code")
+		if not item_code:
+			error(line_no, None, _("Item Code is mandatory"))
+			continue
+
+		item = items.get(item_code)
+		if not item:
+			error(line_no, item_code, _("Item not found"))
+			continue
+		if item.disabled or not item.is_sales_item:
+			error(line_no, item_code, _("Item is disabled or not a sales item"))
+			continue
+		if item_code in seen:
+			error(line_no, item_code, _("Duplicate item"))
+			continue
+
+		currency = row.get("currency") or company_ccy
+		if currency not in currencies:
+			error(line_no, item_code, _("Invalid currency {0}").format(currency))
+			continue
+
+		standard = _parse_rate(row.get("standard_selling_rate"))
+		if standard is False:
+			error(line_no, item_code, _("Invalid standard selling rate"))
+			continue
+		standard = standard or standard_rates.get((item_code, currency), 0.0)
+
+		rate = next((_parse_rate(row.get(c)) for c in RATE_COLUMNS if row.get(c)), None)
+		if rate is False:
+			error(line_no, item_code, _("Invalid price"))
+			continue
+		if rate is None and fallback_to_standard and standard:
+			rate = round(standard * (1.0 - discount / 100.0), 2)
+		if not rate or rate <= 0:
+			error(line_no, item_code, _("Please enter a valid price"))
+			continue
+
+		seen.add(item_code)
+		valid.append({
+			"item": item,
+			"currency": currency,
+			"standard_selling_rate": standard,
+			"price_list_rate": rate,
+		})
+
+	return valid, errors
+
+
+def _insert_agreement_items(agreement_name: str, valid_rows: list, start_idx: int) -> int:
+	now = frappe.utils.now()
+	user = frappe.session.user
+	values = [
+		(
+			frappe.generate_hash(length=10), user, now, now, user, 0,
+			agreement_name, "Agreement", "agreement_items", start_idx + i,
+			row["item"].name, row["item"].item_name, row["item"].item_group,
+			cint(row["item"].is_kitchen_item), row["item"].stock_uom,
+			row["standard_selling_rate"], row["price_list_rate"], row["currency"],
+		)
+		for i, row in enumerate(valid_rows, start=1)
+	]
+	if values:
+		frappe.db.bulk_insert("Agreement Item", AGREEMENT_ITEM_COLUMNS, values)
+	return len(values)
+
+
+@frappe.whitelist()
+def import_agreement_items(agreement: str, file_url: str, replace_existing: int = 0, fallback_to_standard: int = 1):
+	"""CSV/XLSX dosyasından taslak Agreement'a item'ları toplu yükle.
+
+	Args:
+		agreement: Draft Agreement name
+		file_url: Yüklenmiş dosya (File.file_url)
+		replace_existing: 1 ise mevcut item satırları silinir
+		fallback_to_standard: Fiyat boşsa Standard Selling * (1 - indirim) kullan
+
+	Returns:
+		dict: {"imported": int, "error_count": int, "errors": [{"row", "item_code", "error"}]}
+
+	Requires: Agreement write permission
+	"""
+	doc = frappe.get_doc("Agreement", agreement)
+	doc.check_permission("write")
+	if doc.docstatus != 0:
+		frappe.throw(_("Items can only be imported into a draft agreement"))
+
+	from culinary_order_management.culinary_order_management.agreement import _get_company_currency
+
+	rows = ((line_no, row) for line_no, row in _iter_file_rows(file_url) if any(row.values()))
+	first = next(rows, None)
+	if not first:
+		frappe.throw(_("The file has no rows"))
+	if "item_code" not in first[1]:
+		frappe.throw(_("The file must contain an item_code column"))
+	rows = chain([first], rows)
+
+	replace_existing = cint(replace_existing)
+	existing = frappe.db.sql(
+		"""
+		select item_code, idx
+		from `tabAgreement Item`
+		where parent = %(agreement)s and parenttype = 'Agreement' and parentfield = 'agreement_items'
+		""",
+		{"agreement": agreement},
+	)
+	seen = set() if replace_existing else {item_code for item_code, _idx in existing}
+	next_idx = 0 if replace_existing else max((cint(idx) for _code, idx in existing), default=0)
+
+	company_ccy = _get_company_currency()
+	currencies = set(frappe.get_all("Currency", filters={"enabled": 1}, pluck="name"))
+	fallback_to_standard = cint(fallback_to_standard)
+
+	imported = 0
+	error_count = 0
+	errors = []
+	while True:
+		batch = list(islice(rows, IMPORT_BATCH_SIZE))
+		if not batch:
+			break
+
+		valid_rows, batch_errors = _validate_rows(doc, batch, seen, fallback_to_standard, company_ccy, currencies)
+		error_count += len(batch_errors)
+		errors.extend(batch_errors[:MAX_REPORTED_ERRORS - len(errors)])
+
+		if replace_existing and valid_rows and not imported:
+			# Mevcut satırlar ilk geçerli batch yazılmadan hemen önce silinir
+			frappe.db.sql(
+				"""
+				delete from `tabAgreement Item`
+				where parent = %(agreement)s and parenttype = 'Agreement' and parentfield = 'agreement_items'
+				""",
+				{"agreement": agreement},
+			)
+
+		inserted = _insert_agreement_items(agreement, valid_rows, next_idx)
+		imported += inserted
+		next_idx += inserted
+
+	if imported:
+		frappe.db.sql(
+			"update `tabAgreement` set modified = %(now)s, modified_by = %(user)s where name = %(agreement)s",
+			{"now": frappe.utils.now(), "user": frappe.session.user, "agreement": agreement},
+		)
+
+	frappe.logger().info(
+		f"Agreement item import {agreement}: {imported} imported, {error_count} rows with errors"
+	)
+
+	return {
+		"imported": imported,
+		"error_count": error_count,
+		"errors": errors,
+	}
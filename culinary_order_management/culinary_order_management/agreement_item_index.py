@@ -0,0 +1,79 @@
+"""
+Culinary Order Management - Active agreement item index
+
+Aktif (submitted, status=Active) agreement'larda geçen item kodları Redis'te bir
+set olarak tutulur. Item Price hook'u bu set ile, anlaşma kapsamında olmayan
+item'lar için hiçbir DB sorgusu yapmadan döner.
+
+Set tembel kurulur (ilk ihtiyaçta tek sorgu). Agreement aktif olduğunda item'ları
+sete eklenir; item çıkarabilen değişikliklerde (cancel, expiry, submit sonrası
+item düzenleme) set geçersiz kılınır ve bir sonraki okumada yeniden kurulur.
+"""
+
+import frappe
+
+AGREEMENT_ITEM_INDEX_KEY = "culinary_active_agreement_item_codes"
+AGREEMENT_ITEM_INDEX_BUILT_KEY = "culinary_active_agreement_item_codes_built"
+
+
+def rebuild_agreement_item_index() -> int:
+	"""Seti aktif agreement item'larından yeniden kur.
+
+	Returns:
+		Number of item codes in the index
+	"""
+	item_codes = frappe.db.sql(
+		"""
+		select distinct ai.item_code
+		from `tabAgreement Item` ai
+		join `tabAgreement` a on a.name = ai.parent and ai.parenttype = 'Agreement'
+		where a.docstatus = 1
+		  and a.status = 'Active'
+		  and ifnull(ai.item_code, '') != ''
+		""",
+		pluck=True,
+	)
+
+	frappe.cache().delete_value(AGREEMENT_ITEM_INDEX_KEY)
+	if item_codes:
+		# RedisWrapper set komutları anahtarı kendisi prefix'ler
+		frappe.cache().sadd(AGREEMENT_ITEM_INDEX_KEY, *item_codes)
+	frappe.cache().set_value(AGREEMENT_ITEM_INDEX_BUILT_KEY, 1)
+	return len(item_codes)
+
+
+def is_agreement_item(item_code: str) -> bool:
+	"""Item kodu aktif bir agreement'ta geçiyor mu (set kurulu ise DB sorgusu yok)."""
+	if not frappe.cache().get_value(AGREEMENT_ITEM_INDEX_BUILT_KEY):
+		rebuild_agreement_item_index()
+	return bool(frappe.cache().sismember(AGREEMENT_ITEM_INDEX_KEY, item_code))
+
+
+def _add_item_codes(item_codes: list) -> None:
+	# Set henüz kurulmadıysa ekleme yapma - ilk okumada zaten tam kurulacak
+	if item_codes and frappe.cache().get_value(AGREEMENT_ITEM_INDEX_BUILT_KEY):
+		frappe.cache().sadd(AGREEMENT_ITEM_INDEX_KEY, *item_codes)
+
+
+def _invalidate() -> None:
+	frappe.cache().delete_value(AGREEMENT_ITEM_INDEX_BUILT_KEY)
+	frappe.cache().delete_value(AGREEMENT_ITEM_INDEX_KEY)
+
+
+def add_agreement_items(doc) -> None:
+	"""Aktif olan agreement'ın item'larını sete ekle (commit sonrası)."""
+	item_codes = list({item.item_code for item in doc.agreement_items if item.item_code})
+	frappe.db.after_commit.add(lambda: _add_item_codes(item_codes))
+
+
+def invalidate_agreement_item_index() -> None:
+	"""Item çıkarabilen değişikliklerden sonra seti geçersiz kıl (commit sonrası)."""
+	frappe.db.after_commit.add(_invalidate)
+
+
+def update_agreement_item_index(doc) -> None:
+	"""Agreement'ın güncel durumuna göre seti güncelle."""
+	if doc.docstatus == 1 and doc.status == "Active":
+		add_agreement_items(doc)
+	else:
+		invalidate_agreement_item_index()
@@ -0,0 +1,313 @@
+"""
+Culinary Order Management - Bulk agreement renewal
+
+Bitişi yaklaşan agreement'lar için toplu halef (successor) oluşturur. Halef anlaşma
+eskinin kopyasıdır (renewal_of ile bağlı), geçerlilik tarihleri eskinin bitişinden
+sonra başlar. Fiyatlar isteğe bağlı olarak yüzde ile ayarlanır veya güncel Standard
+Selling fiyatlarından (anlaşma indirimi ile) yeniden hesaplanır; hesap tüm chunk için
+NumPy ile tek geçişte yapılır.
+
+Agreement'lar background job'larda chunk'lar halinde oluşturulur/submit edilir. Hemen
+aktif olan haleflerin fiyatları agreement başına sync_item_prices yerine chunk sonunda
+sync_item_prices_batch ile tek seferde yazılır; ileri tarihli olanlar zamanlama
+kuyruğu ile başlangıç gününde aktive edilir.
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, cint, date_diff, flt, getdate, nowdate
+
+DEFAULT_RENEWAL_CHUNK_SIZE = 25
+DEFAULT_RENEWAL_WINDOW_DAYS = 30
+
+
+@frappe.whitelist()
+def get_expiring_agreements(
+	within_days: int = DEFAULT_RENEWAL_WINDOW_DAYS,
+	customer: str | None = None,
+	supplier: str | None = None,
+	expired_days: int = 0,
+):
+	"""Önümüzdeki N gün içinde bitecek ve henüz yenilenmemiş agreement'lar.
+
+	Args:
+		within_days: Bitiş penceresi (gün)
+		expired_days: Son N günde süresi dolup otomatik iptal edilmiş agreement'ları da dahil et
+		              (halefleri hemen aktif olur)
+
+	Returns:
+		list: [{"name", "customer", "supplier", "valid_from", "valid_to", "status", "items"}]
+	"""
+	frappe.has_permission("Agreement", "read", throw=True)
+
+	today = getdate(nowdate())
+	conditions = [
+		"(a.docstatus = 1 or (a.docstatus = 2 and a.status = 'Expired'))",
+		"a.valid_to between %(since)s and %(until)s",
+	]
+	params = {
+		"since": add_days(today, -cint(expired_days)) if cint(expired_days) > 0 else today,
+		"until": add_days(today, cint(within_days)),
+	}
+	if customer:
+		conditions.append("a.customer = %(customer)s")
+		params["customer"] = customer
+	if supplier:
+		conditions.append("a.supplier = %(supplier)s")
+		params["supplier"] = supplier
+
+	return frappe.db.sql(
+		f"""
+		select a.name, a.customer, a.supplier, a.valid_from, a.valid_to, a.status,
+		       (select count(*) from `tabAgreement Item` ai
+		        where ai.parent = a.name and ai.parenttype = 'Agreement') as items
+		from `tabAgreement` a
+		where {" and ".join(conditions)}
+		  and not exists (
+			select 1 from `tabAgreement` s
+			where s.renewal_of = a.name and s.docstatus < 2
+		  )
+		order by a.valid_to, a.customer
+		""",
+		params,
+		as_dict=True,
+	)
+
+
+def _renewal_dates(old_doc, valid_from=None, valid_to=None) -> tuple:
+	"""Halef tarihleri: verilmezse eskinin bitişinin ertesi günü başlar, aynı süre kadar geçerlidir."""
+	new_from = getdate(valid_from) if valid_from else add_days(getdate(old_doc.valid_to), 1)
+	if valid_to:
+		new_to = getdate(valid_to)
+	else:
+		new_to = add_days(new_from, date_diff(old_doc.valid_to, old_doc.valid_from))
+	return new_from, new_to
+
+
+def _build_successor(old_doc, valid_from, valid_to):
+	new_doc = frappe.copy_doc(old_doc)
+	new_doc.docstatus = 0
+	new_doc.amended_from = None
+	new_doc.renewal_of = old_doc.name
+	new_doc.valid_from = valid_from
+	new_doc.valid_to = valid_to
+	new_doc.status = "Not Started"
+	return new_doc
+
+
+def apply_renewal_rates(docs: list, adjustment_pct: float = 0, use_standard_rates: bool = False) -> None:
+	"""Halef agreement item fiyatlarını tek geçişte yeniden hesapla (yerinde günceller).
+
+	Args:
+		docs: Halef Agreement belgeleri
+		adjustment_pct: Tüm fiyatlara uygulanacak yüzde (ör. 3.5 = %3.5 artış)
+		use_standard_rates: Fiyatları güncel Standard Selling * (1 - indirim) ile değiştir
+		                    (Standard fiyatı olmayan item'lar mevcut fiyatını korur)
+	"""
+	adjustment_pct = flt(adjustment_pct)
+	if not adjustment_pct and not use_standard_rates:
+		return
+
+	import numpy as np
+
+	from culinary_order_management.culinary_order_management.agreement import (
+		_get_company_currency,
+		_get_standard_selling_rates,
+	)
+
+	items = [(doc, item) for doc in docs for item in doc.agreement_items if item.item_code]
+	if not items:
+		return
+
+	rates = np.array([flt(item.price_list_rate) for _doc, item in items], dtype=float)
+
+	if use_standard_rates:
+		company_ccy = _get_company_currency()
+		standard_rates = _get_standard_selling_rates(
+			[item.item_code for _doc, item in items], {item.currency or company_ccy for _doc, item in items}
+		)
+		standard = np.array(
+			[standard_rates.get((item.item_code, item.currency or company_ccy), 0.0) for _doc, item in items],
+			dtype=float,
+		)
+		discount = np.array([flt(doc.discount_rate) for doc, _item in items], dtype=float)
+		rates = np.where(standard > 0, standard * (1.0 - discount / 100.0), rates)
+		for i, (_doc, item) in enumerate(items):
+			if standard[i] > 0:
+				item.standard_selling_rate = float(standard[i])
+
+	rates = np.round(rates * (1.0 + adjustment_pct / 100.0), 2)
+	for i, (_doc, item) in enumerate(items):
+		item.price_list_rate = float(rates[i])
+
+
+def _sync_active_successors(docs: list) -> dict:
+	"""Hemen aktif olan haleflerin fiyatlarını tek toplu senkronizasyonla yaz."""
+	from culinary_order_management.culinary_order_management.agreement import (
+		create_price_list_for_agreement,
+		sync_item_prices_batch,
+	)
+	from culinary_order_management.culinary_order_management.doctype.agreement.agreement import (
+		_refresh_customer_price_lists,
+	)
+
+	active = [doc for doc in docs if doc.docstatus == 1 and doc.status == "Active"]
+	if not active:
+		return {}
+
+	existing_lists = set(
+		frappe.get_all("Price List", filters={"name": ["in", list({doc.customer for doc in active})]}, pluck="name")
+	)
+	batch = []
+	for doc in active:
+		if doc.customer in existing_lists:
+			batch.append(doc)
+		else:
+			# Price List yoksa klasik yol (oluşturur ve senkronize eder)
+			create_price_list_for_agreement(doc, "renewal")
+
+	counts = sync_item_prices_batch(batch)
+	_refresh_customer_price_lists({doc.customer for doc in active})
+	return counts
+
+
+def _sync_successors_individually(docs: list) -> None:
+	"""Toplu senkronizasyon başarısız olursa aktif halefleri tek tek senkronize et."""
+	from culinary_order_management.culinary_order_management.agreement import create_price_list_for_agreement
+
+	for doc in docs:
+		if doc.docstatus != 1 or doc.status != "Active":
+			continue
+		try:
+			create_price_list_for_agreement(doc, "renewal")
+		except Exception as e:
+			frappe.log_error(
+				message=f"Price sync failed for renewed agreement {doc.name}: {str(e)}",
+				title="Agreement Renewal - Price Sync Failed"
+			)
+
+
+def run_renewal_chunk(
+	agreements: list,
+	valid_from=None,
+	valid_to=None,
+	adjustment_pct: float = 0,
+	use_standard_rates: int = 0,
+	submit: int = 1,
+	user: str | None = None,
+) -> dict:
+	"""Background job: bir chunk agreement için halefleri oluştur ve (isteğe bağlı) submit et.
+
+	Her agreement bir savepoint içinde işlenir; hata sadece o agreement'ı geri alır.
+
+	Returns:
+		dict: {"created": [(old, new)], "failed": [(old, error)], "prices": {...}}
+	"""
+	from culinary_order_management.culinary_order_management.unit_of_work import UnitOfWork
+
+	result = {"created": [], "failed": [], "prices": {}}
+
+	successors = []
+	for name in agreements:
+		old_doc = frappe.get_doc("Agreement", name)
+		if old_doc.docstatus != 1 and old_doc.status != "Expired":
+			result["failed"].append((name, _("Agreement is not submitted")))
+			continue
+		successors.append(_build_successor(old_doc, *_renewal_dates(old_doc, valid_from, valid_to)))
+
+	apply_renewal_rates(successors, adjustment_pct, cint(use_standard_rates))
+
+	created = []
+	with UnitOfWork() as uow:
+		for new_doc in successors:
+			try:
+				with uow.item(new_doc.renewal_of):
+					new_doc.insert()
+					if cint(submit):
+						new_doc.flags.defer_price_sync = True
+						new_doc.submit()
+				created.append(new_doc)
+				result["created"].append((new_doc.renewal_of, new_doc.name))
+			except Exception as e:
+				result["failed"].append((new_doc.renewal_of, str(e)))
+				frappe.log_error(
+					message=f"Agreement renewal failed for {new_doc.renewal_of}: {str(e)}",
+					title="Agreement Renewal - Failed"
+				)
+
+		try:
+			with uow.item("price_sync"):
+				result["prices"] = _sync_active_successors(created)
+		except Exception as e:
+			frappe.log_error(
+				message=f"Batch price sync failed for renewed agreements, falling back to per-agreement sync: {str(e)}",
+				title="Agreement Renewal - Price Sync Failed"
+			)
+			_sync_successors_individually(created)
+
+	frappe.logger().info(
+		f"Agreement renewal chunk: {len(result['created'])} created, {len(result['failed'])} failed"
+	)
+	if user:
+		frappe.publish_realtime(
+			"agreement_renewal_progress",
+			{"created": result["created"], "failed": result["failed"]},
+			user=user,
+		)
+
+	return result
+
+
+@frappe.whitelist()
+def renew_agreements(
+	agreements,
+	valid_from=None,
+	valid_to=None,
+	adjustment_pct: float = 0,
+	use_standard_rates: int = 0,
+	submit: int = 1,
+):
+	"""Seçilen agreement'lar için halefleri background job'larda oluştur.
+
+	Args:
+		agreements: Agreement isimleri (list veya JSON)
+		valid_from / valid_to: Opsiyonel - tüm halefler için sabit tarihler
+		adjustment_pct: Fiyat ayarı (%)
+		use_standard_rates: 1 ise fiyatlar güncel Standard Selling'den hesaplanır
+		submit: 1 ise halefler submit edilir
+
+	Returns:
+		dict: {"batch_id", "agreements": int, "chunks": int}
+
+	Requires: Agreement create and submit permission
+	"""
+	if not frappe.has_permission("Agreement", "create") or not frappe.has_permission("Agreement", "submit"):
+		frappe.throw(_("You don't have permission to renew agreements"), frappe.PermissionError)
+
+	agreements = frappe.parse_json(agreements) if isinstance(agreements, str) else agreements or []
+	agreements = list(dict.fromkeys(agreements))
+	if not agreements:
+		frappe.throw(_("Please select at least one agreement"))
+	if valid_from and valid_to and getdate(valid_from) > getdate(valid_to):
+		frappe.throw(_("Valid To date cannot be before Valid From date"))
+
+	chunk_size = cint(frappe.conf.get("culinary_renewal_chunk_size")) or DEFAULT_RENEWAL_CHUNK_SIZE
+	batch_id = frappe.generate_hash(length=8)
+	chunks = [agreements[i:i + chunk_size] for i in range(0, len(agreements), chunk_size)]
+
+	for index, chunk in enumerate(chunks):
+		frappe.enqueue(
+			"culinary_order_management.culinary_order_management.agreement_renewal.run_renewal_chunk",
+			queue="long",
+			job_id=f"agreement_renewal::{batch_id}::{index}",
+			enqueue_after_commit=True,
+			agreements=chunk,
+			valid_from=valid_from,
+			valid_to=valid_to,
+			adjustment_pct=flt(adjustment_pct),
+			use_standard_rates=cint(use_standard_rates),
+			submit=cint(submit),
+			user=frappe.session.user,
+		)
+
+	return {"batch_id": batch_id, "agreements": len(agreements), "chunks": len(chunks)}
@@ -0,0 +1,219 @@
+"""
+Culinary Order Management - Agreement activation/expiry schedule
+
+Agreement'ların valid_from (aktivasyon) ve valid_to (bitiş) sınırları Redis'te
+bir sorted set'te tutulur (score = sınırın geldiği gün, YYYYMMDD). Sık çalışan
+scheduler job'u sadece vadesi gelen kayıtları okur ve her geçişi ayrı bir
+background job olarak kuyruğa atar; böylece 00:00'da başlayan anlaşmalar günlük
+job'u beklemez ve aktivasyonlar worker'lara yayılır.
+
+Kuyruk Agreement on_submit/on_cancel ile güncellenir. Redis boşalırsa (restart,
+flush) ilk çalışmada submitted agreement'lardan yeniden kurulur.
+
+Kuyruğa atma veya geçiş job'u başarısız olursa kayıt kuyruğa geri konur ve bir
+sonraki çalışmada tekrar denenir (en fazla MAX_TRANSITION_ATTEMPTS kez; sonrası
+günlük tam kontrole kalır).
+"""
+
+import frappe
+from frappe.utils import add_days, cint, getdate, nowdate
+
+DUE_QUEUE_KEY = "culinary_agreement_due_queue"
+DUE_QUEUE_BUILT_KEY = "culinary_agreement_due_queue_built"
+DUE_ATTEMPTS_KEY = "culinary_agreement_due_attempts"
+MAX_TRANSITION_ATTEMPTS = 5
+ACTIVATE = "activate"
+EXPIRE = "expire"
+
+
+def _queue_key() -> str:
+	# Sorted set komutları RedisWrapper'da sarılı değil - anahtar elle prefix'lenir
+	return frappe.cache().make_key(DUE_QUEUE_KEY)
+
+
+def _day_score(date) -> int:
+	return cint(getdate(date).strftime("%Y%m%d"))
+
+
+def _member(agreement_name: str, action: str) -> str:
+	return f"{agreement_name}|{action}"
+
+
+def _get_entries(agreement_name: str, status: str, valid_from, valid_to) -> dict:
+	"""Agreement için kuyruk kayıtları: {member: score}.
+
+	- Aktivasyon: valid_from günü (sadece henüz başlamamışsa)
+	- Bitiş: valid_to'dan sonraki gün (update_status ile aynı kural: today > valid_to)
+	"""
+	entries = {}
+	if status == "Not Started" and valid_from:
+		entries[_member(agreement_name, ACTIVATE)] = _day_score(valid_from)
+	if status in ("Not Started", "Active") and valid_to:
+		entries[_member(agreement_name, EXPIRE)] = _day_score(add_days(valid_to, 1))
+	return entries
+
+
+def _add_entries(entries: dict) -> None:
+	if entries:
+		frappe.cache().zadd(_queue_key(), entries)
+
+
+def rebuild_due_queue() -> int:
+	"""Kuyruğu submitted agreement'lardan yeniden kur.
+
+	Returns:
+		Number of queued entries
+	"""
+	rows = frappe.db.sql(
+		"""
+		select name, status, valid_from, valid_to
+		from `tabAgreement`
+		where docstatus = 1
+		  and status in ('Not Started', 'Active')
+		""",
+		as_dict=True,
+	)
+
+	entries = {}
+	for row in rows:
+		entries.update(_get_entries(row.name, row.status, row.valid_from, row.valid_to))
+
+	frappe.cache().delete_value(DUE_QUEUE_KEY)
+	_add_entries(entries)
+	frappe.cache().set_value(DUE_QUEUE_BUILT_KEY, 1)
+	return len(entries)
+
+
+def _ensure_queue() -> None:
+	if not frappe.cache().get_value(DUE_QUEUE_BUILT_KEY):
+		rebuild_due_queue()
+
+
+def schedule_agreement(doc) -> None:
+	"""Submit edilen agreement'ın sınırlarını kuyruğa ekle (commit sonrası)."""
+	entries = _get_entries(doc.name, doc.status, doc.valid_from, doc.valid_to)
+	if entries:
+		frappe.db.after_commit.add(lambda: _add_entries(entries))
+
+
+def unschedule_agreement(agreement_name: str) -> None:
+	"""İptal edilen agreement'ın bekleyen kayıtlarını kuyruktan çıkar (commit sonrası)."""
+	members = [_member(agreement_name, ACTIVATE), _member(agreement_name, EXPIRE)]
+	frappe.db.after_commit.add(lambda: frappe.cache().zrem(_queue_key(), *members))
+
+
+def _requeue_entry(agreement_name: str, action: str) -> bool:
+	"""Başarısız kaydı tekrar denemek üzere kuyruğa geri koy.
+
+	Returns:
+		False if the retry limit is reached (kayıt günlük tam kontrole bırakılır)
+	"""
+	member = _member(agreement_name, action)
+	attempts = cint(frappe.cache().hincrby(frappe.cache().make_key(DUE_ATTEMPTS_KEY), member, 1))
+	if attempts > MAX_TRANSITION_ATTEMPTS:
+		_clear_attempts(agreement_name, action)
+		return False
+	_add_entries({member: _day_score(nowdate())})
+	return True
+
+
+def _clear_attempts(agreement_name: str, action: str) -> None:
+	frappe.cache().hdel(DUE_ATTEMPTS_KEY, _member(agreement_name, action))
+
+
+def _pop_due(today_score: int) -> list:
+	"""Vadesi gelen kayıtları kuyruktan al.
+
+	zrem dönüşü ile sahiplik alınır - aynı anda çalışan iki job aynı kaydı işlemez.
+	"""
+	members = frappe.cache().zrangebyscore(_queue_key(), "-inf", today_score) or []
+	due = []
+	for member in members:
+		if frappe.cache().zrem(_queue_key(), member):
+			due.append(member.decode() if isinstance(member, bytes) else member)
+	return due
+
+
+def process_due_agreements() -> dict:
+	"""Scheduler job: vadesi gelen aktivasyon/bitiş kayıtlarını background job'lara dağıt.
+
+	Vadesi gelen kayıt yoksa tek bir Redis okuması yapar; DB'ye dokunmaz.
+	"""
+	_ensure_queue()
+
+	stats = {ACTIVATE: 0, EXPIRE: 0}
+	for member in _pop_due(_day_score(nowdate())):
+		agreement_name, _sep, action = member.rpartition("|")
+		if action not in stats or not agreement_name:
+			continue
+
+		try:
+			frappe.enqueue(
+				"culinary_order_management.culinary_order_management.agreement_schedule.run_status_transition",
+				queue="long" if action == EXPIRE else "default",
+				job_id=f"agreement_{action}::{agreement_name}",
+				deduplicate=True,
+				agreement_name=agreement_name,
+				action=action,
+			)
+		except Exception as e:
+			_requeue_entry(agreement_name, action)
+			frappe.log_error(
+				message=f"Agreement {agreement_name} ({action}) kuyruğa atılamadı: {str(e)}",
+				title="Agreement Schedule - Enqueue Failed"
+			)
+			continue
+		stats[action] += 1
+
+	if stats[ACTIVATE] or stats[EXPIRE]:
+		frappe.logger().info(
+			f"Agreement schedule: {stats[ACTIVATE]} activations, {stats[EXPIRE]} expirations enqueued"
+		)
+
+	return stats
+
+
+def run_status_transition(agreement_name: str, action: str | None = None) -> dict | None:
+	"""Background job: tek agreement'ın status geçişini uygula.
+
+	Status güncel tarihe göre yeniden hesaplanır; kuyruk kaydı eskimişse (ör. iptal
+	edilmiş agreement) hiçbir şey yapılmaz. Geçiş başarısız olursa kuyruk kaydı
+	(action verilmişse) tekrar denenmek üzere geri konur.
+	"""
+	from culinary_order_management.culinary_order_management.doctype.agreement.agreement import (
+		_refresh_customer_price_lists,
+		apply_status_transition,
+	)
+
+	if not frappe.db.exists("Agreement", agreement_name):
+		return None
+
+	doc = frappe.get_doc("Agreement", agreement_name)
+	if doc.docstatus != 1:
+		return None
+
+	old_status = doc.status
+	doc.update_status()
+	new_status = doc.status
+	doc.status = old_status
+
+	if new_status == old_status and new_status != "Expired":
+		return None
+
+	try:
+		result = apply_status_transition(doc, new_status)
+		_refresh_customer_price_lists({doc.customer})
+		frappe.db.commit()
+	except Exception as e:
+		frappe.db.rollback()
+		if action:
+			_requeue_entry(agreement_name, action)
+		frappe.log_error(
+			message=f"Agreement {agreement_name} işlenirken hata: {str(e)}",
+			title="Agreement Schedule - Transition Failed"
+		)
+		raise
+
+	if action:
+		_clear_attempts(agreement_name, action)
+	return result
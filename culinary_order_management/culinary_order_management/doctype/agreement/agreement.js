@@ -1,6 +1,15 @@
 // Agreement Form Script
+const PRICE_HISTORY_METHOD = 'culinary_order_management.culinary_order_management.agreement';
+
+function price_history_count(frm) {
+	return (frm.doc.__onload && frm.doc.__onload.price_history_count) || 0;
+}
+
 frappe.ui.form.on('Agreement', {
 	refresh: function(frm) {
+		// Fiyat geçmişi belgeyle gelmez - özet + sayfalı liste ayrı çağrılarla yüklenir
+		render_price_history(frm);
+		
 		// Sadece submitted ve aktif agreement'lar için bilgilendirme
 		if (frm.doc.docstatus === 1 && frm.doc.status === 'Active') {
 			// Fiyat değişikliği olan ürünleri tespit et (bilgilendirme amaçlı)
@@ -77,7 +86,7 @@ frappe.ui.form.on('Agreement', {
 			}
 			
 			// Price History silme butonu
-			if (frm.doc.price_history && frm.doc.price_history.length > 0) {
+			if (price_history_count(frm) > 0) {
 				frm.add_custom_button(__('Price History Temizle'), function() {
 					frappe.confirm(
 						__('Tüm fiyat değişiklik geçmişi silinecek. Bu işlem geri alınamaz!<br><br>Devam etmek istiyor musunuz?'),
@@ -183,3 +192,68 @@ frappe.ui.form.on('Agreement', {
 		}
 	}
 });
+
+
+function render_price_history(frm) {
+	const field = frm.fields_dict.price_history_html;
+	if (!field) return;
+	
+	field.$wrapper.empty();
+	if (frm.is_new() || !price_history_count(frm)) {
+		field.$wrapper.html(`<p class="text-muted">${__('No price changes recorded')}</p>`);
+		return;
+	}
+	
+	const $summary = $('<div class="price-history-summary" style="margin-bottom: 15px;"></div>').appendTo(field.$wrapper);
+	const $table = $(`<table class="table table-bordered table-sm">
+		<thead><tr>
+			<th>${__('Change Date')}</th><th>${__('Item Code')}</th>
+			<th class="text-right">${__('Old Agreement Rate')}</th><th class="text-right">${__('New Agreement Rate')}</th>
+			<th class="text-right">${__('Change %')}</th><th>${__('Source')}</th>
+		</tr></thead><tbody></tbody></table>`).appendTo(field.$wrapper);
+	const $more = $(`<button class="btn btn-xs btn-default">${__('Load More')}</button>`).appendTo(field.$wrapper).hide();
+	
+	frappe.call({
+		method: `${PRICE_HISTORY_METHOD}.get_price_history_summary`,
+		args: { agreement_name: frm.doc.name }
+	}).then(r => {
+		const summary = r.message || { total: 0, items: [] };
+		const rows = summary.items.slice(0, 10).map(d =>
+			`<tr><td>${d.item_code}</td><td class="text-right">${d.change_count}</td>
+			<td>${frappe.datetime.str_to_user(d.last_change)}</td>
+			<td class="text-right">${format_currency(d.min_rate, d.currency)} - ${format_currency(d.max_rate, d.currency)}</td></tr>`
+		).join('');
+		$summary.html(`<p><strong>${__('{0} price changes for {1} items', [summary.total, summary.items.length])}</strong></p>
+			<table class="table table-bordered table-sm">
+				<thead><tr><th>${__('Item Code')}</th><th class="text-right">${__('Changes')}</th>
+				<th>${__('Last Change')}</th><th class="text-right">${__('Rate Range')}</th></tr></thead>
+				<tbody>${rows}</tbody>
+			</table>`);
+	});
+	
+	let start = 0;
+	const load_page = () => {
+		frappe.call({
+			method: `${PRICE_HISTORY_METHOD}.get_price_history`,
+			args: { agreement_name: frm.doc.name, start: start, include_archived: 1 }
+		}).then(r => {
+			const page = r.message || { rows: [], has_more: false };
+			page.rows.forEach(d => {
+				const color = d.change_percentage > 0 ? 'red' : 'green';
+				$table.find('tbody').append(`<tr>
+					<td>${frappe.datetime.str_to_user(d.change_date)}</td>
+					<td>${d.item_code}</td>
+					<td class="text-right">${format_currency(d.old_agreement_rate, d.currency)}</td>
+					<td class="text-right">${format_currency(d.new_agreement_rate, d.currency)}</td>
+					<td class="text-right" style="color: ${color};">${flt(d.change_percentage, 2)}%</td>
+					<td>${__(d.source || '')}${d.change_count > 1 ? ` (${d.change_count})` : ''}${d.archived ? ` <span class="text-muted">${__('Archived')}</span>` : ''}</td>
+				</tr>`);
+			});
+			start += page.rows.length;
+			$more.toggle(!!page.has_more);
+		});
+	};
+	
+	$more.on('click', load_page);
+	load_page();
+}
@@ -12,130 +12,65 @@ class Agreement(Document):
 	"""
 	
 	def onload(self):
-		"""Load güncel fiyatları hesapla ve virtual field'lara set et."""
+		"""Load güncel fiyatları hesapla ve virtual field'lara set et.
+		
+		Standard ve Agreement fiyatları tüm item'lar için iki toplu sorgu ile alınır.
+		Fiyat değişimi göstergesi satır başına HTML yerine kompakt veri olarak
+		gönderilir (__onload.price_indicators) ve client tarafında çizilir.
+		"""
+		if self.docstatus == 0:
+			return
+		
+		# Fiyat geçmişi belgeyle yüklenmez - sadece kayıt sayısı (form lazy yükler)
+		self.set_onload("price_history_count", frappe.db.count("Agreement Item Price History", {"agreement": self.name}))
+		
 		if self.docstatus != 1:
 			return
 		
 		from culinary_order_management.culinary_order_management.agreement import (
-			_get_standard_selling_rate,
-			_find_existing_item_price
+			_get_standard_selling_rates,
+			_load_agreement_item_prices
 		)
 		
-		for item in self.agreement_items:
-			if not item.item_code:
-				continue
-			
-			try:
-				# Güncel Standard Selling fiyatı
-				currency = item.currency or frappe.db.get_value("Company", {"is_group": 0}, "default_currency") or "EUR"
-				current_standard = _get_standard_selling_rate(item.item_code, currency)
-				
-				# Güncel Agreement fiyatı (Item Price'dan)
-				price_list_name = self.customer
-				current_agreement = self._get_current_agreement_rate(item.item_code, price_list_name, currency)
-				
-				# Virtual field'lara set et
-				item.current_standard_rate = current_standard
-				item.current_agreement_rate = current_agreement
-				
-				# Fiyat değişimi HTML göstergesi
-				item.price_change_indicator = self._get_price_change_html(
-					original_standard=frappe.utils.flt(item.standard_selling_rate),
-					current_standard=current_standard,
-					original_agreement=frappe.utils.flt(item.price_list_rate),
-					current_agreement=current_agreement,
-					currency=currency
-				)
-				
-			except Exception as e:
-				frappe.log_error(
-					message=f"Failed to load current prices for {item.item_code}: {str(e)}",
-					title="Agreement Load - Price Calculation Failed"
-				)
-	
-	def _get_current_agreement_rate(self, item_code: str, price_list: str, currency: str) -> float:
-		"""Item Price'dan güncel Agreement fiyatını çek."""
+		items = [item for item in self.agreement_items if item.item_code]
+		if not items:
+			return
+		
 		try:
-			item_price = frappe.db.get_value(
-				"Item Price",
-				{
-					"price_list": price_list,
-					"item_code": item_code,
-					"currency": currency,
-					"note": ["like", f"%{self.name}%"]
-				},
-				"price_list_rate"
+			default_currency = frappe.db.get_value("Company", {"is_group": 0}, "default_currency") or "EUR"
+			standard_rates = _get_standard_selling_rates(
+				[item.item_code for item in items], {item.currency or default_currency for item in items}
+			)
+			agreement_rates = {
+				(row.item_code, row.currency): frappe.utils.flt(row.price_list_rate)
+				for row in _load_agreement_item_prices([self.name])[self.name]
+				if row.price_list == self.customer
+			}
+		except Exception as e:
+			frappe.log_error(
+				message=f"Failed to load current prices for {self.name}: {str(e)}",
+				title="Agreement Load - Price Calculation Failed"
 			)
+			return
+		
+		indicators = {}
+		for item in items:
+			currency = item.currency or default_currency
 			
-			return float(item_price) if item_price else 0.0
+			# Virtual field'lara set et
+			item.current_standard_rate = standard_rates.get((item.item_code, currency), 0.0)
+			item.current_agreement_rate = agreement_rates.get((item.item_code, currency), 0.0)
 			
-		except Exception:
-			return 0.0
-	
-	def _get_price_change_html(
-		self,
-		original_standard: float,
-		current_standard: float,
-		original_agreement: float,
-		current_agreement: float,
-		currency: str
-	) -> str:
-		"""Fiyat değişimi HTML göstergesi oluştur."""
-		
-		# Değişiklik hesapla
-		standard_diff = current_standard - original_standard
-		standard_pct = (standard_diff / original_standard * 100) if original_standard > 0 else 0
-		
-		agreement_diff = current_agreement - original_agreement
-		agreement_pct = (agreement_diff / original_agreement * 100) if original_agreement > 0 else 0
-		
-		# Renk belirleme
-		def get_color(diff):
-			if abs(diff) < 0.01:
-				return "#28a745"  # green
-			return "#dc3545" if diff > 0 else "#28a745"  # red/green
-		
-		standard_color = get_color(standard_diff)
-		agreement_color = get_color(agreement_diff)
-		
-		# Değişiklik yoksa
-		if abs(standard_diff) < 0.01 and abs(agreement_diff) < 0.01:
-			return '<div style="padding: 10px; color: #28a745; font-weight: bold;">✅ Prices are up to date</div>'
-		
-		html = f"""
-		<div style="padding: 10px; background-color: #f8f9fa; border-radius: 5px; border-left: 4px solid {agreement_color};">
-			<table style="width: 100%; font-size: 12px; border-collapse: collapse;">
-				<thead>
-					<tr style="border-bottom: 2px solid #dee2e6;">
-						<th style="text-align: left; padding: 5px; font-weight: bold;">Type</th>
-						<th style="text-align: right; padding: 5px; font-weight: bold;">Original</th>
-						<th style="text-align: right; padding: 5px; font-weight: bold;">Current</th>
-						<th style="text-align: right; padding: 5px; font-weight: bold;">Change</th>
-					</tr>
-				</thead>
-				<tbody>
-					<tr>
-						<td style="padding: 5px;">Standard Selling</td>
-						<td style="text-align: right; padding: 5px;">{original_standard:.2f} {currency}</td>
-						<td style="text-align: right; padding: 5px; font-weight: bold;">{current_standard:.2f} {currency}</td>
-						<td style="text-align: right; padding: 5px; color: {standard_color}; font-weight: bold;">
-							{standard_diff:+.2f} ({standard_pct:+.1f}%)
-						</td>
-					</tr>
-					<tr style="background-color: #ffffff;">
-						<td style="padding: 5px;">Agreement Price</td>
-						<td style="text-align: right; padding: 5px;">{original_agreement:.2f} {currency}</td>
-						<td style="text-align: right; padding: 5px; font-weight: bold;">{current_agreement:.2f} {currency}</td>
-						<td style="text-align: right; padding: 5px; color: {agreement_color}; font-weight: bold;">
-							{agreement_diff:+.2f} ({agreement_pct:+.1f}%)
-						</td>
-					</tr>
-				</tbody>
-			</table>
-		</div>
-		"""
-		
-		return html
+			# [original_standard, current_standard, original_agreement, current_agreement, currency]
+			indicators[item.name] = [
+				frappe.utils.flt(item.standard_selling_rate),
+				item.current_standard_rate,
+				frappe.utils.flt(item.price_list_rate),
+				item.current_agreement_rate,
+				currency,
+			]
+		
+		self.set_onload("price_indicators", indicators)
 	
 	def validate(self):
 		"""Validate agreement before save."""
@@ -161,8 +96,16 @@ class Agreement(Document):
 		from culinary_order_management.culinary_order_management.agreement import create_price_list_for_agreement
 		
 		# Sadece aktif anlaşmalar için fiyat oluştur
-		if self.status == "Active":
+		# (toplu yenileme fiyatları chunk sonunda tek seferde senkronize eder)
+		if self.status == "Active" and not self.flags.get("defer_price_sync"):
 			create_price_list_for_agreement(self, "on_submit")
+		
+		# Başlangıç/bitiş sınırlarını zamanlama kuyruğuna ekle
+		from culinary_order_management.culinary_order_management.agreement_schedule import schedule_agreement
+		schedule_agreement(self)
+		
+		from culinary_order_management.culinary_order_management.agreement_item_index import update_agreement_item_index
+		update_agreement_item_index(self)
 	
 	def on_update_after_submit(self):
 		"""Allow limited updates after submit."""
@@ -175,6 +118,10 @@ class Agreement(Document):
 		# Fiyatları senkronize et
 		from culinary_order_management.culinary_order_management.agreement import sync_item_prices
 		sync_item_prices(self, "on_update_after_submit")
+		
+		# Item'lar değişmiş olabilir - aktif item index'ini yenile
+		from culinary_order_management.culinary_order_management.agreement_item_index import invalidate_agreement_item_index
+		invalidate_agreement_item_index()
 	
 	def validate_dates(self):
 		"""Validate validity dates."""
@@ -226,6 +173,13 @@ class Agreement(Document):
 			  AND name != %s
 		""", (self.customer, self.supplier, self.name), as_dict=True)
 		
+		# Yenilenen anlaşma, tarihleri çakışmıyorsa bitişine kadar aktif kalabilir
+		if self.renewal_of and self.valid_from:
+			active_agreements = [
+				d for d in active_agreements
+				if not (d.name == self.renewal_of and d.valid_to and getdate(d.valid_to) < getdate(self.valid_from))
+			]
+		
 		if active_agreements:
 			agreement_names = ", ".join([d.name for d in active_agreements])
 			frappe.throw(
@@ -263,7 +217,8 @@ class Agreement(Document):
 		self.update_status()
 		
 		# Price List'i deaktive et (ama önce başka aktif anlaşma var mı kontrol et)
-		if self.customer:
+		# Fiyatlar yeni anlaşmaya devrediliyorsa Price List açık kalır
+		if self.customer and not self.flags.get("skip_price_cleanup"):
 			price_list_name = f"{self.customer}"
 			if frappe.db.exists("Price List", price_list_name):
 				# Aynı müşteri için başka aktif anlaşma var mı?
@@ -281,6 +236,13 @@ class Agreement(Document):
 		# External hook fonksiyonunu çağır (fiyatları temizler)
 		from culinary_order_management.culinary_order_management.agreement import cleanup_item_prices
 		cleanup_item_prices(self, "on_cancel")
+		
+		# Bekleyen aktivasyon/bitiş kayıtlarını kuyruktan çıkar
+		from culinary_order_management.culinary_order_management.agreement_schedule import unschedule_agreement
+		unschedule_agreement(self.name)
+		
+		from culinary_order_management.culinary_order_management.agreement_item_index import invalidate_agreement_item_index
+		invalidate_agreement_item_index()
 
 
 @frappe.whitelist()
@@ -311,32 +273,59 @@ def check_active_agreement(customer, supplier, current_agreement=None):
 	}
 
 
+def _can_transfer_item_prices(old_doc, new_doc) -> bool:
+	"""Fiyat satırları devredilebilir mi? (aynı müşteri ve yeni anlaşma bugün aktif olacak)"""
+	if old_doc.customer != new_doc.customer or not new_doc.valid_from or not new_doc.valid_to:
+		return False
+	
+	today = getdate(nowdate())
+	return getdate(new_doc.valid_from) <= today <= getdate(new_doc.valid_to)
+
+
 @frappe.whitelist()
 def replace_agreement(old_agreement, new_agreement):
 	"""Eski anlaşmayı cancel et, yeni anlaşmayı submit et.
 	
 	Transaction içinde çalışır - hata olursa rollback yapılır.
 	Frappe otomatik transaction yönetimi kullanır.
+	
+	Aynı müşteri için ve yeni anlaşma hemen aktif olacaksa eski anlaşmanın Item Price
+	satırları silinmez: tek UPDATE ile yeni anlaşmaya devredilir, submit sırasındaki
+	sync_item_prices sadece değişen fiyatları günceller, kaldırılan item'ları siler ve
+	yenilerini ekler. Aksi halde klasik yol (cleanup + yeniden oluşturma) kullanılır.
 	"""
 	try:
-		# Eski anlaşmayı cancel et
 		old_doc = frappe.get_doc("Agreement", old_agreement)
 		if old_doc.docstatus != 1:
 			frappe.throw(_("Eski anlaşma zaten submit edilmemiş"))
 		
-		old_doc.cancel()
-		
-		# Yeni anlaşmayı submit et
 		new_doc = frappe.get_doc("Agreement", new_agreement)
 		if new_doc.docstatus != 0:
 			frappe.throw(_("Yeni anlaşma zaten submit edilmiş"))
 		
+		transfer_prices = _can_transfer_item_prices(old_doc, new_doc)
+		
+		# Eski anlaşmayı cancel et (devir modunda fiyatlar silinmez)
+		old_doc.flags.skip_price_cleanup = transfer_prices
+		old_doc.cancel()
+		
+		transferred = 0
+		if transfer_prices:
+			from culinary_order_management.culinary_order_management.agreement import _transfer_agreement_item_prices
+			transferred = _transfer_agreement_item_prices(old_doc.name, new_doc)
+		
 		# Flag ekle - check_overlapping_agreements atlanacak
 		new_doc.flags.is_replacement = True
 		new_doc.submit()
 		
+		frappe.logger().info(
+			f"Agreement {old_doc.name} replaced by {new_doc.name} "
+			f"({'transfer: ' + str(transferred) + ' item prices' if transfer_prices else 'full rewrite'})"
+		)
+		
 		return {
 			"success": True,
+			"transferred_prices": transferred,
 			"message": _("Eski anlaşma iptal edildi, yeni anlaşma onaylandı")
 		}
 		
@@ -348,97 +337,176 @@ def replace_agreement(old_agreement, new_agreement):
 		frappe.throw(_("İşlem başarısız: {0}").format(str(e)))
 
 
+def _get_status_transitions(today) -> list:
+	"""Status'ü tarihe göre değişmesi gereken submitted agreement'ları SQL ile bul.
+	
+	update_status() ile aynı kural: today < valid_from -> Not Started,
+	today > valid_to -> Expired, aksi halde Active. Zaten Expired olup hâlâ
+	submitted duran agreement'lar da (otomatik cancel için) döndürülür.
+	
+	Returns:
+		list: [{"name", "customer", "status", "new_status"}]
+	"""
+	return frappe.db.sql("""
+		SELECT name, customer, status, new_status
+		FROM (
+			SELECT name, customer, status,
+				CASE
+					WHEN %(today)s < valid_from THEN 'Not Started'
+					WHEN %(today)s > valid_to THEN 'Expired'
+					ELSE 'Active'
+				END AS new_status
+			FROM `tabAgreement`
+			WHERE docstatus = 1
+			  AND valid_from IS NOT NULL
+			  AND valid_to IS NOT NULL
+		) t
+		WHERE IFNULL(status, '') != new_status
+		   OR new_status = 'Expired'
+	""", {"today": today}, as_dict=True)
+
+
+def _refresh_customer_price_lists(customers: set) -> None:
+	"""Etkilenen müşterilerin Price List enabled durumunu tek seferde yeniden hesapla."""
+	customers = {c for c in customers if c}
+	if not customers:
+		return
+	
+	active_customers = set(frappe.db.sql("""
+		SELECT DISTINCT customer
+		FROM `tabAgreement`
+		WHERE customer IN %(customers)s
+		  AND docstatus = 1
+		  AND status = 'Active'
+	""", {"customers": tuple(customers)}, pluck=True))
+	
+	for enabled, names in ((1, customers & active_customers), (0, customers - active_customers)):
+		if not names:
+			continue
+		# set_value + cache temizliği: get_cached_doc/get_cached_value eski enabled değerini döndürmesin
+		frappe.db.set_value("Price List", {"name": ("in", list(names))}, "enabled", enabled, update_modified=False)
+		for name in names:
+			frappe.clear_document_cache("Price List", name)
+		frappe.logger().info(
+			f"Price List {'activated' if enabled else 'deactivated'}: {', '.join(sorted(names))}"
+		)
+
+
+def apply_status_transition(doc, new_status: str) -> dict:
+	"""Agreement'ı yeni status'e geçir ve geçişe bağlı fiyat işlemlerini çalıştır.
+	
+	- Not Started -> Active: fiyatlar oluşturulur
+	- Expired (submitted): otomatik cancel (on_cancel fiyatları temizler)
+	
+	Price List enabled durumu burada güncellenmez; çağıran taraf etkilenen
+	müşteriler için _refresh_customer_price_lists çağırır.
+	
+	Returns:
+		dict: {"updated": bool, "cancelled": bool}
+	"""
+	from culinary_order_management.culinary_order_management.agreement import (
+		create_price_list_for_agreement,
+		cleanup_item_prices
+	)
+	from culinary_order_management.culinary_order_management.agreement_item_index import update_agreement_item_index
+	
+	result = {"updated": False, "cancelled": False}
+	old_status = doc.status
+	doc.status = new_status
+	
+	# Status değiştiyse kaydet
+	if old_status != doc.status:
+		doc.db_set("status", doc.status, update_modified=False)
+		update_agreement_item_index(doc)
+		result["updated"] = True
+		frappe.logger().info(f"Agreement {doc.name} status güncellendi: {old_status} -> {doc.status}")
+		
+		if old_status == "Not Started" and doc.status == "Active":
+			# Anlaşma aktif oldu - fiyatları oluştur
+			try:
+				create_price_list_for_agreement(doc, "status_change")
+				frappe.logger().info(f"Agreement {doc.name} aktif oldu - fiyatlar oluşturuldu")
+			except Exception as e:
+				frappe.log_error(
+					message=f"Fiyat oluşturma hatası: {str(e)}",
+					title="Agreement Activation - Price Creation Failed"
+				)
+	
+	# Kritik: Expired olmuş ve submitted olan agreement'ları otomatik cancel et
+	if doc.status == "Expired" and doc.docstatus == 1:
+		try:
+			# Cancel et (on_cancel hook'u tetiklenir ve fiyatlar temizlenir)
+			doc.cancel()
+			# Status'ü "Expired" olarak koru (liste görünümünde "Günü Geçmiş" gösterilsin)
+			doc.db_set("status", "Expired", update_modified=False)
+			result["cancelled"] = True
+			frappe.logger().info(f"Agreement {doc.name} expired - otomatik cancel edildi, fiyatlar temizlendi")
+		except Exception as cancel_error:
+			frappe.log_error(
+				message=f"Agreement {doc.name} cancel işlemi hatası: {str(cancel_error)}",
+				title="Agreement Auto-Cancel Error"
+			)
+			# Cancel başarısızsa en azından fiyatları temizle
+			try:
+				cleanup_item_prices(doc, "status_change")
+			except Exception as e:
+				frappe.log_error(
+					message=f"Fiyat temizleme hatası: {str(e)}",
+					title="Agreement Expiration - Price Cleanup Failed"
+				)
+	
+	return result
+
+
 @frappe.whitelist()
 def update_all_agreement_statuses():
 	"""Tüm agreement'ların statuslerini güncelle ve expired olanları otomatik cancel et.
 	
-	Bu fonksiyon scheduled job olarak her gün çalıştırılabilir.
+	Bu fonksiyon scheduled job olarak her gün çalıştırılabilir. Gün içindeki
+	geçişler agreement_schedule kuyruğu ile zamanında işlenir; bu job kaçırılan
+	geçişler için emniyet ağıdır.
+	
+	Geçişler valid_from/valid_to üzerinden SQL ile bulunur; sadece status'ü değişen
+	agreement'lar için belge yüklenir. Price List enabled durumu etkilenen her müşteri
+	için bir kez hesaplanır.
 	
 	Önemli: Expired olan agreement'lar otomatik cancel edilir (docstatus=2).
 	Cancel işlemi mevcut on_cancel hook'u ile fiyatları otomatik temizler.
 	"""
-	agreements = frappe.get_all(
-		"Agreement",
-		fields=["name", "docstatus", "valid_from", "valid_to", "status"],
-		filters={"docstatus": ["!=", 2]}  # Zaten cancel edilmiş olanları atlıyoruz
-	)
+	today = getdate(nowdate())
+	
+	# Taslaklar her zaman "Not Started" - belge yüklemeden düzelt
+	frappe.db.sql("""
+		UPDATE `tabAgreement`
+		SET status = 'Not Started'
+		WHERE docstatus = 0
+		  AND IFNULL(status, '') != 'Not Started'
+	""")
+	
+	transitions = _get_status_transitions(today)
 	
 	updated_count = 0
 	cancelled_count = 0
+	affected_customers = set()
 	
-	for agreement_data in agreements:
+	for row in transitions:
 		try:
-			doc = frappe.get_doc("Agreement", agreement_data.name)
-			old_status = doc.status
-			doc.update_status()
-			
-			# Status değiştiyse kaydet ve Price List'i güncelle
-			if old_status != doc.status:
-				doc.db_set("status", doc.status, update_modified=False)
-				updated_count += 1
-				frappe.logger().info(f"Agreement {doc.name} status güncellendi: {old_status} -> {doc.status}")
-				
-				# Status değişimlerine göre fiyat yönetimi
-				if old_status == "Not Started" and doc.status == "Active":
-					# Anlaşma aktif oldu - fiyatları oluştur
-					from culinary_order_management.culinary_order_management.agreement import create_price_list_for_agreement
-					try:
-						create_price_list_for_agreement(doc, "status_change")
-						frappe.logger().info(f"Agreement {doc.name} aktif oldu - fiyatlar oluşturuldu")
-					except Exception as e:
-						frappe.log_error(
-							message=f"Fiyat oluşturma hatası: {str(e)}",
-							title="Agreement Activation - Price Creation Failed"
-						)
-				
-				elif old_status == "Active" and doc.status == "Expired":
-					# Anlaşma expired oldu - fiyatları temizle
-					from culinary_order_management.culinary_order_management.agreement import cleanup_item_prices
-					try:
-						cleanup_item_prices(doc, "status_change")
-						frappe.logger().info(f"Agreement {doc.name} expired oldu - fiyatlar temizlendi")
-					except Exception as e:
-						frappe.log_error(
-							message=f"Fiyat temizleme hatası: {str(e)}",
-							title="Agreement Expiration - Price Cleanup Failed"
-						)
-				
-				# Price List durumunu güncelle
-				if doc.customer:
-					price_list_name = f"{doc.customer}"
-					if frappe.db.exists("Price List", price_list_name):
-						# Aynı müşteri için herhangi bir aktif anlaşma var mı kontrol et
-						active_count = frappe.db.count("Agreement", {
-							"customer": doc.customer,
-							"docstatus": 1,
-							"status": "Active"
-						})
-						
-						should_enable = 1 if active_count > 0 else 0
-						frappe.db.set_value("Price List", price_list_name, "enabled", should_enable, update_modified=False)
-						frappe.logger().info(f"Price List {price_list_name} {'aktivated' if should_enable else 'deactivated'}")
-			
-			# Kritik: Expired olmuş ve submitted olan agreement'ları otomatik cancel et
-			if doc.status == "Expired" and doc.docstatus == 1:
-				try:
-					# Cancel et (on_cancel hook'u tetiklenir ve fiyatlar temizlenir)
-					doc.cancel()
-					# Status'ü "Expired" olarak koru (liste görünümünde "Günü Geçmiş" gösterilsin)
-					doc.db_set("status", "Expired", update_modified=False)
-					cancelled_count += 1
-					frappe.logger().info(f"Agreement {doc.name} expired - otomatik cancel edildi, fiyatlar temizlendi")
-				except Exception as cancel_error:
-					frappe.log_error(
-						message=f"Agreement {doc.name} cancel işlemi hatası: {str(cancel_error)}",
-						title="Agreement Auto-Cancel Error"
-					)
+			doc = frappe.get_doc("Agreement", row.name)
+			result = apply_status_transition(doc, row.new_status)
+			if result["updated"] or result["cancelled"]:
+				affected_customers.add(doc.customer)
+			updated_count += result["updated"]
+			cancelled_count += result["cancelled"]
 		
 		except Exception as e:
 			frappe.log_error(
-				message=f"Agreement {agreement_data.name} işlenirken hata: {str(e)}",
+				message=f"Agreement {row.name} işlenirken hata: {str(e)}",
 				title="Agreement Status Update Error"
 			)
 	
+	# Price List durumunu müşteri başına bir kez güncelle
+	_refresh_customer_price_lists(affected_customers)
+	
 	frappe.db.commit()
 	frappe.logger().info(f"Toplam {updated_count} agreement status güncellendi, {cancelled_count} expired agreement otomatik cancel edildi")
-	return {"updated": updated_count, "total": len(agreements), "cancelled": cancelled_count}
+	return {"updated": updated_count, "total": len(transitions), "cancelled": cancelled_count}
@@ -1,9 +1,16 @@
 # Copyright (c) 2025, İdris and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
 
 class AgreementItemPriceHistory(Document):
 	pass
+
+
+def on_doctype_update():
+	# Item bazlı seri / sayfalı geçmiş sorguları için
+	frappe.db.add_index(
+		"Agreement Item Price History", ["agreement", "item_code", "change_date"], "agreement_item_change_date"
+	)
@@ -0,0 +1,14 @@
+# Copyright (c) 2025, İdris and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class AgreementPriceEvent(Document):
+	pass
+
+
+def on_doctype_update():
+	# Müşteri fiyat listesi delta sorguları: price_list + versiyon (name) aralığı
+	frappe.db.add_index("Agreement Price Event", ["price_list", "name"], "price_list_version")
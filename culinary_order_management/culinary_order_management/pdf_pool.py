@@ -0,0 +1,141 @@
+"""
+Culinary Order Management - Bounded PDF rendering pool
+
+wkhtmltopdf çağrıları saniyeler sürer; toplu işlerde (proforma, DATEV) PDF'ler
+sınırlı sayıda worker thread üzerinde paralel üretilir. Her thread site context'ini
+ve DB bağlantısını bir kez (executor initializer) açar ve tüm job'larında kullanır
+(frappe.local thread'ler arasında paylaşılmaz); pool kapanırken her thread kendi
+context'ini kapatır.
+"""
+
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import frappe
+from frappe.utils import cint
+
+DEFAULT_PDF_WORKERS = 4
+WORKER_CLOSE_TIMEOUT = 60
+
+_worker = threading.local()
+
+
+def get_pdf_worker_count(max_workers: int | None = None) -> int:
+	"""Worker sayısı: parametre > site config (culinary_pdf_workers) > varsayılan."""
+	workers = cint(max_workers) or cint(frappe.conf.get("culinary_pdf_workers")) or DEFAULT_PDF_WORKERS
+	return max(1, workers)
+
+
+def _format_error(e: Exception) -> str:
+	return f"{type(e).__name__}: {e!s}\n{traceback.format_exc()}"
+
+
+def _init_worker(site: str, sites_path: str, user: str) -> None:
+	"""Executor initializer: thread başına bir kez site context'i ve DB bağlantısı aç.
+
+	Hata pool'u bozmasın diye yakalanır; o thread'in job'ları hatayı döndürür.
+	"""
+	_worker.error = None
+	try:
+		frappe.init(site=site, sites_path=sites_path)
+		frappe.connect()
+		frappe.set_user(user)
+	except Exception as e:
+		_worker.error = _format_error(e)
+
+
+def _close_worker(barrier: threading.Barrier) -> None:
+	"""Thread'in context'ini kapat. Barrier her thread'in tam bir kapatma görevi almasını sağlar."""
+	try:
+		barrier.wait(timeout=WORKER_CLOSE_TIMEOUT)
+	except threading.BrokenBarrierError:
+		pass
+	if getattr(_worker, "error", None) is None:
+		frappe.destroy()
+
+
+def _run_job(fn, args: tuple):
+	"""Tek job'u çalıştır, (ok, result | error) döndür."""
+	try:
+		return True, fn(*args)
+	except Exception as e:
+		return False, _format_error(e)
+
+
+def _run_pooled_job(fn, args: tuple):
+	"""Worker thread'de job çalıştır; bağlantı sonraki job'lar için açık kalır."""
+	if getattr(_worker, "error", None):
+		return False, _worker.error
+	try:
+		return _run_job(fn, args)
+	finally:
+		# Okuma transaction'ını kapat - sonraki job güncel veriyi görsün
+		frappe.db.rollback()
+
+
+def render_in_pool(jobs: dict, max_workers: int | None = None, on_progress=None) -> dict:
+	"""PDF job'larını sınırlı bir thread pool üzerinde çalıştır.
+
+	Args:
+		jobs: {key: (fn, args)} - fn(*args) PDF bytes döndürmeli
+		max_workers: Paralel worker sayısı (None ise site config / varsayılan)
+		on_progress: Opsiyonel callback(done, total) - ana thread'de çağrılır
+
+	Returns:
+		dict: {key: (ok: bool, pdf_bytes | error_message)}
+	"""
+	if not jobs:
+		return {}
+
+	workers = min(get_pdf_worker_count(max_workers), len(jobs))
+	results = {}
+	total = len(jobs)
+
+	# Tek worker: mevcut context içinde sırayla çalıştır (thread/DB bağlantısı açma)
+	if workers == 1:
+		for done, (key, (fn, args)) in enumerate(jobs.items(), start=1):
+			results[key] = _run_job(fn, args)
+			if on_progress:
+				on_progress(done, total)
+		return results
+
+	site = frappe.local.site
+	sites_path = frappe.local.sites_path
+	user = frappe.session.user
+
+	with ThreadPoolExecutor(
+		max_workers=workers,
+		thread_name_prefix="culinary-pdf",
+		initializer=_init_worker,
+		initargs=(site, sites_path, user),
+	) as pool:
+		futures = {key: pool.submit(_run_pooled_job, fn, args) for key, (fn, args) in jobs.items()}
+		for done, (key, future) in enumerate(futures.items(), start=1):
+			results[key] = future.result()
+			if on_progress:
+				on_progress(done, total)
+
+		# Her worker thread'e bir kapatma görevi (DB bağlantıları job başına değil thread başına)
+		barrier = threading.Barrier(workers)
+		for _i in range(workers):
+			pool.submit(_close_worker, barrier)
+
+	return results
+
+
+class Throughput:
+	"""Basit süre/adet ölçer - toplu işlerin throughput kaydı için."""
+
+	def __init__(self):
+		self.started = time.monotonic()
+
+	def stats(self, **counts) -> dict:
+		elapsed = max(time.monotonic() - self.started, 1e-6)
+		stats = dict(counts)
+		stats["seconds"] = round(elapsed, 2)
+		stats["per_minute"] = {
+			key: round(value * 60.0 / elapsed, 1) for key, value in counts.items() if isinstance(value, int)
+		}
+		return stats
@@ -0,0 +1,132 @@
+"""
+Culinary Order Management - Agreement price drift
+
+Aktif agreement'lardaki orijinal fiyatlar (Agreement Item.standard_selling_rate /
+price_list_rate) ile bugünkü Standard Selling ve Agreement Item Price fiyatları
+arasındaki sapma. Tüm site için toplu yüklenir ve NumPy ile tek geçişte hesaplanır.
+
+Sonuç Redis'te tutulur; Item Price değişikliklerinde (hook'lar ve agreement.py
+toplu helper'ları) geçersiz kılınır.
+"""
+
+import frappe
+from frappe.utils import flt
+
+PRICE_DRIFT_CACHE_KEY = "culinary_agreement_price_drift"
+
+
+def invalidate_price_drift_cache(*args, **kwargs) -> None:
+	"""Drift sonucunu geçersiz kıl (Item Price doc_events ve toplu helper'lar)."""
+	frappe.cache().delete_value(PRICE_DRIFT_CACHE_KEY)
+
+
+def _load_active_agreement_items(company_ccy: str) -> list:
+	return frappe.db.sql(
+		"""
+		select a.name as agreement, a.customer, a.supplier,
+		       ai.item_code, ai.item_name,
+		       ifnull(nullif(ai.currency, ''), %(company_ccy)s) as currency,
+		       ai.standard_selling_rate, ai.price_list_rate
+		from `tabAgreement` a
+		join `tabAgreement Item` ai on ai.parent = a.name and ai.parenttype = 'Agreement'
+		where a.docstatus = 1
+		  and a.status = 'Active'
+		  and ifnull(ai.item_code, '') != ''
+		order by a.customer, a.name, ai.idx
+		""",
+		{"company_ccy": company_ccy},
+		as_dict=True,
+	)
+
+
+def _load_current_agreement_rates() -> dict:
+	"""Aktif agreement'ların güncel Item Price fiyatları: {(agreement, item_code, currency): rate}"""
+	rows = frappe.db.sql(
+		"""
+		select ip.agreement, ip.item_code, ip.currency, ip.price_list_rate
+		from `tabItem Price` ip
+		join `tabAgreement` a on a.name = ip.agreement
+		where a.docstatus = 1
+		  and a.status = 'Active'
+		  and ip.price_list = a.customer
+		"""
+	)
+	return {(agreement, item_code, currency): flt(rate) for agreement, item_code, currency, rate in rows}
+
+
+def compute_price_drift() -> list:
+	"""Tüm aktif agreement item'ları için fiyat sapmasını hesapla.
+
+	Returns:
+		list: [{"agreement", "customer", "supplier", "item_code", "item_name", "currency",
+		        "original_standard", "current_standard", "standard_drift", "standard_drift_pct",
+		        "original_agreement", "current_agreement", "agreement_drift", "agreement_drift_pct",
+		        "max_drift_pct"}]
+	"""
+	import numpy as np
+
+	from culinary_order_management.culinary_order_management.agreement import _get_standard_selling_rates
+
+	company_ccy = frappe.db.get_value("Company", {"is_group": 0}, "default_currency") or "EUR"
+	rows = _load_active_agreement_items(company_ccy)
+	if not rows:
+		return []
+
+	standard_rates = _get_standard_selling_rates([r.item_code for r in rows], {r.currency for r in rows})
+	agreement_rates = _load_current_agreement_rates()
+
+	original_std = np.array([flt(r.standard_selling_rate) for r in rows], dtype=float)
+	current_std = np.array([standard_rates.get((r.item_code, r.currency), 0.0) for r in rows], dtype=float)
+	original_agr = np.array([flt(r.price_list_rate) for r in rows], dtype=float)
+	current_agr = np.array(
+		[agreement_rates.get((r.agreement, r.item_code, r.currency), 0.0) for r in rows], dtype=float
+	)
+
+	std_drift = current_std - original_std
+	std_pct = np.divide(std_drift * 100.0, original_std, out=np.zeros_like(std_drift), where=original_std > 0)
+	agr_drift = current_agr - original_agr
+	agr_pct = np.divide(agr_drift * 100.0, original_agr, out=np.zeros_like(agr_drift), where=original_agr > 0)
+	max_pct = np.maximum(np.abs(std_pct), np.abs(agr_pct))
+
+	columns = {
+		"original_standard": original_std,
+		"current_standard": current_std,
+		"standard_drift": std_drift,
+		"standard_drift_pct": std_pct,
+		"original_agreement": original_agr,
+		"current_agreement": current_agr,
+		"agreement_drift": agr_drift,
+		"agreement_drift_pct": agr_pct,
+		"max_drift_pct": max_pct,
+	}
+	rounded = {key: np.round(values, 2).tolist() for key, values in columns.items()}
+
+	return [
+		{
+			"agreement": r.agreement,
+			"customer": r.customer,
+			"supplier": r.supplier,
+			"item_code": r.item_code,
+			"item_name": r.item_name,
+			"currency": r.currency,
+			**{key: values[i] for key, values in rounded.items()},
+		}
+		for i, r in enumerate(rows)
+	]
+
+
+def get_price_drift(customer: str | None = None, supplier: str | None = None, threshold: float = 0) -> list:
+	"""Cache'lenmiş drift sonucunu filtreleyerek döndür (cache yoksa hesapla)."""
+	rows = frappe.cache().get_value(PRICE_DRIFT_CACHE_KEY)
+	if rows is None:
+		rows = compute_price_drift()
+		frappe.cache().set_value(PRICE_DRIFT_CACHE_KEY, rows)
+
+	threshold = flt(threshold)
+	return [
+		row
+		for row in rows
+		if (not customer or row["customer"] == customer)
+		and (not supplier or row["supplier"] == supplier)
+		and row["max_drift_pct"] >= threshold
+	]
@@ -0,0 +1,427 @@
+"""
+Culinary Order Management - Price history retention & compaction
+
+Agreement Item Price History her otomatik reprice ile büyür. Günlük job üç katmanlı
+saklama uygular:
+
+1. Detay: son N ay (culinary_history_detail_months, varsayılan 12) olduğu gibi kalır
+2. Özet: daha eski değişiklikler agreement/item/currency/ay başına tek "Compacted"
+   satırına indirgenir (ilk eski fiyat, son yeni fiyat, change_count)
+3. Arşiv: M aydan (culinary_history_archive_months, varsayılan 36) eski satırlar
+   gzip'li JSON Lines dosyalarına taşınır (sites/<site>/private/price_history_archive)
+   ve get_price_history(include_archived=1) ile okunabilir
+
+Her agreement ayrı işlenir ve commit edilir; uzun süreli kilit tutulmaz.
+
+Hassasiyet: Compacted satır geçmiş listesinde ay içindeki ara değişiklikleri
+göstermez (sadece ilk eski / son yeni fiyat). Ara noktalar rate_points alanında
+[change_date, new_agreement_rate] olarak saklanır ve arşive de taşınır; price_timeline
+(tarihe göre anlaşma fiyatı) bunları ve arşiv dosyalarını okuyarak kesin sonuç verir.
+rate_points'i olmayan eski Compacted satırlar için tarih o ay içine düşerse lookup
+sonucu "approximate" olarak işaretlenir.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+
+import frappe
+from frappe.utils import add_months, cint, flt, get_datetime, now_datetime
+
+DEFAULT_DETAIL_MONTHS = 12
+DEFAULT_ARCHIVE_MONTHS = 36
+DEFAULT_RETENTION_CHUNK_SIZE = 5000
+ARCHIVE_FOLDER = "price_history_archive"
+HISTORY_FIELDS = [
+	"name", "agreement", "change_date", "item_code", "old_standard_rate", "new_standard_rate",
+	"old_agreement_rate", "new_agreement_rate", "currency", "change_percentage",
+	"changed_by", "source", "change_count", "rate_points",
+]
+
+
+def _get_retention_settings() -> dict:
+	detail_months = cint(frappe.conf.get("culinary_history_detail_months")) or DEFAULT_DETAIL_MONTHS
+	archive_months = cint(frappe.conf.get("culinary_history_archive_months")) or DEFAULT_ARCHIVE_MONTHS
+	return {
+		"detail_cutoff": add_months(now_datetime(), -detail_months),
+		"archive_cutoff": add_months(now_datetime(), -max(archive_months, detail_months)),
+		"chunk_size": cint(frappe.conf.get("culinary_history_retention_chunk_size")) or DEFAULT_RETENTION_CHUNK_SIZE,
+	}
+
+
+def _archive_dir(agreement_name: str) -> str:
+	"""Agreement arşiv klasörü (isim dosya sistemi için güvenli hale getirilir)."""
+	safe_name = re.sub(r"[^A-Za-z0-9_-]+", "_", agreement_name)[:80]
+	suffix = hashlib.md5(agreement_name.encode()).hexdigest()[:8]
+	return frappe.get_site_path("private", ARCHIVE_FOLDER, f"{safe_name}-{suffix}")
+
+
+def _delete_history_rows(names: list) -> None:
+	if names:
+		frappe.db.sql(
+			"delete from `tabAgreement Item Price History` where name in %(names)s", {"names": tuple(names)}
+		)
+
+
+def parse_rate_points(row) -> list:
+	"""Compacted satırın ara fiyat noktaları: [[change_date, rate], ...] (yoksa boş liste)."""
+	value = row.get("rate_points")
+	if not value:
+		return []
+	try:
+		return json.loads(value) if isinstance(value, str) else list(value)
+	except ValueError:
+		return []
+
+
+def _agreements_to_archive(archive_cutoff) -> list:
+	return frappe.db.sql(
+		"""
+		select distinct agreement
+		from `tabAgreement Item Price History`
+		where change_date < %(cutoff)s
+		""",
+		{"cutoff": archive_cutoff},
+		pluck=True,
+	)
+
+
+def _agreements_to_compact(detail_cutoff, archive_cutoff) -> list:
+	"""Aynı item/currency/ay içinde birleştirilecek satırı olan agreement'lar.
+
+	Bir grup birden fazla satır içeriyor ve en az biri detay satırıysa (daha önce
+	özetlenmiş aya yeni satır gelmesi dahil) birleştirilir.
+	"""
+	return frappe.db.sql(
+		"""
+		select distinct agreement from (
+			select agreement
+			from `tabAgreement Item Price History`
+			where change_date < %(detail_cutoff)s
+			  and change_date >= %(archive_cutoff)s
+			group by agreement, item_code, currency, date_format(change_date, '%%Y-%%m')
+			having count(*) > 1 and sum(ifnull(source, '') != 'Compacted') > 0
+		) t
+		""",
+		{"detail_cutoff": detail_cutoff, "archive_cutoff": archive_cutoff},
+		pluck=True,
+	)
+
+
+def _archived_names(path: str) -> list:
+	with gzip.open(path, "rt", encoding="utf-8") as f:
+		return [json.loads(line).get("name") for line in f]
+
+
+def _recover_pending_archives(folder: str) -> None:
+	"""Commit ile rename arasında yarıda kalmış geçici arşiv dosyalarını sonuçlandır.
+
+	Dosyadaki satırlar DB'den silinmişse (commit olmuş) dosya yayınlanır, aksi halde
+	satırlar hâlâ DB'de olduğu için geçici dosya silinir.
+	"""
+	if not os.path.isdir(folder):
+		return
+
+	for file_name in os.listdir(folder):
+		if not file_name.endswith(".jsonl.gz.tmp"):
+			continue
+		path = os.path.join(folder, file_name)
+		names = _archived_names(path)
+		if names and frappe.db.exists("Agreement Item Price History", {"name": ("in", names)}):
+			os.remove(path)
+		else:
+			os.replace(path, path[: -len(".tmp")])
+
+
+def archive_agreement_history(agreement_name: str, cutoff, chunk_size: int) -> int:
+	"""Cutoff'tan eski satırları gzip arşiv dosyasına taşı (chunk başına bir dosya).
+
+	Dosya önce geçici adla yazılır ve ancak satırlar silinip commit edildikten sonra
+	yayınlanır; silme/commit başarısız olursa geçici dosya silinir. Böylece aynı satır
+	hem DB'de hem arşivde (veya iki arşiv dosyasında) bulunmaz.
+
+	Returns:
+		Number of archived rows
+	"""
+	archived = 0
+	folder = _archive_dir(agreement_name)
+	_recover_pending_archives(folder)
+
+	while True:
+		rows = frappe.db.sql(
+			f"""
+			select {", ".join(HISTORY_FIELDS)}
+			from `tabAgreement Item Price History`
+			where agreement = %(agreement)s and change_date < %(cutoff)s
+			order by change_date
+			limit %(limit)s
+			""",
+			{"agreement": agreement_name, "cutoff": cutoff, "limit": chunk_size},
+			as_dict=True,
+		)
+		if not rows:
+			break
+
+		os.makedirs(folder, exist_ok=True)
+		# Dosya adı kapsadığı dönemi taşır (ilk-son change_date); okuyucular eski dosyaları açmadan atlar
+		file_name = (
+			f"{get_datetime(rows[0].change_date):%Y%m%d%H%M%S}-{get_datetime(rows[-1].change_date):%Y%m%d%H%M%S}"
+			f"-{frappe.generate_hash(length=6)}.jsonl.gz"
+		)
+		path = os.path.join(folder, file_name)
+		tmp_path = f"{path}.tmp"
+		try:
+			with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+				for row in rows:
+					f.write(json.dumps(row, default=str) + "\n")
+
+			_delete_history_rows([row.name for row in rows])
+			frappe.db.commit()
+		except Exception:
+			if os.path.exists(tmp_path):
+				os.remove(tmp_path)
+			raise
+
+		os.replace(tmp_path, path)
+		archived += len(rows)
+
+		if len(rows) < chunk_size:
+			break
+
+	return archived
+
+
+def _compaction_item_codes(agreement_name: str, detail_cutoff, archive_cutoff) -> list:
+	return frappe.db.sql(
+		"""
+		select distinct item_code
+		from `tabAgreement Item Price History`
+		where agreement = %(agreement)s
+		  and change_date < %(detail_cutoff)s
+		  and change_date >= %(archive_cutoff)s
+		  and ifnull(source, '') != 'Compacted'
+		""",
+		{"agreement": agreement_name, "detail_cutoff": detail_cutoff, "archive_cutoff": archive_cutoff},
+		pluck=True,
+	)
+
+
+def _row_points(row) -> list:
+	"""Satırın [[change_date, rate], ...] noktaları (detay satırı tek nokta)."""
+	return parse_rate_points(row) or [[str(row.change_date), flt(row.new_agreement_rate)]]
+
+
+def _merge_group(agreement_name: str, group: list, now) -> tuple:
+	"""Bir ay grubunu (mevcut Compacted satırı dahil) tek Compacted satırına birleştir."""
+	points = sorted(
+		(point for row in group for point in _row_points(row)), key=lambda point: get_datetime(point[0])
+	)
+	# İlk satır: en erken noktası olan (Compacted satırın change_date'i son değişikliğidir)
+	first = min(group, key=lambda row: get_datetime(_row_points(row)[0][0]))
+	last = max(group, key=lambda row: get_datetime(row.change_date))
+	old_price = flt(first.old_agreement_rate)
+	new_price = flt(last.new_agreement_rate)
+	return (
+		frappe.generate_hash(length=10), "Administrator", now, now, "Administrator", 0,
+		agreement_name, last.change_date, last.item_code,
+		flt(first.old_standard_rate), flt(last.new_standard_rate), old_price, new_price,
+		last.currency, ((new_price - old_price) / old_price * 100) if old_price > 0 else 0,
+		last.changed_by, "Compacted", sum(cint(r.change_count) or 1 for r in group),
+		json.dumps(points),
+	)
+
+
+def compact_agreement_history(agreement_name: str, detail_cutoff, archive_cutoff) -> int:
+	"""Detay penceresinden eski satırları agreement/item/currency/ay başına tek satıra indir.
+
+	Her item ayrı okunur, yazılır ve commit edilir (agreement'ın tüm penceresi tek
+	transaction'da kilitlenmez). Daha önce özetlenmiş aya yeni satır geldiyse mevcut
+	Compacted satır ve rate_points'i yeni özet satırına birleştirilir.
+
+	Returns:
+		Number of removed (merged) rows
+	"""
+	removed = 0
+	for item_code in _compaction_item_codes(agreement_name, detail_cutoff, archive_cutoff):
+		rows = frappe.db.sql(
+			f"""
+			select {", ".join(HISTORY_FIELDS)}
+			from `tabAgreement Item Price History`
+			where agreement = %(agreement)s
+			  and item_code = %(item_code)s
+			  and change_date < %(detail_cutoff)s
+			  and change_date >= %(archive_cutoff)s
+			order by currency, change_date
+			""",
+			{
+				"agreement": agreement_name,
+				"item_code": item_code,
+				"detail_cutoff": detail_cutoff,
+				"archive_cutoff": archive_cutoff,
+			},
+			as_dict=True,
+		)
+
+		groups = {}
+		for row in rows:
+			period = get_datetime(row.change_date).strftime("%Y-%m")
+			groups.setdefault((row.currency, period), []).append(row)
+
+		now = frappe.utils.now()
+		values = []
+		merged_names = []
+		for group in groups.values():
+			if len(group) < 2 or all(row.source == "Compacted" for row in group):
+				continue
+			values.append(_merge_group(agreement_name, group, now))
+			merged_names.extend(row.name for row in group)
+
+		if not values:
+			continue
+
+		frappe.db.bulk_insert(
+			"Agreement Item Price History",
+			[
+				"name", "owner", "creation", "modified", "modified_by", "docstatus",
+				"agreement", "change_date", "item_code",
+				"old_standard_rate", "new_standard_rate", "old_agreement_rate", "new_agreement_rate",
+				"currency", "change_percentage", "changed_by", "source", "change_count", "rate_points",
+			],
+			values,
+		)
+		_delete_history_rows(merged_names)
+		frappe.db.commit()
+		removed += len(merged_names) - len(values)
+
+	return removed
+
+
+def apply_price_history_retention() -> dict:
+	"""Scheduler job: fiyat geçmişine saklama politikasını uygula (arşiv + özet)."""
+	settings = _get_retention_settings()
+	stats = {"archived": 0, "compacted": 0, "agreements": 0}
+
+	for agreement_name in _agreements_to_archive(settings["archive_cutoff"]):
+		try:
+			stats["archived"] += archive_agreement_history(
+				agreement_name, settings["archive_cutoff"], settings["chunk_size"]
+			)
+			stats["agreements"] += 1
+		except Exception as e:
+			frappe.db.rollback()
+			frappe.log_error(
+				message=f"Price history archive failed for {agreement_name}: {str(e)}",
+				title="Price History Retention - Archive Failed"
+			)
+
+	for agreement_name in _agreements_to_compact(settings["detail_cutoff"], settings["archive_cutoff"]):
+		try:
+			stats["compacted"] += compact_agreement_history(
+				agreement_name, settings["detail_cutoff"], settings["archive_cutoff"]
+			)
+			stats["agreements"] += 1
+		except Exception as e:
+			frappe.db.rollback()
+			frappe.log_error(
+				message=f"Price history compaction failed for {agreement_name}: {str(e)}",
+				title="Price History Retention - Compaction Failed"
+			)
+
+	if stats["archived"] or stats["compacted"]:
+		frappe.logger().info(
+			f"Price history retention: {stats['archived']} rows archived, "
+			f"{stats['compacted']} rows compacted"
+		)
+
+	return stats
+
+
+def _archive_file_end(file_name: str):
+	"""Arşiv dosyasının kapsadığı son change_date (eski isim formatında None)."""
+	parts = file_name.split("-")
+	if len(parts) >= 3 and len(parts[1]) == 14 and parts[1].isdigit():
+		return get_datetime(f"{parts[1][:4]}-{parts[1][4:6]}-{parts[1][6:8]} {parts[1][8:10]}:{parts[1][10:12]}:{parts[1][12:]}")
+	return None
+
+
+def read_archived_history(agreement_name: str, item_code=None, since=None) -> list:
+	"""Agreement'ın arşivlenmiş geçmiş satırlarını oku (en yeni önce).
+
+	Args:
+		item_code: Sadece bu ürün(ler)ün satırları (tek kod veya liste)
+		since: Dönemi bu tarihten önce biten arşiv dosyaları açılmaz
+	"""
+	folder = _archive_dir(agreement_name)
+	if not os.path.isdir(folder):
+		return []
+
+	item_codes = {item_code} if isinstance(item_code, str) else set(item_code or [])
+	since = get_datetime(since) if since else None
+
+	rows = []
+	for file_name in sorted(os.listdir(folder)):
+		if not file_name.endswith(".jsonl.gz"):
+			continue
+		file_end = _archive_file_end(file_name)
+		if since and file_end and file_end < since:
+			continue
+		with gzip.open(os.path.join(folder, file_name), "rt", encoding="utf-8") as f:
+			for line in f:
+				row = frappe._dict(json.loads(line))
+				if not item_codes or row.item_code in item_codes:
+					row.archived = 1
+					rows.append(row)
+
+	rows.sort(key=lambda r: r.change_date or "", reverse=True)
+	return rows
+
+
+def delete_archived_history(agreement_name: str, item_code: str | None = None, row_names: list | None = None) -> int:
+	"""Agreement'ın arşiv dosyalarından satır sil (dosyalar yeniden yazılır, boşalanlar silinir).
+
+	Args:
+		item_code: Sadece bu ürünün satırları
+		row_names: Sadece bu isimdeki satırlar (verilmezse filtreye uyan tüm satırlar)
+
+	Returns:
+		Number of removed archived rows
+	"""
+	folder = _archive_dir(agreement_name)
+	if not os.path.isdir(folder):
+		return 0
+
+	row_names = set(row_names) if row_names is not None else None
+	removed = 0
+	for file_name in sorted(os.listdir(folder)):
+		if not file_name.endswith(".jsonl.gz"):
+			continue
+		path = os.path.join(folder, file_name)
+		with gzip.open(path, "rt", encoding="utf-8") as f:
+			lines = f.readlines()
+
+		kept = []
+		for line in lines:
+			row = json.loads(line)
+			matches = (not item_code or row.get("item_code") == item_code) and (
+				row_names is None or row.get("name") in row_names
+			)
+			if not matches:
+				kept.append(line)
+		if len(kept) == len(lines):
+			continue
+
+		removed += len(lines) - len(kept)
+		if kept:
+			# Geçici dosyaya yaz, sonra atomik olarak değiştir
+			tmp_path = f"{path}.tmp"
+			with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+				f.writelines(kept)
+			os.replace(tmp_path, path)
+		else:
+			os.remove(path)
+
+	if not os.listdir(folder):
+		os.rmdir(folder)
+	return removed
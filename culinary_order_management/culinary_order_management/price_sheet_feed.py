@@ -0,0 +1,282 @@
+"""
+Culinary Order Management - Customer price sheet feed
+
+Web mağaza (WooCommerce) müşteri fiyatlarını ürün/müşteri başına Item Price
+sorgulamak yerine bu feed'den alır:
+
+- get_price_sheet: müşterinin Price List'indeki (create_price_list_for_agreement)
+  bugün geçerli fiyatların tamamı, kompakt liste + versiyon
+- get_price_sheet_changes: verilen versiyondan sonra değişen (item_code, currency)
+  anahtarlarının güncel durumu (upsert / delete)
+
+Versiyonlar Agreement Price Event log'unun autoincrement id'sidir. Event'ler
+agreement.py toplu Item Price helper'ları ve Item Price doc_events tarafından
+yazılır; eski event'ler günlük job ile budanır. Budanan aralıktan delta istenirse
+"reset" döner ve istemci tam listeyi yeniden çeker.
+"""
+
+import frappe
+from frappe.utils import add_days, add_to_date, cint, getdate, now_datetime, nowdate
+
+PRICE_EVENT_DOCTYPE = "Agreement Price Event"
+DEFAULT_EVENT_RETENTION_DAYS = 30
+EVENT_PRUNE_CHUNK_SIZE = 10000
+# record_price_events_for: Item Price isimleri bu boyutta IN sorgularına bölünür
+EVENT_RECORD_CHUNK_SIZE = 1000
+PRICE_SHEET_CACHE_PREFIX = "culinary_price_sheet"
+# Uzun transaction'lar event id'lerini geç commit edebilir; son dakikalardaki event'ler
+# her deltada yeniden değerlendirilir (delta güncel durumu döndürdüğü için tekrar zararsız)
+DELTA_RECHECK_SECONDS = 10 * 60
+
+
+def record_price_events(rows: list, event_type: str) -> None:
+	"""Fiyat değişikliği event'lerini tek multi-row insert ile yaz.
+
+	Args:
+		rows: [{"price_list", "item_code", "currency", "agreement"}]
+		event_type: "Insert" / "Update" / "Delete"
+	"""
+	rows = [row for row in rows if row.get("price_list")]
+	if not rows:
+		return
+
+	now = frappe.utils.now()
+	user = frappe.session.user
+	frappe.db.bulk_insert(
+		PRICE_EVENT_DOCTYPE,
+		["owner", "creation", "modified", "modified_by", "docstatus",
+		 "price_list", "item_code", "currency", "event_type", "agreement"],
+		[
+			(user, now, now, user, 0,
+			 row["price_list"], row.get("item_code"), row.get("currency"), event_type, row.get("agreement"))
+			for row in rows
+		],
+	)
+
+
+def record_price_events_for(item_price_names: list, event_type: str) -> None:
+	"""Item Price isimlerinden event yaz (silmeden önce / güncellemeden sonra çağrılır)."""
+	for start in range(0, len(item_price_names), EVENT_RECORD_CHUNK_SIZE):
+		chunk = item_price_names[start:start + EVENT_RECORD_CHUNK_SIZE]
+		record_price_events(
+			frappe.db.sql(
+				"""
+				select price_list, item_code, currency, agreement
+				from `tabItem Price`
+				where name in %(names)s
+				""",
+				{"names": tuple(chunk)},
+				as_dict=True,
+			),
+			event_type,
+		)
+
+
+def record_agreement_price_events(agreement_name: str, event_type: str) -> None:
+	"""Agreement'a ait tüm Item Price satırları için event yaz."""
+	record_price_events(
+		frappe.db.sql(
+			"""
+			select price_list, item_code, currency, agreement
+			from `tabItem Price`
+			where agreement = %(agreement)s
+			""",
+			{"agreement": agreement_name},
+			as_dict=True,
+		),
+		event_type,
+	)
+
+
+def record_item_price_event(doc, method=None) -> None:
+	"""Item Price doc_events: müşteri fiyat listelerindeki ORM değişikliklerini logla."""
+	if not doc.price_list or doc.price_list == "Standard Selling":
+		return
+	if not doc.get("agreement") and not frappe.db.exists("Customer", doc.price_list):
+		return
+
+	event_type = {"after_insert": "Insert", "on_trash": "Delete"}.get(method, "Update")
+	record_price_events(
+		[{"price_list": doc.price_list, "item_code": doc.item_code, "currency": doc.currency,
+		  "agreement": doc.get("agreement")}],
+		event_type,
+	)
+
+
+def _current_version(price_list: str | None = None) -> int:
+	if price_list:
+		version = frappe.db.sql(
+			f"select max(name) from `tab{PRICE_EVENT_DOCTYPE}` where price_list = %(price_list)s",
+			{"price_list": price_list},
+		)[0][0]
+	else:
+		version = frappe.db.sql(f"select max(name) from `tab{PRICE_EVENT_DOCTYPE}`")[0][0]
+	return cint(version)
+
+
+def _effective_prices(price_list: str, keys: list | None = None) -> dict:
+	"""Price List'te bugün geçerli fiyatlar: {(item_code, currency): (rate, valid_upto)}
+
+	Aynı item/currency için birden fazla geçerli satır varsa en son başlayan kazanır.
+	"""
+	conditions = ""
+	params = {"price_list": price_list, "today": getdate(nowdate())}
+	if keys is not None:
+		if not keys:
+			return {}
+		conditions = "and item_code in %(item_codes)s"
+		params["item_codes"] = tuple({item_code for item_code, _currency in keys})
+
+	rows = frappe.db.sql(
+		f"""
+		select item_code, currency, price_list_rate, valid_upto
+		from `tabItem Price`
+		where price_list = %(price_list)s
+		  and selling = 1
+		  and (valid_from is null or valid_from <= %(today)s)
+		  and (valid_upto is null or valid_upto >= %(today)s)
+		  {conditions}
+		order by item_code, currency, (valid_from is null), valid_from desc, modified desc
+		""",
+		params,
+	)
+
+	prices = {}
+	for item_code, currency, rate, valid_upto in rows:
+		prices.setdefault((item_code, currency), (float(rate or 0), valid_upto))
+	return prices
+
+
+def _price_list_for_customer(customer: str) -> str:
+	"""Müşterinin anlaşma Price List'i (isim müşteri ile aynı); müşteri okuma yetkisi gerekir."""
+	frappe.has_permission("Customer", "read", doc=customer, throw=True)
+	if not frappe.db.exists("Price List", customer):
+		frappe.throw(frappe._("No agreement price list found for customer {0}").format(customer), frappe.DoesNotExistError)
+	return customer
+
+
+@frappe.whitelist()
+def get_price_sheet(customer: str):
+	"""Müşterinin bugün geçerli anlaşma fiyatlarının tamamı.
+
+	Returns:
+		dict: {"customer", "version", "date", "columns", "items": [[item_code, currency, rate, valid_upto]]}
+
+	Requires: Item Price read + Customer read (belge bazında)
+	"""
+	frappe.has_permission("Item Price", "read", throw=True)
+	price_list = _price_list_for_customer(customer)
+
+	today = nowdate()
+	version = _current_version(price_list)
+	cache_key = f"{PRICE_SHEET_CACHE_PREFIX}:{price_list}"
+	cached = frappe.cache().get_value(cache_key)
+	if cached and cached.get("list_version") == version and cached.get("date") == today:
+		return cached["sheet"]
+
+	# Versiyon fiyatlardan önce okunur - arada yazılan değişiklik bir sonraki deltada tekrar gelir
+	global_version = _current_version()
+	prices = _effective_prices(price_list)
+	sheet = {
+		"customer": customer,
+		# İstemci deltaları bu versiyondan itibaren ister (global sayaç)
+		"version": global_version,
+		"date": today,
+		"columns": ["item_code", "currency", "rate", "valid_upto"],
+		"items": [
+			[item_code, currency, rate, valid_upto]
+			for (item_code, currency), (rate, valid_upto) in sorted(prices.items())
+		],
+	}
+	frappe.cache().set_value(
+		cache_key, {"list_version": version, "date": today, "sheet": sheet}, expires_in_sec=24 * 60 * 60
+	)
+	return sheet
+
+
+@frappe.whitelist()
+def get_price_sheet_changes(customer: str, since: int):
+	"""Verilen versiyondan sonraki değişiklikler.
+
+	Args:
+		customer: Customer name
+		since: İstemcinin sahip olduğu son versiyon (get_price_sheet / önceki delta)
+
+	Returns:
+		dict: {"customer", "version", "reset": bool, "upserts": [[item_code, currency, rate, valid_upto]],
+		       "deletes": [[item_code, currency]]}
+
+	Requires: Item Price read + Customer read (belge bazında)
+	"""
+	frappe.has_permission("Item Price", "read", throw=True)
+	price_list = _price_list_for_customer(customer)
+	since = cint(since)
+
+	version = _current_version()
+	result = {"customer": customer, "version": version, "reset": False, "upserts": [], "deletes": []}
+
+	# Budanan aralık istenirse tam liste yeniden çekilmeli
+	oldest = cint(frappe.db.sql(f"select min(name) from `tab{PRICE_EVENT_DOCTYPE}`")[0][0])
+	if oldest and since < oldest - 1:
+		result["reset"] = True
+		return result
+
+	keys = frappe.db.sql(
+		f"""
+		select distinct item_code, currency
+		from `tab{PRICE_EVENT_DOCTYPE}`
+		where price_list = %(price_list)s
+		  and (name > %(since)s or creation >= %(recheck_from)s)
+		  and name <= %(version)s
+		""",
+		{
+			"price_list": price_list,
+			"since": since,
+			"version": version,
+			"recheck_from": add_to_date(now_datetime(), seconds=-DELTA_RECHECK_SECONDS),
+		},
+	)
+	if not keys:
+		return result
+
+	prices = _effective_prices(price_list, [tuple(key) for key in keys])
+	for item_code, currency in sorted(keys):
+		if (item_code, currency) in prices:
+			rate, valid_upto = prices[(item_code, currency)]
+			result["upserts"].append([item_code, currency, rate, valid_upto])
+		else:
+			result["deletes"].append([item_code, currency])
+
+	return result
+
+
+def prune_price_events() -> int:
+	"""Scheduler job: saklama süresinden eski event'leri chunk'lar halinde sil.
+
+	Site config: culinary_price_event_retention_days (varsayılan 30)
+	"""
+	retention_days = cint(frappe.conf.get("culinary_price_event_retention_days")) or DEFAULT_EVENT_RETENTION_DAYS
+	cutoff = add_days(now_datetime(), -retention_days)
+
+	deleted = 0
+	while True:
+		names = frappe.db.sql(
+			f"""
+			select name from `tab{PRICE_EVENT_DOCTYPE}`
+			where creation < %(cutoff)s
+			order by name
+			limit %(limit)s
+			""",
+			{"cutoff": cutoff, "limit": EVENT_PRUNE_CHUNK_SIZE},
+			pluck=True,
+		)
+		if not names:
+			break
+
+		frappe.db.sql(f"delete from `tab{PRICE_EVENT_DOCTYPE}` where name in %(names)s", {"names": tuple(names)})
+		frappe.db.commit()
+		deleted += len(names)
+
+	if deleted:
+		frappe.logger().info(f"Agreement price events pruned: {deleted}")
+	return deleted
@@ -0,0 +1,269 @@
+"""
+Culinary Order Management - What-if price simulation
+
+Standard Selling fiyatları değiştirilmeden önce, önerilen fiyatların (CSV) tüm
+aktif Agreement'lara etkisini hesaplar. Hiçbir kayıt yazılmaz: agreement item'ları,
+indirimler ve güncel Agreement fiyatları dizilere yüklenir, yeni fiyatlar, farklar
+ve gelir etkisi (son N gündeki Sales Order miktarları ile) NumPy ile tek geçişte
+hesaplanır. Satır bazlı fark CSV'si Redis'te tutulur ve indirilebilir.
+
+CSV kolonları: item_code, new_standard_rate (veya rate), currency (opsiyonel)
+"""
+
+import csv
+import io
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, cint, flt, getdate, nowdate
+
+SIMULATION_CACHE_PREFIX = "culinary_price_simulation"
+SIMULATION_CACHE_TTL = 60 * 60
+DEFAULT_LOOKBACK_DAYS = 90
+RATE_COLUMNS = ("new_standard_rate", "rate", "price_list_rate")
+DIFF_COLUMNS = [
+	"agreement", "customer", "item_code", "currency", "discount_rate",
+	"current_standard_rate", "new_standard_rate", "current_agreement_rate", "new_agreement_rate",
+	"delta", "delta_pct", "qty", "revenue_impact",
+]
+
+
+def _parse_proposed_rates(content: str, default_currency: str) -> tuple:
+	"""CSV içeriğini {(item_code, currency): rate} sözlüğüne çevir.
+
+	Returns:
+		tuple: (rates, errors: [str])
+	"""
+	reader = csv.DictReader(io.StringIO(content.lstrip("﻿")))
+	fieldnames = [f.strip().lower() for f in (reader.fieldnames or [])]
+	rate_column = next((c for c in RATE_COLUMNS if c in fieldnames), None)
+	if "item_code" not in fieldnames or not rate_column:
+		frappe.throw(_("CSV must contain item_code and new_standard_rate columns"))
+
+	rates = {}
+	errors = []
+	for line_no, raw in enumerate(reader, start=2):
+		row = {(k or "").strip().lower(): (v or "").strip() for k, v in raw.items()}
+		item_code = row.get("item_code")
+		if not item_code:
+			continue
+		try:
+			rate = float(row.get(rate_column).replace(",", "."))
+		except (AttributeError, ValueError):
+			errors.append(_("Line {0}: invalid rate for {1}").format(line_no, item_code))
+			continue
+		rates[(item_code, row.get("currency") or default_currency)] = rate
+
+	return rates, errors
+
+
+def _load_agreement_rows(item_codes: list, company_ccy: str) -> list:
+	"""Aktif agreement item'larını güncel Agreement ve Standard fiyatları ile yükle."""
+	from culinary_order_management.culinary_order_management.agreement import _current_price_condition
+
+	return frappe.db.sql(
+		f"""
+		select
+			a.name as agreement, a.customer, ifnull(a.discount_rate, 0) as discount_rate,
+			ai.item_code, ifnull(nullif(ai.currency, ''), %(company_ccy)s) as currency,
+			ai.price_list_rate as original_rate,
+			(
+				select ip.price_list_rate from `tabItem Price` ip
+				where ip.agreement = a.name
+				  and ip.price_list = a.customer
+				  and ip.item_code = ai.item_code
+				  and ip.currency = ifnull(nullif(ai.currency, ''), %(company_ccy)s)
+				limit 1
+			) as current_rate,
+			(
+				select sp.price_list_rate from `tabItem Price` sp
+				where sp.price_list = 'Standard Selling'
+				  and sp.item_code = ai.item_code
+				  and sp.currency = ifnull(nullif(ai.currency, ''), %(company_ccy)s)
+				  and {_current_price_condition("sp")}
+				order by (sp.valid_from is null), sp.valid_from desc, sp.modified desc
+				limit 1
+			) as current_standard
+		from `tabAgreement` a
+		join `tabAgreement Item` ai on ai.parent = a.name and ai.parenttype = 'Agreement'
+		where a.docstatus = 1
+		  and a.status = 'Active'
+		  and ai.item_code in %(item_codes)s
+		order by a.customer, a.name, ai.idx
+		""",
+		{"item_codes": tuple(item_codes), "company_ccy": company_ccy, "today": getdate(nowdate())},
+		as_dict=True,
+	)
+
+
+def _get_sold_quantities(item_codes: list, lookback_days: int) -> dict:
+	"""Son N günde müşteri/item bazında satılan miktar (submitted Sales Order).
+
+	Returns:
+		dict: {(customer, item_code): qty}
+	"""
+	rows = frappe.db.sql(
+		"""
+		select so.customer, soi.item_code, sum(soi.stock_qty) as qty
+		from `tabSales Order Item` soi
+		join `tabSales Order` so on so.name = soi.parent
+		where so.docstatus = 1
+		  and so.transaction_date >= %(since)s
+		  and soi.item_code in %(item_codes)s
+		group by so.customer, soi.item_code
+		""",
+		{"item_codes": tuple(item_codes), "since": add_days(nowdate(), -cint(lookback_days))},
+	)
+	return {(customer, item_code): flt(qty) for customer, item_code, qty in rows}
+
+
+def simulate(proposed_rates: dict, lookback_days: int = DEFAULT_LOOKBACK_DAYS, company_ccy: str = "EUR") -> dict:
+	"""Önerilen Standard Selling fiyatlarının etkisini vektörel hesapla (yazma yok).
+
+	Args:
+		proposed_rates: {(item_code, currency): new_standard_rate}
+
+	Returns:
+		dict: {"summary": {...}, "rows": [diff row dict]}
+	"""
+	import numpy as np
+
+	item_codes = list({item_code for item_code, _currency in proposed_rates})
+	rows = _load_agreement_rows(item_codes, company_ccy) if item_codes else []
+	rows = [row for row in rows if (row.item_code, row.currency) in proposed_rates]
+	if not rows:
+		return {"summary": {"rows": 0}, "rows": []}
+
+	sold = _get_sold_quantities(item_codes, lookback_days)
+
+	new_std = np.array([proposed_rates[(r.item_code, r.currency)] for r in rows], dtype=float)
+	discount = np.array([flt(r.discount_rate) for r in rows], dtype=float)
+	# Item Price yoksa agreement'taki orijinal fiyat baz alınır
+	current = np.array(
+		[flt(r.current_rate) if r.current_rate is not None else flt(r.original_rate) for r in rows], dtype=float
+	)
+	current_std = np.array([flt(r.current_standard) for r in rows], dtype=float)
+	qty = np.array([sold.get((r.customer, r.item_code), 0.0) for r in rows], dtype=float)
+
+	new_rate = np.round(new_std * (1.0 - discount / 100.0), 2)
+	delta = new_rate - current
+	delta_pct = np.divide(delta * 100.0, current, out=np.zeros_like(delta), where=current > 0)
+	impact = delta * qty
+
+	currencies = np.array([r.currency for r in rows])
+	impact_by_currency = {}
+	for currency in np.unique(currencies):
+		mask = currencies == currency
+		impact_by_currency[str(currency)] = {
+			"current_revenue": round(float(np.sum(current[mask] * qty[mask])), 2),
+			"new_revenue": round(float(np.sum(new_rate[mask] * qty[mask])), 2),
+			"revenue_impact": round(float(np.sum(impact[mask])), 2),
+		}
+
+	changed = np.abs(delta) >= 0.005
+	summary = {
+		"rows": len(rows),
+		"agreements": len({r.agreement for r in rows}),
+		"customers": len({r.customer for r in rows}),
+		"items": len({r.item_code for r in rows}),
+		"increased": int(np.count_nonzero(changed & (delta > 0))),
+		"decreased": int(np.count_nonzero(changed & (delta < 0))),
+		"unchanged": int(np.count_nonzero(~changed)),
+		"avg_delta_pct": round(float(np.mean(delta_pct[changed])), 2) if changed.any() else 0.0,
+		"max_delta_pct": round(float(np.max(np.abs(delta_pct))), 2),
+		"lookback_days": cint(lookback_days),
+		"by_currency": impact_by_currency,
+	}
+
+	diff_rows = [
+		{
+			"agreement": r.agreement,
+			"customer": r.customer,
+			"item_code": r.item_code,
+			"currency": r.currency,
+			"discount_rate": flt(discount[i]),
+			"current_standard_rate": round(float(current_std[i]), 2),
+			"new_standard_rate": round(float(new_std[i]), 2),
+			"current_agreement_rate": round(float(current[i]), 2),
+			"new_agreement_rate": float(new_rate[i]),
+			"delta": round(float(delta[i]), 2),
+			"delta_pct": round(float(delta_pct[i]), 2),
+			"qty": float(qty[i]),
+			"revenue_impact": round(float(impact[i]), 2),
+		}
+		for i, r in enumerate(rows)
+	]
+
+	return {"summary": summary, "rows": diff_rows}
+
+
+def _read_csv_input(file_url: str | None, content: str | None) -> str:
+	if content:
+		return content
+	if not file_url:
+		frappe.throw(_("Please upload a CSV file"))
+	file_doc = frappe.get_doc("File", {"file_url": file_url})
+	# Private dosyalar sadece okuma yetkisi olan kullanıcıya açılır
+	file_doc.check_permission("read")
+	data = file_doc.get_content()
+	return data.decode("utf-8-sig") if isinstance(data, bytes) else data
+
+
+def _cache_key(simulation_id: str) -> str:
+	return f"{SIMULATION_CACHE_PREFIX}:{simulation_id}"
+
+
+@frappe.whitelist()
+def run_price_simulation(file_url: str | None = None, content: str | None = None, lookback_days: int = DEFAULT_LOOKBACK_DAYS):
+	"""CSV'deki önerilen Standard Selling fiyatları için what-if simülasyonu (salt okunur).
+
+	Args:
+		file_url: Yüklenmiş CSV dosyası (File.file_url)
+		content: Alternatif olarak CSV içeriği
+		lookback_days: Gelir etkisi için kullanılacak satış geçmişi (gün)
+
+	Returns:
+		dict: {"simulation_id", "summary", "top_changes": [...], "errors": [...]}
+
+	Requires: Agreement and Item Price read permission
+	"""
+	if not frappe.has_permission("Agreement", "read") or not frappe.has_permission("Item Price", "read"):
+		frappe.throw(_("You don't have permission to run price simulations"), frappe.PermissionError)
+
+	company_ccy = frappe.db.get_value("Company", {"is_group": 0}, "default_currency") or "EUR"
+	proposed_rates, errors = _parse_proposed_rates(_read_csv_input(file_url, content), company_ccy)
+	result = simulate(proposed_rates, lookback_days=cint(lookback_days) or DEFAULT_LOOKBACK_DAYS, company_ccy=company_ccy)
+
+	# Fark CSV'si indirme için cache'e
+	output = io.StringIO()
+	writer = csv.DictWriter(output, fieldnames=DIFF_COLUMNS)
+	writer.writeheader()
+	writer.writerows(result["rows"])
+
+	simulation_id = frappe.generate_hash(length=12)
+	frappe.cache().set_value(
+		_cache_key(simulation_id),
+		{"user": frappe.session.user, "csv": output.getvalue()},
+		expires_in_sec=SIMULATION_CACHE_TTL,
+	)
+
+	top_changes = sorted(result["rows"], key=lambda r: abs(r["revenue_impact"]), reverse=True)[:20]
+
+	return {
+		"simulation_id": simulation_id,
+		"summary": result["summary"],
+		"top_changes": top_changes,
+		"errors": errors[:50],
+	}
+
+
+@frappe.whitelist()
+def download_price_simulation(simulation_id: str):
+	"""Simülasyonun satır bazlı fark CSV'sini indir."""
+	cached = frappe.cache().get_value(_cache_key(simulation_id))
+	if not cached or cached.get("user") != frappe.session.user:
+		frappe.throw(_("Simulation result not found or expired"), frappe.DoesNotExistError)
+
+	frappe.response["filename"] = f"price_simulation_{simulation_id}.csv"
+	frappe.response["filecontent"] = cached["csv"]
+	frappe.response["type"] = "download"
@@ -0,0 +1,328 @@
+"""
+Culinary Order Management - Point-in-time agreement prices
+
+Item Price kayıtları yerinde güncellendiği için geçmiş bir tarihteki anlaşma fiyatı
+sadece Agreement Item Price History'den yeniden kurulabilir. Bu modül agreement'ların
+ilk fiyatları (Agreement Item.price_list_rate) ve geçmiş log'undan (customer, item)
+bazında bir zaman index'i kurar; "X müşterisine Y ürünü D tarihinde hangi fiyattan
+satıldı" sorusu bisect ile cevaplanır.
+
+Her agreement bir segmenttir: geçerlilik penceresi + sıralı (tarih, fiyat) listesi.
+İptal edilmiş agreement'ların penceresi iptal tarihinde (modified) kapanır.
+
+Geçmiş log'u saklama job'u (price_history_retention) tarafından özetlenir/arşivlenir:
+arşiv dosyaları da okunur ve Compacted satırların rate_points ara noktaları açılır.
+Ara noktası olmayan eski Compacted satırların kapsadığı ay içindeki sorgular
+"approximate" olarak işaretlenir.
+"""
+
+from bisect import bisect_right
+from datetime import datetime, time
+
+import frappe
+from frappe.utils import cint, flt, get_datetime, getdate
+
+from culinary_order_management.culinary_order_management.price_history_retention import (
+	parse_rate_points,
+	read_archived_history,
+)
+
+
+class _Segment:
+	__slots__ = ("agreement", "approximate_windows", "currency", "end", "rates", "start", "times")
+
+	def __init__(self, agreement, currency, start, end, initial_rate):
+		self.agreement = agreement
+		self.currency = currency
+		self.start = start
+		self.end = end
+		self.times = [start]
+		self.rates = [initial_rate]
+		self.approximate_windows = []
+
+	def add_change(self, change_time, rate):
+		self.times.append(change_time)
+		self.rates.append(rate)
+
+	def add_history_row(self, row):
+		"""Geçmiş satırını (DB veya arşiv) ekle; Compacted satırların ara noktaları açılır."""
+		points = parse_rate_points(row)
+		if points:
+			for change_date, rate in points:
+				self.add_change(get_datetime(change_date), flt(rate))
+			return
+
+		change_time = get_datetime(row.change_date)
+		self.add_change(change_time, flt(row.new_agreement_rate))
+		if row.source == "Compacted" and cint(row.change_count) > 1:
+			# Ara noktası olmayan özet satır: ay başından son değişikliğe kadar fiyat kesin değil
+			self.approximate_windows.append((change_time.replace(day=1, hour=0, minute=0, second=0, microsecond=0), change_time))
+
+	def rate_at(self, at):
+		return self.rates[bisect_right(self.times, at) - 1]
+
+	def is_approximate(self, at):
+		return any(window_start <= at < window_end for window_start, window_end in self.approximate_windows)
+
+
+def _as_lookup_time(value) -> datetime:
+	"""Sadece tarih verilirse o günün sonundaki (gün içindeki son) fiyat kullanılır."""
+	if isinstance(value, datetime):
+		return value
+	if isinstance(value, str) and len(value.strip()) > 10:
+		return get_datetime(value)
+	return datetime.combine(getdate(value), time.max)
+
+
+class PriceTimeline:
+	"""(customer, item_code) bazında agreement fiyat zaman index'i."""
+
+	def __init__(self):
+		self.segments = {}
+
+	@classmethod
+	def build(
+		cls, customers: list | None = None, item_codes: list | None = None, agreements: list | None = None
+	) -> "PriceTimeline":
+		"""Index'i submitted/iptal edilmiş agreement'lar ve geçmiş log'undan kur.
+
+		Args:
+			customers: Sadece bu müşteriler (None ise tümü)
+			item_codes: Sadece bu item'lar (None ise tümü)
+			agreements: Sadece bu agreement'lar (ör. kullanıcının okuyabildikleri; None ise tümü)
+		"""
+		timeline = cls()
+
+		conditions = ["a.docstatus in (1, 2)", "ifnull(ai.item_code, '') != ''"]
+		params = {}
+		if customers:
+			conditions.append("a.customer in %(customers)s")
+			params["customers"] = tuple(set(customers))
+		if item_codes:
+			conditions.append("ai.item_code in %(item_codes)s")
+			params["item_codes"] = tuple(set(item_codes))
+		if agreements is not None:
+			if not agreements:
+				return timeline
+			conditions.append("a.name in %(agreements)s")
+			params["agreements"] = tuple(set(agreements))
+
+		items = frappe.db.sql(
+			f"""
+			select a.name as agreement, a.customer, a.docstatus, a.valid_from, a.valid_to, a.modified,
+			       ai.item_code, ai.currency, ai.price_list_rate
+			from `tabAgreement` a
+			join `tabAgreement Item` ai on ai.parent = a.name and ai.parenttype = 'Agreement'
+			where {" and ".join(conditions)}
+			""",
+			params,
+			as_dict=True,
+		)
+		if not items:
+			return timeline
+
+		by_agreement_item = {}
+		for row in items:
+			start = datetime.combine(getdate(row.valid_from), time.min)
+			end = datetime.combine(getdate(row.valid_to), time.max)
+			if row.docstatus == 2:
+				# İptal edilen agreement iptal anında geçerliliğini yitirir
+				end = min(end, get_datetime(row.modified))
+			if end < start:
+				continue
+
+			segment = _Segment(row.agreement, row.currency, start, end, flt(row.price_list_rate))
+			timeline.segments.setdefault((row.customer, row.item_code), []).append(segment)
+			by_agreement_item[(row.agreement, row.item_code)] = segment
+
+		history_params = {"agreements": tuple({row.agreement for row in items})}
+		item_condition = ""
+		if item_codes:
+			item_condition = "and item_code in %(item_codes)s"
+			history_params["item_codes"] = tuple(set(item_codes))
+
+		history_rows = frappe.db.sql(
+			f"""
+			select agreement, item_code, change_date, new_agreement_rate, source, change_count, rate_points
+			from `tabAgreement Item Price History`
+			where agreement in %(agreements)s
+			  {item_condition}
+			order by change_date
+			""",
+			history_params,
+			as_dict=True,
+		)
+		# Saklama job'unun arşive taşıdığı eski satırlar: sadece yüklenen item'lar ve
+		# segment başlangıcından sonra biten arşiv dosyaları okunur
+		archive_filters = {}
+		for (agreement, item_code), segment in by_agreement_item.items():
+			filters = archive_filters.setdefault(agreement, {"item_codes": set(), "since": segment.start})
+			filters["item_codes"].add(item_code)
+			filters["since"] = min(filters["since"], segment.start)
+		for agreement, filters in archive_filters.items():
+			history_rows.extend(read_archived_history(agreement, list(filters["item_codes"]), filters["since"]))
+
+		for row in history_rows:
+			segment = by_agreement_item.get((row.agreement, row.item_code))
+			if segment and row.change_date:
+				segment.add_history_row(row)
+
+		for segments in timeline.segments.values():
+			for segment in segments:
+				# Geçmiş satırları aynı tarihte sıralı gelir; başlangıçtan önceki değişiklikler başa alınır
+				pairs = sorted(zip(segment.times, segment.rates), key=lambda p: p[0])
+				segment.times = [p[0] for p in pairs]
+				segment.rates = [p[1] for p in pairs]
+
+		return timeline
+
+	def lookup(self, customer: str, item_code: str, at) -> dict | None:
+		"""Verilen anda geçerli agreement fiyatı.
+
+		Aynı anda birden fazla agreement geçerliyse en son başlayan kazanır.
+
+		Returns:
+			dict | None: {"rate", "currency", "agreement", "approximate"}
+			             approximate: tarih ara noktası olmayan özetlenmiş bir aya düşüyor
+		"""
+		at = _as_lookup_time(at)
+		candidates = [s for s in self.segments.get((customer, item_code), []) if s.start <= at <= s.end]
+		if not candidates:
+			return None
+
+		segment = max(candidates, key=lambda s: s.start)
+		return {
+			"rate": segment.rate_at(at),
+			"currency": segment.currency,
+			"agreement": segment.agreement,
+			"approximate": segment.is_approximate(at),
+		}
+
+
+def _readable_agreements(customers: list) -> list:
+	"""Müşterilerin, kullanıcının okuma yetkisi olan (user permission dahil) agreement'ları."""
+	return frappe.get_list(
+		"Agreement",
+		filters={"customer": ["in", list(set(customers))], "docstatus": ["in", [1, 2]]},
+		pluck="name",
+		limit_page_length=0,
+	)
+
+
+@frappe.whitelist()
+def get_agreement_price_on_date(customer: str, item_code: str, on_date: str):
+	"""Müşteri/ürün için belirtilen tarihte geçerli anlaşma fiyatı.
+
+	Returns:
+		dict | None: {"rate", "currency", "agreement", "approximate"}
+	"""
+	frappe.has_permission("Agreement", "read", throw=True)
+	timeline = PriceTimeline.build(
+		customers=[customer], item_codes=[item_code], agreements=_readable_agreements([customer])
+	)
+	return timeline.lookup(customer, item_code, on_date)
+
+
+@frappe.whitelist()
+def get_agreement_prices_on_dates(queries):
+	"""Toplu mod: [{"customer", "item_code", "date"}] için geçerli anlaşma fiyatları.
+
+	Index sorgulardaki müşteri/item'lar için tek seferde kurulur. Sadece kullanıcının
+	okuyabildiği agreement'lar kullanılır.
+
+	Returns:
+		list: Her sorgu için {"customer", "item_code", "date", "rate", "currency", "agreement", "approximate"}
+	"""
+	frappe.has_permission("Agreement", "read", throw=True)
+	queries = frappe.parse_json(queries) if isinstance(queries, str) else queries or []
+	if not queries:
+		return []
+
+	customers = [q["customer"] for q in queries]
+	timeline = PriceTimeline.build(
+		customers=customers,
+		item_codes=[q["item_code"] for q in queries],
+		agreements=_readable_agreements(customers),
+	)
+
+	results = []
+	for q in queries:
+		found = timeline.lookup(q["customer"], q["item_code"], q["date"]) or {}
+		results.append({
+			"customer": q["customer"],
+			"item_code": q["item_code"],
+			"date": q["date"],
+			"rate": found.get("rate"),
+			"currency": found.get("currency"),
+			"agreement": found.get("agreement"),
+			"approximate": found.get("approximate", False),
+		})
+	return results
+
+
+@frappe.whitelist()
+def check_sales_order_agreement_prices(sales_orders):
+	"""Geçmiş siparişlerin fiyatlarını sipariş tarihindeki anlaşma fiyatı ile karşılaştır.
+
+	Args:
+		sales_orders: Sales Order isimleri (list veya JSON) ya da tek isim
+
+	Returns:
+		list: Anlaşma fiyatından farklı satırlar
+		      [{"sales_order", "item_code", "transaction_date", "rate", "agreement_rate", "difference", "agreement",
+		        "approximate"}]
+	"""
+	frappe.has_permission("Sales Order", "read", throw=True)
+	frappe.has_permission("Agreement", "read", throw=True)
+	if isinstance(sales_orders, str):
+		sales_orders = frappe.parse_json(sales_orders) if sales_orders.startswith("[") else [sales_orders]
+	if not sales_orders:
+		return []
+
+	# Sadece kullanıcının okuyabildiği siparişler (user permission dahil)
+	sales_orders = frappe.get_list(
+		"Sales Order", filters={"name": ["in", list(sales_orders)]}, pluck="name", limit_page_length=0
+	)
+	if not sales_orders:
+		return []
+
+	rows = frappe.db.sql(
+		"""
+		select so.name as sales_order, so.customer, so.transaction_date, so.currency,
+		       soi.item_code, soi.rate
+		from `tabSales Order` so
+		join `tabSales Order Item` soi on soi.parent = so.name
+		where so.name in %(sales_orders)s
+		  and so.docstatus = 1
+		order by so.name, soi.idx
+		""",
+		{"sales_orders": tuple(sales_orders)},
+		as_dict=True,
+	)
+	if not rows:
+		return []
+
+	customers = [r.customer for r in rows]
+	timeline = PriceTimeline.build(
+		customers=customers, item_codes=[r.item_code for r in rows], agreements=_readable_agreements(customers)
+	)
+
+	mismatches = []
+	for row in rows:
+		found = timeline.lookup(row.customer, row.item_code, row.transaction_date)
+		if not found or (found["currency"] and found["currency"] != row.currency):
+			continue
+		difference = flt(row.rate) - flt(found["rate"])
+		if abs(difference) >= 0.01:
+			mismatches.append({
+				"sales_order": row.sales_order,
+				"item_code": row.item_code,
+				"transaction_date": row.transaction_date,
+				"rate": flt(row.rate),
+				"agreement_rate": flt(found["rate"]),
+				"difference": round(difference, 2),
+				"agreement": found["agreement"],
+				"approximate": found["approximate"],
+			})
+
+	return mismatches
@@ -1,7 +1,6 @@
 import frappe
 from frappe import whitelist
-from frappe.utils.pdf import get_pdf
-from frappe.utils import getdate, formatdate
+from frappe.utils import cint, getdate, formatdate
 
 
 @whitelist()
@@ -23,8 +22,6 @@ def create_proforma_invoice(parent_so_name):
         
         # Her child SO için ayrı proforma oluştur
         for child_so in child_sos:
-            child_so_doc = frappe.get_doc("Sales Order", child_so.name)
-            
             # Bu child SO için zaten proforma var mı kontrol et
             existing = frappe.get_all("Proforma Invoice", 
                 filters={
@@ -57,30 +54,7 @@ def create_proforma_invoice(parent_so_name):
                 continue
             
             # Yeni proforma oluştur
-            proforma = frappe.new_doc("Proforma Invoice")
-            proforma.customer = parent_so.customer
-            proforma.source_sales_order = parent_so_name
-            proforma.supplier_company = child_so.company
-            proforma.invoice_date = frappe.utils.today()
-            proforma.due_date = frappe.utils.add_days(proforma.invoice_date, 30)
-            
-            # Bu child SO'nun itemlerini ekle
-            grand_total = 0
-            for item in child_so_doc.items:
-                proforma.append("items", {
-                    "item_code": item.item_code,
-                    "item_name": item.item_name,
-                    "qty": item.qty,
-                    "rate": item.rate,
-                    "amount": item.amount,
-                    "supplier_company": child_so.company
-                })
-                grand_total += item.amount
-            
-            # ✅ Sadece bu şirketin tutarını kullan
-            proforma.grand_total = grand_total
-            proforma.insert(ignore_permissions=True)
-            proforma.submit()
+            proforma = _create_proforma_for_child(parent_so, child_so.name, child_so.company)
             
             # Ayrı PDF oluştur ve attach et
             generate_and_attach_separate_proforma_pdf(proforma.name, parent_so_name, child_so.name, child_so.company)
@@ -95,57 +69,100 @@ def create_proforma_invoice(parent_so_name):
         raise
 
 
+def _create_proforma_for_child(parent_so, child_so_name, supplier_company):
+    """Child SO'nun itemlerinden proforma oluştur ve submit et (PDF hariç)"""
+    child_so_doc = frappe.get_doc("Sales Order", child_so_name)
+    
+    proforma = frappe.new_doc("Proforma Invoice")
+    proforma.customer = parent_so.customer
+    proforma.source_sales_order = parent_so.name
+    proforma.supplier_company = supplier_company
+    proforma.invoice_date = frappe.utils.today()
+    proforma.due_date = frappe.utils.add_days(proforma.invoice_date, 30)
+    
+    # Bu child SO'nun itemlerini ekle
+    grand_total = 0
+    for item in child_so_doc.items:
+        proforma.append("items", {
+            "item_code": item.item_code,
+            "item_name": item.item_name,
+            "qty": item.qty,
+            "rate": item.rate,
+            "amount": item.amount,
+            "supplier_company": supplier_company
+        })
+        grand_total += item.amount
+    
+    # ✅ Sadece bu şirketin tutarını kullan
+    proforma.grand_total = grand_total
+    proforma.insert(ignore_permissions=True)
+    proforma.submit()
+    return proforma
+
+
+def _render_separate_proforma_html(proforma_name, parent_so_name, child_so_name, supplier_company):
+    """Child SO proforması için PDF'e dönüştürülecek HTML'i render et"""
+    proforma = frappe.get_doc("Proforma Invoice", proforma_name)
+    parent_so = frappe.get_doc("Sales Order", parent_so_name)
+    child_so = frappe.get_doc("Sales Order", child_so_name)
+    customer = frappe.get_doc("Customer", proforma.customer)
+    company = frappe.get_doc("Company", supplier_company)
+    
+    # Sadece bu şirkete ait itemleri al
+    items_for_company = []
+    for item in proforma.items:
+        if item.supplier_company == supplier_company:
+            items_for_company.append(item)
+
+    # Tarihleri stringe çevir
+    today_str = formatdate(frappe.utils.nowdate(), "dd.MM.yyyy")
+    due_date_str = formatdate(getdate(proforma.due_date), "dd.MM.yyyy") if proforma.due_date else ""
+    delivery_date_str = formatdate(getdate(parent_so.delivery_date), "dd.MM.yyyy") if getattr(parent_so, "delivery_date", None) else "TBD"
+
+    # PDF template render et
+    return frappe.get_template("culinary_order_management/templates/proforma_template.html").render({
+        "proforma": proforma,
+        "customer": customer,
+        "company": company,
+        "parent_so": parent_so,
+        "child_so": child_so,
+        "items_by_company": {supplier_company: items_for_company},
+        "supplier_company": supplier_company,
+        "today_str": today_str,
+        "due_date_str": due_date_str,
+        "delivery_date_str": delivery_date_str,
+        "taxes": child_so.taxes if hasattr(child_so, 'taxes') else []
+    })
+
+
+def _attach_proforma_file(parent_so_name, filename, pdf_content):
+    """Proforma PDF'ini ana Sales Order'a File olarak ekle"""
+    file_doc = frappe.get_doc({
+        'doctype': 'File',
+        'file_name': filename,
+        'content': pdf_content,
+        'is_private': 0,
+        'attached_to_doctype': 'Sales Order',
+        'attached_to_name': parent_so_name
+    })
+    
+    file_doc.insert(ignore_permissions=True)
+    return file_doc
+
+
 def generate_and_attach_separate_proforma_pdf(proforma_name, parent_so_name, child_so_name, supplier_company):
     """Her child SO için ayrı proforma PDF oluştur ve Sales Order'a attach et"""
     try:
-        proforma = frappe.get_doc("Proforma Invoice", proforma_name)
-        parent_so = frappe.get_doc("Sales Order", parent_so_name)
-        child_so = frappe.get_doc("Sales Order", child_so_name)
-        customer = frappe.get_doc("Customer", proforma.customer)
-        company = frappe.get_doc("Company", supplier_company)
-        
-        # Sadece bu şirkete ait itemleri al
-        items_for_company = []
-        for item in proforma.items:
-            if item.supplier_company == supplier_company:
-                items_for_company.append(item)
+        from frappe.utils.pdf import get_pdf
 
-        # Tarihleri stringe çevir
-        today_str = formatdate(frappe.utils.nowdate(), "dd.MM.yyyy")
-        due_date_str = formatdate(getdate(proforma.due_date), "dd.MM.yyyy") if proforma.due_date else ""
-        delivery_date_str = formatdate(getdate(parent_so.delivery_date), "dd.MM.yyyy") if getattr(parent_so, "delivery_date", None) else "TBD"
-
-        # PDF template render et
-        html_content = frappe.get_template("culinary_order_management/templates/proforma_template.html").render({
-            "proforma": proforma,
-            "customer": customer,
-            "company": company,
-            "parent_so": parent_so,
-            "child_so": child_so,
-            "items_by_company": {supplier_company: items_for_company},
-            "supplier_company": supplier_company,
-            "today_str": today_str,
-            "due_date_str": due_date_str,
-            "delivery_date_str": delivery_date_str,
-            "taxes": child_so.taxes if hasattr(child_so, 'taxes') else []
-        })
+        html_content = _render_separate_proforma_html(proforma_name, parent_so_name, child_so_name, supplier_company)
         
         # PDF oluştur
         pdf_content = get_pdf(html_content)
         
         # Ana Sales Order'a attach et - Her şirket için ayrı dosya
         filename = f"Proforma_{child_so_name}.pdf"
-        
-        file_doc = frappe.get_doc({
-            'doctype': 'File',
-            'file_name': filename,
-            'content': pdf_content,
-            'is_private': 0,
-            'attached_to_doctype': 'Sales Order',
-            'attached_to_name': parent_so_name
-        })
-        
-        file_doc.insert(ignore_permissions=True)
+        file_doc = _attach_proforma_file(parent_so_name, filename, pdf_content)
         frappe.db.commit()
         
         file_url = file_doc.file_url or file_doc.file_name
@@ -159,6 +176,8 @@ def generate_and_attach_separate_proforma_pdf(proforma_name, parent_so_name, chi
 
 def generate_and_attach_proforma_pdf(proforma_name, parent_so_name):
     """Proforma PDF oluştur ve Sales Order'a attach et (Legacy - tek PDF için)"""
+    from frappe.utils.pdf import get_pdf
+
     try:
         proforma = frappe.get_doc("Proforma Invoice", proforma_name)
         parent_so = frappe.get_doc("Sales Order", parent_so_name)
@@ -258,4 +277,171 @@ def create_proforma_for_order(parent_so_name):
         proforma_name = create_proforma_invoice(parent_so_name)
         return {"status": "success", "proforma_name": proforma_name}
     except Exception as e:
-        return {"status": "error", "message": str(e)}
\ No newline at end of file
+        return {"status": "error", "message": str(e)}
+
+# ---------------------------------------------------------------------------
+# Scheduled batch proforma generation
+# ---------------------------------------------------------------------------
+
+PROFORMA_BATCH_CHUNK_SIZE = 20
+PROFORMA_BATCH_LOOKBACK_DAYS = 7
+PROFORMA_BATCH_STATS_KEY = "culinary_proforma_batch_last_run"
+
+
+def _get_pending_proforma_parents(since):
+    """Proforması veya proforma PDF'i eksik olan bölünmüş parent SO'ları getir.
+
+    Her child SO için (parent, child.company) proforması ve
+    `Proforma_<child>.pdf` eki aranır; biri eksikse parent listeye girer.
+    """
+    return frappe.db.sql(
+        """
+        select child.source_web_so as parent_so,
+               min(child.creation) as split_on
+          from `tabSales Order` child
+          join `tabSales Order` parent
+            on parent.name = child.source_web_so and parent.docstatus = 1
+          left join `tabProforma Invoice` pi
+            on pi.source_sales_order = child.source_web_so
+           and pi.supplier_company = child.company
+          left join `tabFile` f
+            on f.attached_to_doctype = 'Sales Order'
+           and f.attached_to_name = child.source_web_so
+           and f.file_name = concat('Proforma_', child.name, '.pdf')
+         where ifnull(child.source_web_so, '') != ''
+           and child.docstatus = 1
+           and child.creation >= %s
+           and (pi.name is null or f.name is null)
+         group by child.source_web_so
+         order by split_on
+        """,
+        (since,),
+        pluck=True,
+    )
+
+
+def _prepare_parent_proformas(parent_so_name):
+    """Parent SO için eksik proformaları oluştur, render edilecek PDF'leri döndür.
+
+    Returns:
+        list: [(parent_so_name, child_so_name, filename, html)] - PDF'i eksik olanlar
+    """
+    parent_so = frappe.get_doc("Sales Order", parent_so_name)
+    child_sos = frappe.get_all(
+        "Sales Order",
+        filters={"source_web_so": parent_so_name, "docstatus": 1},
+        fields=["name", "company"],
+    )
+
+    pending = []
+    created = 0
+    for child_so in child_sos:
+        existing = frappe.get_all(
+            "Proforma Invoice",
+            filters={"source_sales_order": parent_so_name, "supplier_company": child_so.company},
+            pluck="name",
+            limit=1,
+        )
+        if existing:
+            proforma_name = existing[0]
+        else:
+            proforma_name = _create_proforma_for_child(parent_so, child_so.name, child_so.company).name
+            created += 1
+
+        filename = f"Proforma_{child_so.name}.pdf"
+        if frappe.db.exists(
+            "File",
+            {"attached_to_doctype": "Sales Order", "attached_to_name": parent_so_name, "file_name": filename},
+        ):
+            continue
+
+        html = _render_separate_proforma_html(proforma_name, parent_so_name, child_so.name, child_so.company)
+        pending.append((parent_so_name, child_so.name, filename, html))
+
+    return pending, created
+
+
+def create_pending_proformas(chunk_size=None, lookback_days=None, max_workers=None):
+    """Scheduler job: bölünmüş siparişlerin eksik proformalarını toplu oluştur.
+
+    - Son `lookback_days` gün içinde bölünmüş parent SO'lar taranır (kesinti sonrası telafi)
+    - Parent SO'lar `chunk_size`'lık parçalar halinde işlenir, her parça tek commit
+    - PDF'ler sınırlı bir worker pool üzerinde paralel render edilir
+    - Her çalışmanın throughput bilgisi loglanır ve cache'e yazılır
+
+    Site config: culinary_proforma_batch_chunk_size, culinary_proforma_batch_lookback_days,
+    culinary_pdf_workers
+    """
+    from frappe.utils.pdf import get_pdf
+
+    from culinary_order_management.culinary_order_management.pdf_pool import Throughput, render_in_pool
+
+    chunk_size = cint(chunk_size) or cint(frappe.conf.get("culinary_proforma_batch_chunk_size")) or PROFORMA_BATCH_CHUNK_SIZE
+    lookback_days = (
+        cint(lookback_days)
+        or cint(frappe.conf.get("culinary_proforma_batch_lookback_days"))
+        or PROFORMA_BATCH_LOOKBACK_DAYS
+    )
+
+    meter = Throughput()
+    since = frappe.utils.add_days(frappe.utils.nowdate(), -lookback_days)
+    parents = _get_pending_proforma_parents(since)
+
+    created_proformas = 0
+    attached_pdfs = 0
+    failed = []
+
+    for start in range(0, len(parents), chunk_size):
+        chunk = parents[start:start + chunk_size]
+        pdf_jobs = {}
+
+        # 1) Proformaları oluştur ve HTML'leri render et (DB erişimi - ana thread)
+        for parent_so_name in chunk:
+            frappe.db.savepoint("proforma_batch")
+            try:
+                pending, created = _prepare_parent_proformas(parent_so_name)
+                created_proformas += created
+                for parent, child, filename, html in pending:
+                    pdf_jobs[(parent, child, filename)] = (get_pdf, (html,))
+            except Exception as e:
+                frappe.db.rollback(save_point="proforma_batch")
+                failed.append((parent_so_name, str(e)))
+                frappe.log_error(
+                    f"Toplu proforma oluşturma hatası ({parent_so_name}): {str(e)}\n{frappe.get_traceback()}",
+                    "Proforma Batch Error",
+                )
+
+        # 2) PDF'leri paralel render et
+        results = render_in_pool(pdf_jobs, max_workers=max_workers)
+
+        # 3) File kayıtlarını ekle ve parçayı commit et
+        for (parent_so_name, child_so_name, filename), (ok, payload) in results.items():
+            if not ok:
+                failed.append((child_so_name, payload.splitlines()[0]))
+                frappe.log_error(
+                    f"Proforma PDF render hatası ({child_so_name}): {payload}", "Proforma Batch PDF Error"
+                )
+                continue
+            try:
+                _attach_proforma_file(parent_so_name, filename, payload)
+                attached_pdfs += 1
+            except Exception as e:
+                failed.append((child_so_name, str(e)))
+                frappe.log_error(
+                    f"Proforma PDF ekleme hatası ({child_so_name}): {str(e)}", "Proforma Batch PDF Error"
+                )
+
+        frappe.db.commit()
+
+    stats = meter.stats(parents=len(parents), proformas=created_proformas, pdfs=attached_pdfs, failed=len(failed))
+    stats["run_at"] = frappe.utils.now()
+    frappe.cache().set_value(PROFORMA_BATCH_STATS_KEY, stats)
+    frappe.logger().info(f"Proforma batch: {stats}")
+
+    if failed:
+        frappe.log_error(
+            "\n".join(f"{name}: {reason}" for name, reason in failed[:50]),
+            f"Proforma Batch - {len(failed)} failures",
+        )
+
+    return stats
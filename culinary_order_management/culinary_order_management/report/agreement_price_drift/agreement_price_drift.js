@@ -0,0 +1,33 @@
+// Agreement Price Drift - aktif anlaşmalarda orijinal ve güncel fiyat sapması
+frappe.query_reports["Agreement Price Drift"] = {
+	filters: [
+		{
+			fieldname: "customer",
+			label: __("Customer"),
+			fieldtype: "Link",
+			options: "Customer"
+		},
+		{
+			fieldname: "supplier",
+			label: __("Supplier"),
+			fieldtype: "Link",
+			options: "Supplier"
+		},
+		{
+			fieldname: "threshold",
+			label: __("Min. Drift %"),
+			fieldtype: "Float",
+			default: 1
+		}
+	],
+	formatter: function(value, row, column, data, default_formatter) {
+		value = default_formatter(value, row, column, data);
+		if (data && ["standard_drift_pct", "agreement_drift_pct"].includes(column.fieldname)) {
+			const pct = data[column.fieldname] || 0;
+			if (Math.abs(pct) >= 0.01) {
+				value = `<span style="color: ${pct > 0 ? "#dc3545" : "#28a745"}; font-weight: bold;">${value}</span>`;
+			}
+		}
+		return value;
+	}
+};
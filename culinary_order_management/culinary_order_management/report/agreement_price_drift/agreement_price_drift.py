@@ -0,0 +1,35 @@
+# Copyright (c) 2026, İdris and contributors
+# For license information, please see license.txt
+
+from frappe import _
+
+from culinary_order_management.culinary_order_management.price_drift import get_price_drift
+
+
+def execute(filters=None):
+	filters = filters or {}
+	data = get_price_drift(
+		customer=filters.get("customer"),
+		supplier=filters.get("supplier"),
+		threshold=filters.get("threshold") or 0,
+	)
+	return get_columns(), data
+
+
+def get_columns():
+	return [
+		{"fieldname": "agreement", "label": _("Agreement"), "fieldtype": "Link", "options": "Agreement", "width": 180},
+		{"fieldname": "customer", "label": _("Customer"), "fieldtype": "Link", "options": "Customer", "width": 150},
+		{"fieldname": "supplier", "label": _("Supplier"), "fieldtype": "Link", "options": "Supplier", "width": 150},
+		{"fieldname": "item_code", "label": _("Item Code"), "fieldtype": "Link", "options": "Item", "width": 130},
+		{"fieldname": "item_name", "label": _("Item Name"), "fieldtype": "Data", "width": 180},
+		{"fieldname": "currency", "label": _("Currency"), "fieldtype": "Link", "options": "Currency", "width": 80},
+		{"fieldname": "original_standard", "label": _("Original Standard"), "fieldtype": "Currency", "options": "currency", "width": 120},
+		{"fieldname": "current_standard", "label": _("Current Standard"), "fieldtype": "Currency", "options": "currency", "width": 120},
+		{"fieldname": "standard_drift", "label": _("Standard Drift"), "fieldtype": "Currency", "options": "currency", "width": 110},
+		{"fieldname": "standard_drift_pct", "label": _("Standard Drift %"), "fieldtype": "Percent", "width": 110},
+		{"fieldname": "original_agreement", "label": _("Original Agreement"), "fieldtype": "Currency", "options": "currency", "width": 120},
+		{"fieldname": "current_agreement", "label": _("Current Agreement"), "fieldtype": "Currency", "options": "currency", "width": 120},
+		{"fieldname": "agreement_drift", "label": _("Agreement Drift"), "fieldtype": "Currency", "options": "currency", "width": 110},
+		{"fieldname": "agreement_drift_pct", "label": _("Agreement Drift %"), "fieldtype": "Percent", "width": 110},
+	]
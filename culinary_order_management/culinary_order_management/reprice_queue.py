@@ -0,0 +1,163 @@
+"""
+Culinary Order Management - Debounced agreement reprice queue
+
+Standard Selling fiyat değişiklikleri (ör. Data Import ile binlerce satır) Item Price
+hook'unda senkron işlenmez. Hook sadece item kodunu Redis'teki tekilleştiren bir
+sete yazar; dakikalık scheduler job'u seti parça parça boşaltıp her parça için
+etkilenen tüm Agreement fiyatlarını tek seferde yeniden hesaplar.
+
+Aynı item pencere içinde defalarca değişse bile set'te tek eleman olarak kalır ve
+tek bir reprice ile (güncel Standard Selling fiyatından) işlenir.
+
+İşlenen parça kuyruktan atomik SMOVE ile "işleniyor" setine taşınır ve ancak commit
+sonrası oradan silinir. Worker parça ortasında ölürse bir sonraki çalışma bu seti
+kuyruğa geri koyar; işlem sırasında yeniden eklenen item'lar kuyrukta kalır.
+"""
+
+import traceback
+
+import frappe
+from frappe.utils import cint, flt, getdate, nowdate
+
+REPRICE_QUEUE_KEY = "culinary_agreement_reprice_queue"
+REPRICE_PROCESSING_KEY = "culinary_agreement_reprice_processing"
+DRAIN_BATCH_SIZE = 200
+
+
+# RedisWrapper set komutları (sadd, srem, srandmember, smembers) anahtarı kendisi prefix'ler;
+# sarılı olmayan komutlar (scard, smove) için anahtar make_key ile kurulur
+def _queue_key() -> str:
+	return frappe.cache().make_key(REPRICE_QUEUE_KEY)
+
+
+def _processing_key() -> str:
+	return frappe.cache().make_key(REPRICE_PROCESSING_KEY)
+
+
+def _add_to_queue(item_code: str) -> None:
+	frappe.cache().sadd(REPRICE_QUEUE_KEY, item_code)
+
+
+def enqueue_item_reprice(item_code: str) -> None:
+	"""Item kodunu reprice kuyruğuna ekle (aynı kod tekrar eklenirse tek kalır).
+
+	Kuyruğa yazma transaction commit edildikten sonra yapılır; aksi halde drain
+	job'u henüz commit edilmemiş (eski) Standard Selling fiyatını okuyabilir.
+	"""
+	if item_code:
+		frappe.db.after_commit.add(lambda: _add_to_queue(item_code))
+
+
+def get_queue_length() -> int:
+	return cint(frappe.cache().scard(_queue_key()))
+
+
+def _decode(members) -> list:
+	return [m.decode() if isinstance(m, bytes) else m for m in members or []]
+
+
+def _pop_batch(batch_size: int) -> list:
+	"""Kuyruktan bir parça al ve işleniyor setine taşı (commit sonrası _ack ile silinir)."""
+	members = _decode(frappe.cache().srandmember(REPRICE_QUEUE_KEY, batch_size))
+	if not members:
+		return []
+
+	pipe = frappe.cache().pipeline()
+	for member in members:
+		pipe.smove(_queue_key(), _processing_key(), member)
+	# SMOVE atomiktir; başka bir worker'ın aldığı eleman burada False döner
+	return [member for member, moved in zip(members, pipe.execute()) if moved]
+
+
+def _ack(item_codes: list) -> None:
+	if item_codes:
+		frappe.cache().srem(REPRICE_PROCESSING_KEY, *item_codes)
+
+
+def _requeue(item_codes: list) -> None:
+	if item_codes:
+		frappe.cache().sadd(REPRICE_QUEUE_KEY, *item_codes)
+		_ack(item_codes)
+
+
+def _recover_in_flight() -> int:
+	"""Yarıda kalan (commit edilmemiş) parçaları kuyruğa geri koy."""
+	item_codes = _decode(frappe.cache().smembers(REPRICE_PROCESSING_KEY))
+	_requeue(item_codes)
+	return len(item_codes)
+
+
+def _get_current_standard_rates(item_codes: list) -> dict:
+	"""Bugün geçerli Standard Selling fiyatlarını toplu getir (ileri tarihli fiyatlar hariç).
+
+	Returns:
+		dict: {item_code: {currency: rate}}
+	"""
+	from culinary_order_management.culinary_order_management.agreement import _current_price_condition
+
+	rows = frappe.db.sql(
+		f"""
+		select item_code, currency, price_list_rate
+		from `tabItem Price`
+		where price_list = 'Standard Selling'
+		  and item_code in %(item_codes)s
+		  and {_current_price_condition()}
+		order by (valid_from is null), valid_from desc, modified desc
+		""",
+		{"item_codes": tuple(item_codes), "today": getdate(nowdate())},
+		as_dict=True,
+	)
+
+	rates = {}
+	for row in rows:
+		# Aynı item/currency için ilk (en güncel) satır kazanır
+		rates.setdefault(row.item_code, {}).setdefault(row.currency, flt(row.price_list_rate))
+	return rates
+
+
+def drain_reprice_queue(batch_size: int | None = None) -> dict:
+	"""Scheduler job: reprice kuyruğunu parça parça boşalt.
+
+	Her parça: güncel Standard Selling fiyatları tek sorguda okunur, etkilenen
+	Agreement fiyatları set-based güncellenir, parça commit edilir. Hata olursa
+	parça geri alınır ve item kodları tekrar kuyruğa konur. Item kodları kuyruktan
+	ancak commit sonrası silinir (yarıda ölen çalışmanın parçası bir sonraki çalışmada
+	kurtarılır).
+
+	Site config: culinary_reprice_batch_size
+	"""
+	from culinary_order_management.culinary_order_management.agreement import _reprice_agreement_items
+
+	batch_size = cint(batch_size) or cint(frappe.conf.get("culinary_reprice_batch_size")) or DRAIN_BATCH_SIZE
+	stats = {"items": 0, "updated": 0, "batches": 0, "recovered": _recover_in_flight()}
+
+	while True:
+		item_codes = _pop_batch(batch_size)
+		if not item_codes:
+			break
+
+		try:
+			rates = _get_current_standard_rates(item_codes)
+			result = _reprice_agreement_items(rates, source="Automatic")
+			frappe.db.commit()
+			_ack(item_codes)
+		except Exception as e:
+			frappe.db.rollback()
+			_requeue(item_codes)
+			frappe.log_error(
+				message=f"Reprice batch failed ({len(item_codes)} items): {str(e)}\n{traceback.format_exc()}",
+				title="Agreement Reprice Queue - Batch Failed"
+			)
+			break
+
+		stats["items"] += len(item_codes)
+		stats["updated"] += result["updated"]
+		stats["batches"] += 1
+
+	if stats["batches"]:
+		frappe.logger().info(
+			f"Agreement reprice queue drained: {stats['items']} items, "
+			f"{stats['updated']} agreement prices updated in {stats['batches']} batches"
+		)
+
+	return stats
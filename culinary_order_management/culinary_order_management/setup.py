@@ -26,3 +26,39 @@ def ensure_admin_company_permissions_clear(*args, **kwargs):
         pass
 
 
+
+
+ITEM_PRICE_AGREEMENT_INDEX = "agreement_price_lookup"
+
+ITEM_PRICE_CUSTOM_FIELDS = {
+    "Item Price": [
+        {
+            "fieldname": "agreement",
+            "label": "Agreement",
+            "fieldtype": "Link",
+            "options": "Agreement",
+            "insert_after": "note",
+            "read_only": 1,
+            "no_copy": 1,
+            "search_index": 1,
+        }
+    ]
+}
+
+
+def ensure_item_price_agreement_field(*args, **kwargs):
+    """Create the indexed `Item Price.agreement` link used for agreement price lookups.
+
+    Adds the composite (price_list, item_code, currency, agreement) index so
+    agreement price rows are found with exact index seeks instead of
+    `note LIKE '%<agreement>%'` scans. Idempotent; called on install, migrate
+    and from the backfill patch.
+    """
+    from frappe.custom.doctype.custom_field.custom_field import create_custom_fields
+
+    create_custom_fields(ITEM_PRICE_CUSTOM_FIELDS, ignore_validate=True, update=True)
+    frappe.db.add_index(
+        "Item Price",
+        ["price_list", "item_code", "currency", "agreement"],
+        index_name=ITEM_PRICE_AGREEMENT_INDEX,
+    )
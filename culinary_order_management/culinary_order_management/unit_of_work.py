@@ -0,0 +1,82 @@
+"""
+Culinary Order Management - Unit of work for agreement price operations
+
+Agreement fiyat işlemleri (manuel güncelleme, geçmiş silme) satır başına commit
+yapmaz. Her item bir savepoint içinde çalışır: hata olursa sadece o item geri
+alınır, diğerleri etkilenmez. İşlem sonunda tek commit yapılır; çok büyük
+agreement'larda transaction uzunluğunu sınırlamak için her chunk_size item'da
+bir ara commit atılır.
+
+Kullanım:
+	with UnitOfWork() as uow:
+		for item in items:
+			try:
+				with uow.item(item.item_code):
+					...
+			except Exception:
+				...  # item geri alındı, loglayıp devam et
+"""
+
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import cint
+
+DEFAULT_UOW_CHUNK_SIZE = 500
+
+# Fiyat geçmişi buffer'ı (agreement.create_price_change_log) - geri alınan item'ın satırları da atılır
+_HISTORY_BUFFER_ATTR = "agreement_price_history_buffer"
+
+
+def get_uow_chunk_size(chunk_size: int | None = None) -> int:
+	"""Chunk boyutu: parametre > site config (culinary_uow_chunk_size) > varsayılan."""
+	return max(1, cint(chunk_size) or cint(frappe.conf.get("culinary_uow_chunk_size")) or DEFAULT_UOW_CHUNK_SIZE)
+
+
+class UnitOfWork:
+	"""Savepoint'li item'lar ve chunk bazlı commit ile tek transaction akışı."""
+
+	def __init__(self, chunk_size: int | None = None):
+		self.chunk_size = get_uow_chunk_size(chunk_size)
+		self.pending = 0
+		self.completed = 0
+		self.rolled_back = 0
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc, tb):
+		if exc_type:
+			frappe.db.rollback()
+			return False
+		frappe.db.commit()
+		return False
+
+	@contextmanager
+	def item(self, key: str):
+		"""Tek item'ı savepoint içinde çalıştır; hata olursa sadece bu item geri alınır."""
+		save_point = f"uow_{frappe.generate_hash(length=8)}"
+		buffer = getattr(frappe.local, _HISTORY_BUFFER_ATTR, None)
+		buffer_mark = len(buffer) if buffer else 0
+
+		frappe.db.savepoint(save_point)
+		try:
+			yield
+		except Exception:
+			frappe.db.rollback(save_point=save_point)
+			buffer = getattr(frappe.local, _HISTORY_BUFFER_ATTR, None)
+			if buffer:
+				del buffer[buffer_mark:]
+			self.rolled_back += 1
+			raise
+
+		frappe.db.release_savepoint(save_point)
+		self.completed += 1
+		self.pending += 1
+		if self.pending >= self.chunk_size:
+			self.commit()
+
+	def commit(self) -> None:
+		"""Ara commit - tamamlanan item'lar kalıcı olur."""
+		frappe.db.commit()
+		self.pending = 0
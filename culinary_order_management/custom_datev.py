@@ -5,41 +5,99 @@
 # Bu modül erpnext_datev'in attach_print fonksiyonunu override eder.
 # Monkey patch __init__.py'de uygulanır.
 
+import hashlib
+import json
+import os
+
 import frappe
 from frappe import _
 from frappe.translate import print_language
 
+# Toplu DATEV PDF export'u yapılabilecek belge tipleri
+DATEV_PDF_DOCTYPES = {"Sales Invoice"}
 
-def attach_print_custom(doctype, name, language, print_format):
-	"""
-	DATEV için özelleştirilmiş PDF oluşturma fonksiyonu.
-	
-	Orijinal attach_print fonksiyonunun override'ı.
-	wkhtmltopdf network hatalarını önlemek için:
-	- no_letterhead=1 kullanır (external kaynaklar yok)
-	- Basit PDF formatı oluşturur
+
+def _validate_batch_doctype(doctype):
+	if doctype not in DATEV_PDF_DOCTYPES:
+		frappe.throw(_("DATEV PDF export is not supported for {0}").format(_(doctype)), frappe.PermissionError)
+
+
+def _render_datev_pdf(doctype, name, language, print_format):
+	"""Print format PDF'ini no_letterhead ile render et ve (varsa) e-invoice XML ekle.
+
+	Returns:
+		tuple: (pdf_bytes, xml_error: str | None)
 	"""
-	
 	with print_language(language):
 		# no_letterhead ile PDF oluştur (external kaynaklar olmadan)
 		data = frappe.get_print(
-			doctype, 
-			name, 
-			print_format or "", 
+			doctype,
+			name,
+			print_format or "",
 			as_pdf=True,
 			no_letterhead=1  # Logo/letterhead olmadan (network erişimi yok)
 		)
-	
+
 	# E-Invoice XML ekle (varsa)
+	xml_error = None
 	if doctype == "Sales Invoice" and "eu_einvoice" in frappe.get_installed_apps():
 		try:
 			from eu_einvoice.european_e_invoice.custom.sales_invoice import attach_xml_to_pdf
 			data = attach_xml_to_pdf(name, data)
 		except Exception:
-			msg = _("Failed to attach XML to Sales Invoice PDF for DATEV")
-			frappe.log_error(title=msg, reference_doctype=doctype, reference_name=name)
-			frappe.msgprint(msg, indicator="red", alert=True)
-	
+			xml_error = _("Failed to attach XML to Sales Invoice PDF for DATEV")
+			frappe.log_error(title=xml_error, reference_doctype=doctype, reference_name=name)
+
+	return data, xml_error
+
+
+def _get_unchanged_datev_files(doctype, names):
+	"""Belgeden sonra oluşturulmuş (değişmemiş) DATEV PDF eki olan belgeleri bul.
+
+	Returns:
+		dict: {document name: File name}
+	"""
+	# doctype tablo adı olarak sorguya girer - sadece bilinen belge tiplerine izin ver
+	_validate_batch_doctype(doctype)
+	if not names:
+		return {}
+
+	rows = frappe.db.sql(
+		f"""
+		select f.attached_to_name, f.name
+		from `tabFile` f
+		join `tab{doctype}` d on d.name = f.attached_to_name
+		where f.attached_to_doctype = %(doctype)s
+		  and f.attached_to_name in %(names)s
+		  and f.is_private = 1
+		  and f.file_name like concat(f.attached_to_name, '%%.pdf')
+		  and f.creation >= d.modified
+		order by f.creation
+		""",
+		{"doctype": doctype, "names": tuple(names)},
+	)
+	# Aynı belge için birden fazla ek varsa en yenisi kazanır
+	return {attached_to_name: file_name for attached_to_name, file_name in rows}
+
+
+def attach_print_custom(doctype, name, language, print_format):
+	"""
+	DATEV için özelleştirilmiş PDF oluşturma fonksiyonu.
+
+	Orijinal attach_print fonksiyonunun override'ı.
+	wkhtmltopdf network hatalarını önlemek için:
+	- no_letterhead=1 kullanır (external kaynaklar yok)
+	- Basit PDF formatı oluşturur
+	- Belge değişmediyse mevcut DATEV PDF'ini tekrar kullanır
+	"""
+	existing = _get_unchanged_datev_files(doctype, [name]) if doctype in DATEV_PDF_DOCTYPES else {}
+	if existing:
+		return existing[name]
+
+	data, xml_error = _render_datev_pdf(doctype, name, language, print_format)
+	if xml_error:
+		frappe.msgprint(xml_error, indicator="red", alert=True)
+
 	# File olarak kaydet
 	file_doc = frappe.new_doc("File")
 	file_doc.file_name = f"{name}.pdf"
@@ -48,11 +106,187 @@ def attach_print_custom(doctype, name, language, print_format):
 	file_doc.attached_to_name = name
 	file_doc.is_private = 1
 	file_doc.save()
-	
+
 	return file_doc.name
 
 
+def _bulk_save_datev_files(doctype, rendered):
+	"""Render edilmiş PDF'leri private files dizinine yaz ve File kayıtlarını toplu ekle.
+
+	Insert hata verirse ya da transaction geri alınırsa yazılan dosyalar silinir
+	(diskte File kaydı olmayan yetim PDF kalmaz).
+
+	Args:
+		doctype: Belge tipi
+		rendered: {document name: pdf_bytes}
+
+	Returns:
+		dict: {document name: File name}
+	"""
+	files_path = frappe.get_site_path("private", "files")
+	os.makedirs(files_path, exist_ok=True)
+
+	now = frappe.utils.now()
+	user = frappe.session.user
+	fields = [
+		"name", "owner", "creation", "modified", "modified_by", "docstatus",
+		"file_name", "file_url", "file_type", "file_size", "content_hash", "folder", "is_private",
+		"attached_to_doctype", "attached_to_name",
+	]
+	values = []
+	saved = {}
+	written = []
+
+	def remove_written_files():
+		for path in written:
+			if os.path.exists(path):
+				os.remove(path)
+
+	frappe.db.after_rollback.add(remove_written_files)
+
+	try:
+		for doc_name, content in rendered.items():
+			content_hash = hashlib.md5(content).hexdigest()
+			file_name = f"{doc_name}.pdf"
+			if os.path.exists(os.path.join(files_path, file_name)):
+				# Aynı isimde dosya varsa File doctype gibi hash son eki ekle
+				file_name = f"{doc_name}{content_hash[-6:]}.pdf"
+
+			path = os.path.join(files_path, file_name)
+			if not os.path.exists(path):
+				# Sadece bu çağrıda oluşturulan dosyalar temizlenir (aynı içerikli mevcut dosya paylaşılır)
+				written.append(path)
+				with open(path, "wb") as f:
+					f.write(content)
+
+			file_docname = frappe.generate_hash(length=10)
+			values.append((
+				file_docname, user, now, now, user, 0,
+				file_name, f"/private/files/{file_name}", "PDF", len(content), content_hash,
+				"Home/Attachments", 1, doctype, doc_name,
+			))
+			saved[doc_name] = file_docname
+
+		if values:
+			frappe.db.bulk_insert("File", fields, values)
+	except Exception:
+		remove_written_files()
+		raise
+
+	return saved
+
+
+def attach_print_batch(doctype, names, language=None, print_format=None, max_workers=None, force=False):
+	"""DATEV için çok sayıda belgenin PDF'ini toplu oluştur.
+
+	- Değişmemiş DATEV PDF'i zaten ekli olan belgeler atlanır (force=True hariç)
+	- PDF'ler (ve e-invoice XML gömme) paralel worker'larda render edilir
+	- File kayıtları tek bir multi-row insert ile yazılır
+	- İlerleme frappe.publish_progress ile bildirilir
+
+	Args:
+		doctype: Belge tipi (genellikle "Sales Invoice")
+		names: Belge isimleri listesi
+		language: Print dili
+		print_format: Print format adı
+		max_workers: Paralel PDF worker sayısı (None ise site config / varsayılan)
+		force: True ise mevcut PDF'ler yok sayılır ve yeniden render edilir
+
+	Returns:
+		dict: {"total", "created": {name: file}, "skipped": {name: file}, "failed": [{"name", "error"}], "warnings": [...]}
+	"""
+	from culinary_order_management.culinary_order_management.pdf_pool import render_in_pool
+
+	_validate_batch_doctype(doctype)
+	names = list(dict.fromkeys(n for n in (names or []) if n))
+	skipped = {} if force else _get_unchanged_datev_files(doctype, names)
+	to_render = [n for n in names if n not in skipped]
+
+	def on_progress(done, total):
+		frappe.publish_progress(
+			done * 100.0 / total,
+			title=_("DATEV PDF Export"),
+			description=_("{0} of {1} documents rendered").format(done, total),
+		)
+
+	jobs = {name: (_render_datev_pdf, (doctype, name, language, print_format)) for name in to_render}
+	results = render_in_pool(jobs, max_workers=max_workers, on_progress=on_progress)
+
+	rendered = {}
+	failed = []
+	warnings = []
+	for name, (ok, payload) in results.items():
+		if not ok:
+			failed.append({"name": name, "error": payload.splitlines()[0]})
+			frappe.log_error(
+				message=payload, title=_("DATEV PDF Export Failed"), reference_doctype=doctype, reference_name=name
+			)
+			continue
+		data, xml_error = payload
+		if xml_error:
+			warnings.append({"name": name, "warning": xml_error})
+		rendered[name] = data
+
+	created = _bulk_save_datev_files(doctype, rendered)
+
+	frappe.logger().info(
+		f"DATEV PDF batch ({doctype}): {len(created)} created, {len(skipped)} skipped, {len(failed)} failed"
+	)
+
+	return {
+		"total": len(names),
+		"created": created,
+		"skipped": skipped,
+		"failed": failed,
+		"warnings": warnings,
+	}
+
+
+@frappe.whitelist()
+def enqueue_datev_pdf_batch(names, doctype="Sales Invoice", language=None, print_format=None, force=0):
+	"""DATEV toplu PDF export'unu background job olarak başlat.
+
+	Sadece kullanıcının yazdırma yetkisi olan belgeler kuyruğa alınır (user permission
+	kısıtları dahil); diğerleri "denied" olarak döner.
+
+	Returns:
+		dict: {"queued": int, "denied": [name]}
+
+	Requires: doctype print permission (belge bazında)
+	"""
+	_validate_batch_doctype(doctype)
+	if not frappe.has_permission(doctype, "print"):
+		frappe.throw(_("You don't have permission to print {0}").format(_(doctype)), frappe.PermissionError)
+
+	if isinstance(names, str):
+		names = json.loads(names)
+	names = list(dict.fromkeys(n for n in (names or []) if n))
+
+	allowed = []
+	denied = []
+	for name in names:
+		if frappe.db.exists(doctype, name) and frappe.has_permission(doctype, "print", doc=name):
+			allowed.append(name)
+		else:
+			denied.append(name)
+
+	if not allowed:
+		return {"queued": 0, "denied": denied}
+
+	frappe.enqueue(
+		"culinary_order_management.custom_datev.attach_print_batch",
+		queue="long",
+		timeout=4 * 60 * 60,
+		doctype=doctype,
+		names=allowed,
+		language=language or frappe.local.lang,
+		print_format=print_format,
+		force=frappe.utils.cint(force),
+	)
+
+	return {"queued": len(allowed), "denied": denied}
+
+
 # Not: send_to_datev_custom fonksiyonu kaldırıldı
 # Monkey patch sadece attach_print fonksiyonunu override ediyor
 # DATEV'in kendi send() fonksiyonu çalışmaya devam ediyor
-
@@ -102,7 +102,10 @@ fixtures = [
 # ------------
 
 # before_install = "culinary_order_management.install.before_install"
-after_install = "culinary_order_management.culinary_order_management.setup.ensure_admin_company_permissions_clear"
+after_install = [
+	"culinary_order_management.culinary_order_management.setup.ensure_admin_company_permissions_clear",
+	"culinary_order_management.culinary_order_management.setup.ensure_item_price_agreement_field",
+]
 
 # Uninstallation
 # ------------
@@ -158,10 +161,24 @@ doc_events = {
 	# Agreement hooks - Artık Agreement class içinde direkt çağrılıyor (agreement.py)
 	# Fiyat yönetimi: on_submit → create_price_list, on_update_after_submit → sync_prices, on_cancel → cleanup_prices
 	
-	# Item Price hook - Standard Selling fiyat güncellendiğinde Agreement'ları otomatik güncelle
+	# Item Price hook - Standard Selling fiyat güncellendiğinde item'ı reprice kuyruğuna ekle (reprice_queue)
+	# Her fiyat değişikliği Agreement Price Drift raporunun cache'ini geçersiz kılar
+	# Müşteri fiyat listelerindeki değişiklikler price sheet feed event log'una yazılır
 	"Item Price": {
-		"after_insert": "culinary_order_management.culinary_order_management.agreement.sync_agreement_prices_on_standard_change",
-		"on_update": "culinary_order_management.culinary_order_management.agreement.sync_agreement_prices_on_standard_change",
+		"after_insert": [
+			"culinary_order_management.culinary_order_management.agreement.sync_agreement_prices_on_standard_change",
+			"culinary_order_management.culinary_order_management.price_drift.invalidate_price_drift_cache",
+			"culinary_order_management.culinary_order_management.price_sheet_feed.record_item_price_event",
+		],
+		"on_update": [
+			"culinary_order_management.culinary_order_management.agreement.sync_agreement_prices_on_standard_change",
+			"culinary_order_management.culinary_order_management.price_drift.invalidate_price_drift_cache",
+			"culinary_order_management.culinary_order_management.price_sheet_feed.record_item_price_event",
+		],
+		"on_trash": [
+			"culinary_order_management.culinary_order_management.price_drift.invalidate_price_drift_cache",
+			"culinary_order_management.culinary_order_management.price_sheet_feed.record_item_price_event",
+		],
 	},
 }
 
@@ -173,16 +190,38 @@ doc_events = {
 # ---------------
 
 scheduler_events = {
+	# Günlük tam kontrol - zamanlama kuyruğunun kaçırdığı geçişler için emniyet ağı
 	"daily": [
 		"culinary_order_management.culinary_order_management.doctype.agreement.agreement.update_all_agreement_statuses"
 	],
+	# Standard Selling değişikliklerinden biriken reprice kuyruğunu boşalt
+	# Vadesi gelen agreement aktivasyon/bitişlerini background job'lara dağıt
+	"cron": {
+		"* * * * *": [
+			"culinary_order_management.culinary_order_management.reprice_queue.drain_reprice_queue",
+			"culinary_order_management.culinary_order_management.agreement_schedule.process_due_agreements",
+		],
+	},
+	# Bölünmüş siparişlerin eksik proformalarını toplu oluştur (kesinti sonrası telafi dahil)
+	"hourly_long": [
+		"culinary_order_management.culinary_order_management.proforma_hooks.create_pending_proformas"
+	],
+	# Fiyat geçmişi saklama: eski değişiklikleri özetle, çok eskileri arşive taşı
+	# Price sheet feed: saklama süresini aşan event'leri buda
+	"daily_long": [
+		"culinary_order_management.culinary_order_management.price_history_retention.apply_price_history_retention",
+		"culinary_order_management.culinary_order_management.price_sheet_feed.prune_price_events",
+	],
 }
 
 # Testing
 # -------
 
 # before_tests = "culinary_order_management.install.before_tests"
-after_migrate = "culinary_order_management.culinary_order_management.setup.ensure_admin_company_permissions_clear"
+after_migrate = [
+	"culinary_order_management.culinary_order_management.setup.ensure_admin_company_permissions_clear",
+	"culinary_order_management.culinary_order_management.setup.ensure_item_price_agreement_field",
+]
 
 # Overriding Methods
 # ------------------------------
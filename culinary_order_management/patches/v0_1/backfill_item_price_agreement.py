@@ -0,0 +1,54 @@
+import frappe
+
+from culinary_order_management.culinary_order_management.setup import ensure_item_price_agreement_field
+
+
+def execute():
+	"""Item Price.agreement alanını oluştur ve mevcut note referanslarından doldur.
+
+	1. note = agreement name olan satırlar tek UPDATE ile eşlenir
+	2. Kalan (note içinde agreement adı geçen) eski satırlarda, aynı müşterinin
+	   anlaşmalarından note'ta geçen EN UZUN ad seçilir (AGR-0001 / AGR-00012 karışmasın)
+	"""
+	ensure_item_price_agreement_field()
+
+	frappe.db.sql(
+		"""
+		update `tabItem Price` ip
+		join `tabAgreement` a on a.name = ip.note
+		set ip.agreement = a.name
+		where ifnull(ip.agreement, '') = ''
+		"""
+	)
+
+	leftovers = frappe.db.sql(
+		"""
+		select ip.name, ip.note, ip.price_list
+		from `tabItem Price` ip
+		where ifnull(ip.agreement, '') = ''
+		  and ifnull(ip.note, '') != ''
+		  and exists (select 1 from `tabAgreement` a where a.customer = ip.price_list)
+		""",
+		as_dict=True,
+	)
+	if not leftovers:
+		return
+
+	agreements_by_customer = {}
+	for name, customer in frappe.db.sql(
+		"select name, customer from `tabAgreement` where customer in %s",
+		(tuple({row.price_list for row in leftovers}),),
+	):
+		agreements_by_customer.setdefault(customer, []).append(name)
+
+	matches = {}
+	for row in leftovers:
+		candidates = [a for a in agreements_by_customer.get(row.price_list, []) if a in row.note]
+		if candidates:
+			matches.setdefault(max(candidates, key=len), []).append(row.name)
+
+	for agreement, item_prices in matches.items():
+		frappe.db.sql(
+			"update `tabItem Price` set agreement = %s where name in %s",
+			(agreement, tuple(item_prices)),
+		)
@@ -0,0 +1,20 @@
+import frappe
+
+
+def execute():
+	"""Agreement Item Price History artık child table değil, bağımsız log.
+
+	Eski child satırlarındaki parent (Agreement) değeri yeni indexli agreement
+	alanına taşınır. Tablo aynı kaldığı için satır kopyalanmaz, tek UPDATE yeterli.
+	"""
+	if not frappe.db.has_column("Agreement Item Price History", "parent"):
+		return
+
+	frappe.db.sql(
+		"""
+		update `tabAgreement Item Price History`
+		set agreement = parent
+		where ifnull(agreement, '') = ''
+		  and parenttype = 'Agreement'
+		"""
+	)
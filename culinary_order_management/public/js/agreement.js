@@ -28,6 +28,11 @@ frappe.ui.form.on('Agreement', {
             };
         };
 
+        // Büyük item listeleri için CSV/XLSX toplu yükleme (sadece kaydedilmiş taslaklar)
+        if (frm.doc.docstatus === 0 && !frm.is_new()) {
+            frm.add_custom_button(__('Import Items'), () => show_item_import_dialog(frm));
+        }
+
         // Quick access to generated Price List
         if (frm.doc.price_list) {
             frm.add_custom_button(__('Open Price List'), () => {
@@ -59,28 +64,7 @@ frappe.ui.form.on('Agreement', {
                 };
             };
         }
-        frappe.call({
-            method: 'culinary_order_management.culinary_order_management.agreement.get_supplier_items_with_standard_prices',
-            args: {
-                supplier: frm.doc.supplier,
-                currency: (frm.doc.agreement_items && frm.doc.agreement_items[0] && frm.doc.agreement_items[0].currency) || null,
-            },
-        }).then(r => {
-            (r.message || []).forEach(row => {
-                const d = frm.add_child('agreement_items');
-                d.item_code = row.item_code;
-                d.item_name = row.item_name;
-                d.item_group = row.item_group;
-                d.kitchen_item = row.kitchen_item ? 1 : 0;
-                d.uom = row.uom;
-                d.standard_selling_rate = row.standard_selling_rate;
-                d.price_list_rate = row.price_list_rate;
-                d.currency = row.currency;
-            });
-            frm.refresh_field('agreement_items');
-            // mevcut indirim oranını uygula
-            apply_agreement_discount(frm);
-        });
+        load_supplier_items(frm, frm.doc.supplier);
     },
     
     before_submit: function(frm) {
@@ -270,6 +254,102 @@ frappe.ui.form.on('Agreement', {
     }
 });
 
+frappe.ui.form.on('Agreement Item', {
+    form_render(frm, cdt, cdn) {
+        // Fiyat değişimi göstergesi - veriler onload'da kompakt olarak gelir
+        const indicators = (frm.doc.__onload && frm.doc.__onload.price_indicators) || {};
+        const data = indicators[cdn];
+        const row_form = frm.fields_dict.agreement_items.grid.grid_rows_by_docname[cdn].grid_form;
+        const field = row_form && row_form.fields_dict.price_change_indicator;
+        if (!field) return;
+        field.$wrapper.html(data ? render_price_change_indicator(...data) : '');
+    }
+});
+
+function render_price_change_indicator(original_standard, current_standard, original_agreement, current_agreement, currency) {
+    const standard_diff = current_standard - original_standard;
+    const standard_pct = original_standard > 0 ? standard_diff / original_standard * 100 : 0;
+    const agreement_diff = current_agreement - original_agreement;
+    const agreement_pct = original_agreement > 0 ? agreement_diff / original_agreement * 100 : 0;
+
+    // Değişiklik yoksa
+    if (Math.abs(standard_diff) < 0.01 && Math.abs(agreement_diff) < 0.01) {
+        return `<div style="padding: 10px; color: #28a745; font-weight: bold;">✅ ${__('Prices are up to date')}</div>`;
+    }
+
+    const get_color = (diff) => (Math.abs(diff) < 0.01 || diff < 0) ? '#28a745' : '#dc3545';
+    const signed = (v, digits) => (v >= 0 ? '+' : '') + v.toFixed(digits);
+    const row = (label, original, current, diff, pct, bg) => `
+        <tr${bg ? ` style="background-color: ${bg};"` : ''}>
+            <td style="padding: 5px;">${label}</td>
+            <td style="text-align: right; padding: 5px;">${original.toFixed(2)} ${currency}</td>
+            <td style="text-align: right; padding: 5px; font-weight: bold;">${current.toFixed(2)} ${currency}</td>
+            <td style="text-align: right; padding: 5px; color: ${get_color(diff)}; font-weight: bold;">
+                ${signed(diff, 2)} (${signed(pct, 1)}%)
+            </td>
+        </tr>`;
+
+    return `
+        <div style="padding: 10px; background-color: #f8f9fa; border-radius: 5px; border-left: 4px solid ${get_color(agreement_diff)};">
+            <table style="width: 100%; font-size: 12px; border-collapse: collapse;">
+                <thead>
+                    <tr style="border-bottom: 2px solid #dee2e6;">
+                        <th style="text-align: left; padding: 5px; font-weight: bold;">${__('Type')}</th>
+                        <th style="text-align: right; padding: 5px; font-weight: bold;">${__('Original')}</th>
+                        <th style="text-align: right; padding: 5px; font-weight: bold;">${__('Current')}</th>
+                        <th style="text-align: right; padding: 5px; font-weight: bold;">${__('Change')}</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    ${row(__('Standard Selling'), original_standard, current_standard, standard_diff, standard_pct)}
+                    ${row(__('Agreement Price'), original_agreement, current_agreement, agreement_diff, agreement_pct, '#ffffff')}
+                </tbody>
+            </table>
+        </div>`;
+}
+
+function load_supplier_items(frm, supplier) {
+    // Büyük kataloglar sayfa sayfa (keyset cursor) yüklenir - tek dev response yok
+    let loaded = 0;
+    const load_page = (currency, cursor) => {
+        frappe.call({
+            method: 'culinary_order_management.culinary_order_management.agreement.get_supplier_items_page',
+            args: {
+                supplier: supplier,
+                currency: currency,
+                after_item_name: cursor ? cursor.item_name : null,
+                after_item_code: cursor ? cursor.item_code : null,
+            },
+        }).then(r => {
+            // Bu arada tedarikçi değiştiyse eski yüklemeyi bırak
+            if (frm.doc.supplier !== supplier) return;
+            const page = r.message || { items: [], next_cursor: null };
+            page.items.forEach(row => {
+                const d = frm.add_child('agreement_items');
+                d.item_code = row.item_code;
+                d.item_name = row.item_name;
+                d.item_group = row.item_group;
+                d.kitchen_item = row.kitchen_item ? 1 : 0;
+                d.uom = row.uom;
+                d.standard_selling_rate = row.standard_selling_rate;
+                d.price_list_rate = row.price_list_rate;
+                d.currency = row.currency;
+            });
+            loaded += page.items.length;
+            // mevcut indirim oranını uygula (grid'i de yeniler)
+            apply_agreement_discount(frm);
+
+            if (page.next_cursor) {
+                frappe.show_alert({ message: __('{0} items loaded...', [loaded]), indicator: 'blue' }, 2);
+                load_page(page.currency, page.next_cursor);
+            } else if (loaded) {
+                frappe.show_alert({ message: __('{0} items loaded', [loaded]), indicator: 'green' });
+            }
+        });
+    };
+    load_page((frm.doc.agreement_items && frm.doc.agreement_items[0] && frm.doc.agreement_items[0].currency) || null, null);
+}
+
 function apply_agreement_discount(frm) {
     const discount = toFloat(frm.doc.discount_rate || 0);
     (frm.doc.agreement_items || []).forEach(d => {
@@ -281,3 +361,47 @@ function apply_agreement_discount(frm) {
     });
     frm.refresh_field('agreement_items');
 }
+
+function show_item_import_dialog(frm) {
+    const dialog = new frappe.ui.Dialog({
+        title: __('Import Agreement Items'),
+        fields: [
+            {
+                fieldname: 'file_url', fieldtype: 'Attach', label: __('CSV / XLSX File'), reqd: 1,
+                description: __('Columns: item_code, price_list_rate, currency (optional), standard_selling_rate (optional)')
+            },
+            { fieldname: 'replace_existing', fieldtype: 'Check', label: __('Replace Existing Items') },
+            { fieldname: 'fallback_to_standard', fieldtype: 'Check', label: __('Use Standard Selling Rate When Price Is Empty'), default: 1 },
+            { fieldname: 'result_html', fieldtype: 'HTML' }
+        ],
+        primary_action_label: __('Import'),
+        primary_action(values) {
+            const save_first = frm.is_dirty() ? frm.save() : Promise.resolve();
+            save_first.then(() => frappe.call({
+                method: 'culinary_order_management.culinary_order_management.agreement_item_import.import_agreement_items',
+                args: {
+                    agreement: frm.doc.name,
+                    file_url: values.file_url,
+                    replace_existing: values.replace_existing,
+                    fallback_to_standard: values.fallback_to_standard
+                },
+                freeze: true,
+                freeze_message: __('Importing items...')
+            })).then(r => {
+                const result = r.message || { imported: 0, error_count: 0, errors: [] };
+                const rows = result.errors.map(e =>
+                    `<tr><td>${e.row}</td><td>${e.item_code || ''}</td><td>${e.error}</td></tr>`
+                ).join('');
+                dialog.fields_dict.result_html.$wrapper.html(`
+                    <p>${__('{0} items imported, {1} rows with errors', [result.imported, result.error_count])}</p>
+                    ${rows ? `<div style="max-height: 300px; overflow: auto;"><table class="table table-bordered table-sm">
+                        <thead><tr><th>${__('Row')}</th><th>${__('Item Code')}</th><th>${__('Error')}</th></tr></thead>
+                        <tbody>${rows}</tbody></table></div>` : ''}`);
+                if (result.imported) {
+                    frm.reload_doc();
+                }
+            });
+        }
+    });
+    dialog.show();
+}
@@ -5,6 +5,12 @@ frappe.listview_settings['Agreement'] = {
 	has_indicator_for_draft: 1,
 	has_indicator_for_cancelled: 1,
 	
+	onload: function(listview) {
+		if (frappe.model.can_create("Agreement") && frappe.model.can_submit("Agreement")) {
+			listview.page.add_menu_item(__("Renew Expiring Agreements"), () => show_renewal_dialog());
+		}
+	},
+	
 	get_indicator: function(doc) {
 		// Tarih bazlı durum göstergesi - Frappe standart renkleri
 		const status_colors = {
@@ -39,3 +45,84 @@ frappe.listview_settings['Agreement'] = {
 		return [__("Active"), "green", "docstatus,=,1"];
 	}
 };
+
+const RENEWAL_METHOD = 'culinary_order_management.culinary_order_management.agreement_renewal';
+
+function show_renewal_dialog() {
+	const dialog = new frappe.ui.Dialog({
+		title: __('Renew Expiring Agreements'),
+		size: 'large',
+		fields: [
+			{ fieldname: 'within_days', fieldtype: 'Int', label: __('Expiring Within (Days)'), default: 30 },
+			{ fieldname: 'expired_days', fieldtype: 'Int', label: __('Include Expired In Last (Days)'), default: 0 },
+			{ fieldname: 'customer', fieldtype: 'Link', options: 'Customer', label: __('Customer') },
+			{ fieldname: 'supplier', fieldtype: 'Link', options: 'Supplier', label: __('Supplier') },
+			{ fieldtype: 'Column Break' },
+			{ fieldname: 'valid_from', fieldtype: 'Date', label: __('Valid From'),
+				description: __('Empty: day after the old agreement ends') },
+			{ fieldname: 'valid_to', fieldtype: 'Date', label: __('Valid To'),
+				description: __('Empty: same duration as the old agreement') },
+			{ fieldname: 'adjustment_pct', fieldtype: 'Float', label: __('Price Adjustment (%)'), default: 0 },
+			{ fieldname: 'use_standard_rates', fieldtype: 'Check', label: __('Use Current Standard Selling Rates') },
+			{ fieldname: 'submit', fieldtype: 'Check', label: __('Submit Renewed Agreements'), default: 1 },
+			{ fieldtype: 'Section Break' },
+			{ fieldname: 'agreements_html', fieldtype: 'HTML' }
+		],
+		primary_action_label: __('Renew'),
+		primary_action(values) {
+			const selected = dialog.fields_dict.agreements_html.$wrapper
+				.find('input.renewal-select:checked').map((i, el) => $(el).data('name')).get();
+			if (!selected.length) {
+				frappe.msgprint(__('Please select at least one agreement'));
+				return;
+			}
+			frappe.call({
+				method: `${RENEWAL_METHOD}.renew_agreements`,
+				args: {
+					agreements: selected,
+					valid_from: values.valid_from,
+					valid_to: values.valid_to,
+					adjustment_pct: values.adjustment_pct,
+					use_standard_rates: values.use_standard_rates,
+					submit: values.submit
+				}
+			}).then(r => {
+				dialog.hide();
+				frappe.show_alert({
+					message: __('{0} agreements queued for renewal', [r.message.agreements]),
+					indicator: 'green'
+				});
+			});
+		}
+	});
+	
+	const load = () => {
+		const values = dialog.get_values(true);
+		frappe.call({
+			method: `${RENEWAL_METHOD}.get_expiring_agreements`,
+			args: {
+				within_days: values.within_days,
+				expired_days: values.expired_days,
+				customer: values.customer,
+				supplier: values.supplier
+			}
+		}).then(r => {
+			const rows = (r.message || []).map(d => `<tr>
+				<td><input type="checkbox" class="renewal-select" data-name="${d.name}" checked></td>
+				<td>${d.name}</td><td>${d.customer}</td><td>${d.supplier}</td>
+				<td>${frappe.datetime.str_to_user(d.valid_to)}</td><td>${__(d.status || '')}</td>
+				<td class="text-right">${d.items}</td>
+			</tr>`).join('');
+			dialog.fields_dict.agreements_html.$wrapper.html(rows ? `<table class="table table-bordered table-sm">
+				<thead><tr><th></th><th>${__('Agreement')}</th><th>${__('Customer')}</th><th>${__('Supplier')}</th>
+				<th>${__('Valid To')}</th><th>${__('Status')}</th><th class="text-right">${__('Items')}</th></tr></thead>
+				<tbody>${rows}</tbody></table>` : `<p class="text-muted">${__('No expiring agreements found')}</p>`);
+		});
+	};
+	
+	['within_days', 'expired_days', 'customer', 'supplier'].forEach(f => {
+		dialog.fields_dict[f].df.onchange = load;
+	});
+	dialog.show();
+	load();
+}
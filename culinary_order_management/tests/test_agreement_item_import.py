@@ -0,0 +1,127 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Agreement Item toplu import'u: satır doğrulama, batch'ler arası mükerrer kontrolü,
+Standard Selling fallback'i ve mevcut satırların korunması / değiştirilmesi.
+"""
+
+import os
+import unittest
+from unittest.mock import patch
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management import agreement_item_import
+from culinary_order_management.culinary_order_management.agreement_item_import import (
+	_normalize_row,
+	_parse_rate,
+	import_agreement_items,
+)
+from culinary_order_management.tests.utils import TEST_CURRENCY, make_agreement, make_item, make_standard_price
+
+
+class TestImportParsing(unittest.TestCase):
+	def test_parse_rate(self):
+		self.assertEqual(_parse_rate("12,5"), 12.5)
+		self.assertEqual(_parse_rate("7"), 7.0)
+		self.assertIsNone(_parse_rate(""))
+		self.assertIs(_parse_rate("abc"), False)
+
+	def test_normalize_row(self):
+		row = _normalize_row({" Item Code ": " A ", "Price List Rate": 3.5, "Currency": None})
+		self.assertEqual(row, {"item_code": "A", "price_list_rate": "3.5", "currency": ""})
+
+
+class TestAgreementItemImport(FrappeTestCase):
+	def setUp(self):
+		self.items = [make_item() for _i in range(4)]
+		self.agreement = make_agreement({self.items[0]: 10}, discount_rate=10, submit=False)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def _upload(self, lines: list) -> str:
+		file_doc = frappe.get_doc({
+			"doctype": "File",
+			"file_name": f"agreement_items_{frappe.generate_hash(length=8)}.csv",
+			"is_private": 1,
+			"content": "\n".join(["item_code,price_list_rate,currency", *lines]) + "\n",
+		}).insert(ignore_permissions=True)
+		path = file_doc.get_full_path()
+		self.addCleanup(lambda: os.path.exists(path) and os.remove(path))
+		return file_doc.file_url
+
+	def _agreement_items(self) -> list:
+		return frappe.get_all(
+			"Agreement Item",
+			filters={"parent": self.agreement.name, "parenttype": "Agreement"},
+			fields=["idx", "item_code", "price_list_rate", "standard_selling_rate"],
+			order_by="idx",
+		)
+
+	def test_valid_rows_are_appended_and_errors_reported(self):
+		make_standard_price(self.items[2], 50)
+		file_url = self._upload([
+			f"{self.items[0]},11,{TEST_CURRENCY}",
+			f"{self.items[1]},\"12,5\",{TEST_CURRENCY}",
+			f"{self.items[2]},,{TEST_CURRENCY}",
+			f"_Test Unknown Item,5,{TEST_CURRENCY}",
+			f"{self.items[3]},abc,{TEST_CURRENCY}",
+			f"{self.items[1]},13,{TEST_CURRENCY}",
+			f"{self.items[3]},5,XXX",
+		])
+
+		result = import_agreement_items(self.agreement.name, file_url)
+
+		self.assertEqual(result["imported"], 2)
+		self.assertEqual(
+			[(e["row"], e["error"]) for e in result["errors"]],
+			[
+				(2, "Duplicate item"),
+				(5, "Item not found"),
+				(6, "Invalid price"),
+				(7, "Duplicate item"),
+				(8, "Invalid currency XXX"),
+			],
+		)
+		rows = self._agreement_items()
+		self.assertEqual([(r.idx, r.item_code) for r in rows], [(1, self.items[0]), (2, self.items[1]), (3, self.items[2])])
+		self.assertEqual(rows[1].price_list_rate, 12.5)
+		# Boş fiyat: Standard Selling - %10 indirim
+		self.assertEqual((rows[2].price_list_rate, rows[2].standard_selling_rate), (45, 50))
+
+	def test_duplicates_are_detected_across_batches(self):
+		file_url = self._upload([
+			f"{self.items[1]},1,{TEST_CURRENCY}",
+			f"{self.items[2]},2,{TEST_CURRENCY}",
+			f"{self.items[1]},3,{TEST_CURRENCY}",
+		])
+
+		with patch.object(agreement_item_import, "IMPORT_BATCH_SIZE", 2):
+			result = import_agreement_items(self.agreement.name, file_url)
+
+		self.assertEqual(result["imported"], 2)
+		self.assertEqual([(e["row"], e["error"]) for e in result["errors"]], [(4, "Duplicate item")])
+
+	def test_replace_existing(self):
+		file_url = self._upload([f"{self.items[0]},20,{TEST_CURRENCY}", f"{self.items[1]},30,{TEST_CURRENCY}"])
+
+		result = import_agreement_items(self.agreement.name, file_url, replace_existing=1)
+
+		self.assertEqual(result, {"imported": 2, "error_count": 0, "errors": []})
+		self.assertEqual(
+			[(r.idx, r.item_code, r.price_list_rate) for r in self._agreement_items()],
+			[(1, self.items[0], 20), (2, self.items[1], 30)],
+		)
+
+	def test_submitted_agreement_is_rejected(self):
+		self.agreement.submit()
+		file_url = self._upload([f"{self.items[1]},1,"])
+
+		with self.assertRaises(frappe.ValidationError):
+			import_agreement_items(self.agreement.name, file_url)
@@ -0,0 +1,63 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Aktif agreement item index'i: tembel kurulum, commit sonrası güncelleme ve
+anlaşma dışı item'lar için Item Price hook'unun kuyruğa yazmaması.
+"""
+
+import unittest
+from unittest.mock import patch
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management import agreement_item_index as index
+from culinary_order_management.culinary_order_management.agreement import sync_agreement_prices_on_standard_change
+from culinary_order_management.tests.utils import make_agreement, make_item
+
+
+class TestAgreementItemIndex(FrappeTestCase):
+	def setUp(self):
+		index._invalidate()
+		self.item = make_item()
+		self.outside_item = make_item()
+		self.agreement = make_agreement({self.item: 10})
+
+	def tearDown(self):
+		frappe.db.rollback()
+		index._invalidate()
+
+	def test_index_is_built_lazily_from_active_agreements(self):
+		self.assertTrue(index.is_agreement_item(self.item))
+		self.assertFalse(index.is_agreement_item(self.outside_item))
+		self.assertTrue(frappe.cache().get_value(index.AGREEMENT_ITEM_INDEX_BUILT_KEY))
+
+	def test_activation_adds_items_after_commit(self):
+		index.rebuild_agreement_item_index()
+		new_item = make_item()
+		make_agreement({new_item: 10})
+		self.assertFalse(frappe.cache().sismember(index.AGREEMENT_ITEM_INDEX_KEY, new_item))
+
+		frappe.db.after_commit.run()
+		self.assertTrue(index.is_agreement_item(new_item))
+
+	def test_cancel_invalidates_index(self):
+		index.rebuild_agreement_item_index()
+		self.agreement.cancel()
+		frappe.db.after_commit.run()
+
+		self.assertFalse(frappe.cache().get_value(index.AGREEMENT_ITEM_INDEX_BUILT_KEY))
+		self.assertFalse(index.is_agreement_item(self.item))
+
+	def test_hook_skips_items_outside_agreements(self):
+		target = "culinary_order_management.culinary_order_management.reprice_queue.enqueue_item_reprice"
+		with patch(target) as enqueue:
+			for item_code in (self.item, self.outside_item):
+				doc = frappe._dict(price_list="Standard Selling", item_code=item_code)
+				sync_agreement_prices_on_standard_change(doc, "after_insert")
+
+		enqueue.assert_called_once_with(self.item)
@@ -0,0 +1,65 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Agreement onload: güncel Standard/Agreement fiyatlarının toplu okunması ve
+fiyat göstergelerinin kompakt veri olarak gönderilmesi.
+"""
+
+import unittest
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management.agreement import (
+	_get_standard_selling_rates,
+	_reprice_agreement_items,
+)
+from culinary_order_management.tests.utils import (
+	TEST_CURRENCY,
+	make_agreement,
+	make_item,
+	make_standard_price,
+)
+
+
+class TestAgreementOnload(FrappeTestCase):
+	def setUp(self):
+		self.items = [make_item(), make_item()]
+		for item_code in self.items:
+			make_standard_price(item_code, 100)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_standard_rates_are_fetched_in_one_call(self):
+		rates = _get_standard_selling_rates(self.items, {TEST_CURRENCY})
+		self.assertEqual(rates, {(self.items[0], TEST_CURRENCY): 100, (self.items[1], TEST_CURRENCY): 100})
+
+	def test_onload_sets_current_rates_and_indicators(self):
+		agreement = make_agreement({self.items[0]: 100, self.items[1]: 100}, discount_rate=10)
+		_reprice_agreement_items({self.items[0]: {TEST_CURRENCY: 120}})
+
+		doc = frappe.get_doc("Agreement", agreement.name)
+		doc.run_method("onload")
+
+		rows = {row.item_code: row for row in doc.agreement_items}
+		self.assertEqual(rows[self.items[0]].current_agreement_rate, 108)
+		self.assertEqual(rows[self.items[1]].current_agreement_rate, 100)
+		self.assertEqual(rows[self.items[0]].current_standard_rate, 100)
+
+		indicators = doc.get_onload().price_indicators
+		self.assertEqual(indicators[rows[self.items[0]].name], [100, 100, 100, 108, TEST_CURRENCY])
+		self.assertEqual(doc.get_onload().price_history_count, 0)
+
+	def test_draft_onload_skips_price_lookups(self):
+		agreement = make_agreement({self.items[0]: 100}, submit=False)
+
+		doc = frappe.get_doc("Agreement", agreement.name)
+		doc.run_method("onload")
+
+		self.assertIsNone(doc.get_onload().get("price_indicators"))
+		self.assertIsNone(doc.get_onload().get("price_history_count"))
@@ -0,0 +1,119 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Toplu yenileme: halef tarihleri, fiyat ayarı / Standard Selling'den yeniden
+hesaplama ve chunk job'unun halefleri oluşturup fiyatlarını toplu yazması.
+"""
+
+import unittest
+from unittest.mock import patch
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+	from frappe.utils import add_days, getdate, nowdate
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management.agreement_renewal import (
+	_renewal_dates,
+	apply_renewal_rates,
+	get_expiring_agreements,
+	run_renewal_chunk,
+)
+from culinary_order_management.tests.utils import (
+	TEST_CURRENCY,
+	get_agreement_item_prices,
+	make_agreement,
+	make_item,
+	make_standard_price,
+)
+
+
+def _doc(discount_rate=0, **rates):
+	return frappe._dict(
+		discount_rate=discount_rate,
+		agreement_items=[
+			frappe._dict(item_code=item_code, price_list_rate=rate, currency=TEST_CURRENCY)
+			for item_code, rate in rates.items()
+		],
+	)
+
+
+class TestRenewalRates(unittest.TestCase):
+	def test_dates_continue_after_old_agreement(self):
+		old = frappe._dict(valid_from="2024-03-01", valid_to="2024-03-31")
+
+		# Aynı süre (31 gün) kadar geçerli
+		self.assertEqual(_renewal_dates(old), (getdate("2024-04-01"), getdate("2024-05-01")))
+		self.assertEqual(
+			_renewal_dates(old, valid_from="2025-02-01", valid_to="2025-06-30"),
+			(getdate("2025-02-01"), getdate("2025-06-30")),
+		)
+
+	def test_adjustment_is_applied_to_all_items(self):
+		docs = [_doc(A=10, B=3.33), _doc(C=100)]
+
+		apply_renewal_rates(docs, adjustment_pct=3.5)
+
+		self.assertEqual([item.price_list_rate for item in docs[0].agreement_items], [10.35, 3.45])
+		self.assertEqual(docs[1].agreement_items[0].price_list_rate, 103.5)
+
+	def test_no_adjustment_keeps_rates(self):
+		docs = [_doc(A=10)]
+		apply_renewal_rates(docs)
+		self.assertEqual(docs[0].agreement_items[0].price_list_rate, 10)
+
+
+class TestAgreementRenewal(FrappeTestCase):
+	def setUp(self):
+		self.today = getdate(nowdate())
+		self.items = [make_item(), make_item()]
+		# Commit'ler uygulanmaz - test verisi tearDown'da geri alınır
+		patcher = patch.object(frappe.db, "commit")
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_standard_rates_with_discount(self):
+		make_standard_price(self.items[0], 200)
+		docs = [_doc(discount_rate=10, **{self.items[0]: 100, self.items[1]: 50})]
+
+		apply_renewal_rates(docs, use_standard_rates=True)
+
+		first, second = docs[0].agreement_items
+		self.assertEqual((first.price_list_rate, first.standard_selling_rate), (180, 200))
+		# Standard fiyatı olmayan item mevcut fiyatını korur
+		self.assertEqual(second.price_list_rate, 50)
+
+	def test_chunk_creates_successors_and_syncs_prices(self):
+		expired = make_agreement(
+			{self.items[0]: 10, self.items[1]: 20},
+			valid_from=add_days(self.today, -30),
+			valid_to=add_days(self.today, -1),
+		)
+		self.assertIn(expired.name, [a.name for a in get_expiring_agreements(within_days=0, expired_days=5)])
+
+		result = run_renewal_chunk([expired.name], adjustment_pct=10)
+
+		self.assertEqual(result["failed"], [])
+		self.assertEqual(len(result["created"]), 1)
+		successor = frappe.get_doc("Agreement", result["created"][0][1])
+		self.assertEqual((successor.renewal_of, successor.docstatus, successor.status), (expired.name, 1, "Active"))
+		self.assertEqual((successor.valid_from, successor.valid_to), (self.today, add_days(self.today, 29)))
+		self.assertEqual(get_agreement_item_prices(successor.name), {self.items[0]: 11, self.items[1]: 22})
+		# Yenilenen agreement artık listelenmez
+		self.assertNotIn(expired.name, [a.name for a in get_expiring_agreements(within_days=0, expired_days=5)])
+
+	def test_failed_agreement_does_not_stop_chunk(self):
+		draft = make_agreement({self.items[0]: 10}, submit=False)
+		active = make_agreement({self.items[1]: 20})
+
+		result = run_renewal_chunk([draft.name, active.name], submit=0)
+
+		self.assertEqual([name for name, _error in result["failed"]], [draft.name])
+		self.assertEqual([old for old, _new in result["created"]], [active.name])
+		self.assertEqual(frappe.db.get_value("Agreement", result["created"][0][1], "docstatus"), 0)
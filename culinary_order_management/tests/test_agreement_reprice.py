@@ -0,0 +1,85 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Standard Selling değişikliklerinin aktif agreement'lara set-based uygulanması
+(_reprice_agreement_items).
+"""
+
+import unittest
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management.agreement import _reprice_agreement_items
+from culinary_order_management.tests.utils import (
+	TEST_CURRENCY,
+	get_agreement_item_prices,
+	make_agreement,
+	make_item,
+)
+
+
+class TestRepriceAgreementItems(FrappeTestCase):
+	def setUp(self):
+		self.item = make_item()
+		self.other_item = make_item()
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_applies_discount_to_all_active_agreements(self):
+		plain = make_agreement({self.item: 100, self.other_item: 50})
+		discounted = make_agreement({self.item: 100}, discount_rate=10)
+
+		result = _reprice_agreement_items({self.item: {TEST_CURRENCY: 200}})
+
+		self.assertEqual(result["updated"], 2)
+		self.assertEqual(result["agreements"], 2)
+		self.assertEqual(result["missing"], [])
+		self.assertEqual(get_agreement_item_prices(plain.name), {self.item: 200, self.other_item: 50})
+		self.assertEqual(get_agreement_item_prices(discounted.name), {self.item: 180})
+
+	def test_history_rows_are_buffered_until_commit(self):
+		agreement = make_agreement({self.item: 100})
+
+		result = _reprice_agreement_items({self.item: {TEST_CURRENCY: 120}}, source="Manual")
+
+		self.assertEqual(len(result["changes"]), 1)
+		change = result["changes"][0]
+		self.assertEqual(change["agreement_name"], agreement.name)
+		self.assertEqual((change["old_price"], change["new_price"]), (100, 120))
+		self.assertEqual(change["source"], "Manual")
+		self.assertIn(change, frappe.local.agreement_price_history_buffer)
+		self.assertFalse(frappe.db.exists("Agreement Item Price History", {"agreement": agreement.name}))
+
+	def test_unchanged_rates_and_other_currencies_are_skipped(self):
+		agreement = make_agreement({self.item: 100})
+
+		unchanged = _reprice_agreement_items({self.item: {TEST_CURRENCY: 100.001}})
+		other_currency = _reprice_agreement_items({self.item: {"USD": 300}})
+
+		self.assertEqual(unchanged["updated"], 0)
+		self.assertEqual(other_currency["updated"], 0)
+		self.assertEqual(get_agreement_item_prices(agreement.name), {self.item: 100})
+
+	def test_cancelled_agreements_are_not_repriced(self):
+		agreement = make_agreement({self.item: 100})
+		agreement.cancel()
+
+		result = _reprice_agreement_items({self.item: {TEST_CURRENCY: 200}})
+
+		self.assertEqual(result["updated"], 0)
+		self.assertEqual(result["agreements"], 0)
+
+	def test_missing_item_price_is_reported(self):
+		agreement = make_agreement({self.item: 100})
+		frappe.db.delete("Item Price", {"agreement": agreement.name})
+
+		result = _reprice_agreement_items({self.item: {TEST_CURRENCY: 200}})
+
+		self.assertEqual(result["updated"], 0)
+		self.assertEqual(result["missing"], [(agreement.name, self.item, TEST_CURRENCY)])
@@ -0,0 +1,106 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Agreement aktivasyon/bitiş zamanlama kuyruğu: kuyruk kayıtları, vadesi gelenlerin
+job'lara dağıtılması ve başarısız kayıtların sınırlı sayıda tekrar denenmesi.
+"""
+
+import unittest
+from unittest.mock import patch
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+	from frappe.utils import add_days, getdate, nowdate
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management import agreement_schedule as schedule
+
+
+def _queued() -> dict:
+	members = frappe.cache().zrangebyscore(schedule._queue_key(), "-inf", "+inf", withscores=True) or []
+	return {(m.decode() if isinstance(m, bytes) else m): int(score) for m, score in members}
+
+
+class TestDueQueueEntries(unittest.TestCase):
+	def test_not_started_gets_activation_and_expiry(self):
+		entries = schedule._get_entries("AGR-1", "Not Started", "2024-03-01", "2024-03-31")
+		self.assertEqual(entries, {"AGR-1|activate": 20240301, "AGR-1|expire": 20240401})
+
+	def test_active_gets_only_expiry(self):
+		entries = schedule._get_entries("AGR-1", "Active", "2024-03-01", "2024-12-31")
+		self.assertEqual(entries, {"AGR-1|expire": 20250101})
+
+	def test_closed_agreements_are_not_queued(self):
+		self.assertEqual(schedule._get_entries("AGR-1", "Expired", "2024-03-01", "2024-03-31"), {})
+		self.assertEqual(schedule._get_entries("AGR-1", "Cancelled", "2024-03-01", "2024-03-31"), {})
+
+
+class TestProcessDueAgreements(FrappeTestCase):
+	def setUp(self):
+		self._clear()
+		# Boş kuyruk DB'den yeniden kurulmasın
+		frappe.cache().set_value(schedule.DUE_QUEUE_BUILT_KEY, 1)
+		self.today = schedule._day_score(nowdate())
+
+	def tearDown(self):
+		self._clear()
+
+	def _clear(self):
+		frappe.cache().delete_value(schedule.DUE_QUEUE_KEY)
+		frappe.cache().delete_value(schedule.DUE_QUEUE_BUILT_KEY)
+		frappe.cache().delete_value(schedule.DUE_ATTEMPTS_KEY)
+
+	def test_only_due_entries_are_enqueued(self):
+		tomorrow = schedule._day_score(add_days(getdate(nowdate()), 1))
+		schedule._add_entries({"AGR-1|activate": self.today, "AGR-2|expire": self.today, "AGR-3|expire": tomorrow})
+
+		with patch("frappe.enqueue") as enqueue:
+			stats = schedule.process_due_agreements()
+
+		self.assertEqual(stats, {schedule.ACTIVATE: 1, schedule.EXPIRE: 1})
+		self.assertEqual(
+			{(c.kwargs["agreement_name"], c.kwargs["action"], c.kwargs["queue"]) for c in enqueue.call_args_list},
+			{("AGR-1", "activate", "default"), ("AGR-2", "expire", "long")},
+		)
+		self.assertEqual(_queued(), {"AGR-3|expire": tomorrow})
+
+	def test_failed_enqueue_is_requeued(self):
+		schedule._add_entries({"AGR-1|activate": self.today})
+
+		with patch("frappe.enqueue", side_effect=RuntimeError("redis down")):
+			stats = schedule.process_due_agreements()
+
+		self.assertEqual(stats, {schedule.ACTIVATE: 0, schedule.EXPIRE: 0})
+		self.assertEqual(_queued(), {"AGR-1|activate": self.today})
+
+	def test_requeue_gives_up_after_max_attempts(self):
+		for _i in range(schedule.MAX_TRANSITION_ATTEMPTS):
+			self.assertTrue(schedule._requeue_entry("AGR-1", schedule.EXPIRE))
+		frappe.cache().delete_value(schedule.DUE_QUEUE_KEY)
+
+		self.assertFalse(schedule._requeue_entry("AGR-1", schedule.EXPIRE))
+		self.assertEqual(_queued(), {})
+		# Sayaç sıfırlandı - sonraki başarısızlık yeniden denenir
+		self.assertTrue(schedule._requeue_entry("AGR-1", schedule.EXPIRE))
+
+	def test_failed_transition_is_requeued(self):
+		with (
+			patch.object(frappe.db, "exists", return_value=True),
+			patch("frappe.get_doc") as get_doc,
+			patch(
+				"culinary_order_management.culinary_order_management.doctype.agreement.agreement.apply_status_transition",
+				side_effect=RuntimeError("lock wait timeout"),
+			),
+		):
+			doc = get_doc.return_value
+			doc.docstatus = 1
+			doc.status = "Active"
+			doc.update_status.side_effect = lambda: setattr(doc, "status", "Expired")
+
+			with self.assertRaises(RuntimeError):
+				schedule.run_status_transition("AGR-1", schedule.EXPIRE)
+
+		self.assertEqual(_queued(), {"AGR-1|expire": self.today})
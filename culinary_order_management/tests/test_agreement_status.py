@@ -0,0 +1,90 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Günlük status geçişleri: SQL ile geçişlerin bulunması, geçişin uygulanması ve
+müşteri Price List'lerinin tek seferde aktive/deaktive edilmesi.
+"""
+
+import unittest
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+	from frappe.utils import add_days, getdate, nowdate
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management.doctype.agreement.agreement import (
+	_get_status_transitions,
+	_refresh_customer_price_lists,
+	apply_status_transition,
+)
+from culinary_order_management.tests.utils import get_agreement_item_prices, make_agreement, make_item
+
+
+class TestAgreementStatusTransitions(FrappeTestCase):
+	def setUp(self):
+		self.item = make_item()
+		self.today = getdate(nowdate())
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def _transitions(self, today) -> dict:
+		return {row.name: row.new_status for row in _get_status_transitions(today)}
+
+	def test_transitions_follow_update_status_rules(self):
+		upcoming = make_agreement(
+			{self.item: 10}, valid_from=add_days(self.today, 5), valid_to=add_days(self.today, 20)
+		)
+		active = make_agreement({self.item: 10})
+		self.assertEqual(upcoming.status, "Not Started")
+		self.assertEqual(active.status, "Active")
+
+		today = self._transitions(self.today)
+		self.assertNotIn(upcoming.name, today)
+		self.assertNotIn(active.name, today)
+
+		starts = self._transitions(add_days(self.today, 5))
+		self.assertEqual(starts.get(upcoming.name), "Active")
+		self.assertNotIn(active.name, starts)
+
+		ends = self._transitions(add_days(self.today, 31))
+		self.assertEqual(ends.get(active.name), "Expired")
+		self.assertEqual(ends.get(upcoming.name), "Expired")
+
+	def test_expired_but_submitted_agreement_is_returned(self):
+		expired = make_agreement(
+			{self.item: 10}, valid_from=add_days(self.today, -30), valid_to=add_days(self.today, -1)
+		)
+		self.assertEqual(expired.status, "Expired")
+		self.assertEqual(self._transitions(self.today).get(expired.name), "Expired")
+
+	def test_activation_creates_prices_and_enables_price_list(self):
+		agreement = make_agreement(
+			{self.item: 10}, valid_from=add_days(self.today, 1), valid_to=add_days(self.today, 20)
+		)
+		self.assertEqual(get_agreement_item_prices(agreement.name), {})
+
+		result = apply_status_transition(agreement, "Active")
+		_refresh_customer_price_lists({agreement.customer})
+
+		self.assertEqual(result, {"updated": True, "cancelled": False})
+		self.assertEqual(frappe.db.get_value("Agreement", agreement.name, "status"), "Active")
+		self.assertEqual(get_agreement_item_prices(agreement.name), {self.item: 10})
+		self.assertEqual(frappe.db.get_value("Price List", agreement.customer, "enabled"), 1)
+
+	def test_expiry_cancels_and_disables_price_list(self):
+		agreement = make_agreement({self.item: 10})
+
+		result = apply_status_transition(agreement, "Expired")
+		_refresh_customer_price_lists({agreement.customer})
+
+		self.assertEqual(result, {"updated": True, "cancelled": True})
+		self.assertEqual(
+			frappe.db.get_value("Agreement", agreement.name, ["docstatus", "status"]), (2, "Expired")
+		)
+		self.assertEqual(get_agreement_item_prices(agreement.name), {})
+		self.assertEqual(frappe.db.get_value("Price List", agreement.customer, "enabled"), 0)
+		self.assertEqual(frappe.get_cached_value("Price List", agreement.customer, "enabled"), 0)
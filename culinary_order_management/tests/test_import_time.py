@@ -0,0 +1,50 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+App paketi her gunicorn/RQ worker'ında import edilir. Import ucuz kalmalı:
+DATEV patch'i tembel uygulanır, PDF bağımlılıkları ilk kullanımda yüklenir.
+"""
+
+import json
+import subprocess
+import sys
+import unittest
+
+# Paketin kendi (kümülatif) import süresi için üst sınır, mikrosaniye
+IMPORT_BUDGET_US = 50_000
+HEAVY_MODULES = ("erpnext_datev", "frappe.utils.pdf")
+
+_PROBE = """
+import json, sys
+import culinary_order_management
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps(heavy))
+"""
+
+
+class TestImportTime(unittest.TestCase):
+	def _run(self, *args):
+		return subprocess.run(
+			[sys.executable, *args],
+			capture_output=True,
+			text=True,
+			check=True,
+		)
+
+	def test_import_stays_within_budget(self):
+		result = self._run("-X", "importtime", "-c", "import culinary_order_management")
+
+		# Satır formatı: "import time: self [us] | cumulative | imported package"
+		cumulative = None
+		for line in result.stderr.splitlines():
+			parts = [part.strip() for part in line.split("|")]
+			if len(parts) == 3 and parts[2] == "culinary_order_management":
+				cumulative = int(parts[1])
+
+		self.assertIsNotNone(cumulative, result.stderr)
+		self.assertLess(cumulative, IMPORT_BUDGET_US)
+
+	def test_import_does_not_load_heavy_modules(self):
+		result = self._run("-c", _PROBE.format(heavy=HEAVY_MODULES))
+		self.assertEqual(json.loads(result.stdout.strip().splitlines()[-1]), [])
@@ -0,0 +1,64 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Agreement Item Price satırlarının indexli Item Price.agreement alanı ile bulunması
+ve eski note referanslarından doldurulması (backfill patch).
+"""
+
+import unittest
+from unittest.mock import patch
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management.agreement import _find_existing_item_price
+from culinary_order_management.patches.v0_1 import backfill_item_price_agreement
+from culinary_order_management.tests.utils import TEST_CURRENCY, make_agreement, make_customer, make_item
+
+
+class TestItemPriceAgreementLink(FrappeTestCase):
+	def setUp(self):
+		self.item = make_item()
+		self.customer = make_customer()
+		# Aynı müşteri, farklı tedarikçiler: aynı price list'te aynı item için iki satır
+		self.first = make_agreement({self.item: 100}, customer=self.customer)
+		self.second = make_agreement({self.item: 80}, customer=self.customer)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def _item_price(self, agreement_name: str) -> str:
+		return frappe.db.get_value("Item Price", {"agreement": agreement_name}, "name")
+
+	def test_sync_writes_agreement_link(self):
+		for agreement in (self.first, self.second):
+			row = frappe.db.get_value(
+				"Item Price", {"agreement": agreement.name}, ["price_list", "item_code", "note"], as_dict=True
+			)
+			self.assertEqual((row.price_list, row.item_code, row.note), (self.customer, self.item, agreement.name))
+
+	def test_find_existing_matches_only_the_given_agreement(self):
+		found = _find_existing_item_price(self.customer, self.item, TEST_CURRENCY, None, None, self.first.name)
+		self.assertEqual(found, [self._item_price(self.first.name)])
+
+		all_rows = _find_existing_item_price(self.customer, self.item, TEST_CURRENCY, None, None)
+		self.assertEqual(set(all_rows), {self._item_price(self.first.name), self._item_price(self.second.name)})
+
+	def test_backfill_uses_exact_and_legacy_note_references(self):
+		exact = self._item_price(self.first.name)
+		legacy = self._item_price(self.second.name)
+		frappe.db.set_value("Item Price", exact, "agreement", None, update_modified=False)
+		frappe.db.set_value(
+			"Item Price", legacy, {"agreement": None, "note": f"Agreement: {self.second.name}"}, update_modified=False
+		)
+
+		# Alan ve index kurulu; DDL (örtük commit) test transaction'ını bozmasın
+		with patch.object(backfill_item_price_agreement, "ensure_item_price_agreement_field"):
+			backfill_item_price_agreement.execute()
+
+		self.assertEqual(frappe.db.get_value("Item Price", exact, "agreement"), self.first.name)
+		self.assertEqual(frappe.db.get_value("Item Price", legacy, "agreement"), self.second.name)
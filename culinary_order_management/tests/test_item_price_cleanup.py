@@ -0,0 +1,51 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Agreement iptalinde Item Price satırlarının tek indexli DELETE ile silinmesi.
+"""
+
+import unittest
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management.agreement import (
+	_bulk_delete_agreement_item_prices,
+	cleanup_item_prices,
+)
+from culinary_order_management.tests.utils import get_agreement_item_prices, make_agreement, make_item
+
+
+class TestItemPriceCleanup(FrappeTestCase):
+	def setUp(self):
+		self.items = [make_item(), make_item()]
+		self.agreement = make_agreement({self.items[0]: 10, self.items[1]: 20})
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_cancel_deletes_only_own_item_prices(self):
+		other = make_agreement({self.items[0]: 15})
+
+		self.agreement.cancel()
+
+		self.assertEqual(get_agreement_item_prices(self.agreement.name), {})
+		self.assertEqual(get_agreement_item_prices(other.name), {self.items[0]: 15})
+
+	def test_bulk_delete_returns_deleted_count(self):
+		self.assertEqual(_bulk_delete_agreement_item_prices(self.agreement.name), 2)
+		self.assertEqual(_bulk_delete_agreement_item_prices(self.agreement.name), 0)
+
+	def test_skip_flag_keeps_item_prices(self):
+		self.agreement.flags.skip_price_cleanup = True
+		cleanup_item_prices(self.agreement, "on_cancel")
+		self.assertEqual(len(get_agreement_item_prices(self.agreement.name)), 2)
+
+	def test_orm_cleanup_opt_in(self):
+		self.agreement.flags.orm_price_cleanup = True
+		cleanup_item_prices(self.agreement, "on_cancel")
+		self.assertEqual(get_agreement_item_prices(self.agreement.name), {})
@@ -0,0 +1,127 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Agreement Item Price senkronizasyonu: mevcut satırlarla fark planı
+(_plan_item_price_sync) ve sadece farkların toplu uygulanması.
+"""
+
+import unittest
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+	from frappe.utils import getdate
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management.agreement import (
+	_apply_item_price_plan,
+	_load_agreement_item_prices,
+	_plan_item_price_sync,
+	sync_item_prices_batch,
+)
+from culinary_order_management.tests.utils import (
+	TEST_CURRENCY,
+	get_agreement_item_prices,
+	make_agreement,
+	make_item,
+)
+
+VALID_FROM = getdate("2024-01-01")
+VALID_TO = getdate("2024-12-31")
+
+
+def _doc():
+	return frappe._dict(name="AGR-1", customer="Customer A", valid_from=VALID_FROM, valid_to=VALID_TO)
+
+
+def _row(name, item_code, rate, price_list="Customer A", valid_from=VALID_FROM, valid_upto=VALID_TO):
+	return frappe._dict(
+		name=name,
+		price_list=price_list,
+		item_code=item_code,
+		currency=TEST_CURRENCY,
+		price_list_rate=rate,
+		valid_from=valid_from,
+		valid_upto=valid_upto,
+	)
+
+
+class TestPlanItemPriceSync(unittest.TestCase):
+	def test_unchanged_rows_produce_empty_plan(self):
+		plan = _plan_item_price_sync(_doc(), {("A", TEST_CURRENCY): 10.0}, [_row("IP-1", "A", 10.001)])
+		self.assertEqual(plan, {"insert": [], "rates": {}, "dates": {}, "delete": []})
+
+	def test_diff_inserts_updates_redates_and_deletes(self):
+		desired = {("A", TEST_CURRENCY): 12.0, ("B", TEST_CURRENCY): 5.0, ("C", TEST_CURRENCY): 7.0}
+		existing = [
+			_row("IP-A", "A", 10),
+			_row("IP-B", "B", 5, valid_upto=getdate("2024-06-30")),
+			_row("IP-B2", "B", 5),
+			_row("IP-X", "X", 3),
+			_row("IP-C-OLD", "C", 7, price_list="Old Customer"),
+		]
+
+		plan = _plan_item_price_sync(_doc(), desired, existing)
+
+		self.assertEqual(plan["rates"], {"IP-A": 12.0})
+		self.assertEqual(plan["dates"], {(VALID_FROM, VALID_TO): ["IP-B"]})
+		# Kaldırılan item, fazladan satır ve farklı price list'teki satır silinir
+		self.assertEqual(plan["delete"], ["IP-B2", "IP-X", "IP-C-OLD"])
+		self.assertEqual(len(plan["insert"]), 1)
+		self.assertEqual(
+			plan["insert"][0],
+			{
+				"item_code": "C",
+				"price_list": "Customer A",
+				"currency": TEST_CURRENCY,
+				"price_list_rate": 7.0,
+				"valid_from": VALID_FROM,
+				"valid_upto": VALID_TO,
+				"agreement": "AGR-1",
+				"customer": "Customer A",
+			},
+		)
+
+
+class TestSyncItemPrices(FrappeTestCase):
+	def setUp(self):
+		self.items = [make_item() for _i in range(3)]
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_submit_inserts_one_row_per_item(self):
+		agreement = make_agreement({self.items[0]: 10, self.items[1]: 20})
+		self.assertEqual(get_agreement_item_prices(agreement.name), {self.items[0]: 10, self.items[1]: 20})
+
+	def test_update_applies_only_differences(self):
+		agreement = make_agreement({self.items[0]: 10, self.items[1]: 20})
+		untouched = frappe.db.get_value("Item Price", {"agreement": agreement.name, "item_code": self.items[0]}, "modified")
+
+		agreement.agreement_items = [row for row in agreement.agreement_items if row.item_code != self.items[1]]
+		agreement.append("agreement_items", {"item_code": self.items[2], "price_list_rate": 30, "currency": TEST_CURRENCY})
+		desired = {(self.items[0], TEST_CURRENCY): 10.0, (self.items[2], TEST_CURRENCY): 30.0}
+		plan = _plan_item_price_sync(agreement, desired, _load_agreement_item_prices([agreement.name])[agreement.name])
+		counts = _apply_item_price_plan(plan)
+
+		self.assertEqual(counts, {"inserted": 1, "updated": 0, "redated": 0, "deleted": 1})
+		self.assertEqual(get_agreement_item_prices(agreement.name), {self.items[0]: 10, self.items[2]: 30})
+		self.assertEqual(
+			frappe.db.get_value("Item Price", {"agreement": agreement.name, "item_code": self.items[0]}, "modified"),
+			untouched,
+		)
+
+	def test_batch_sync_merges_plans(self):
+		first = make_agreement({self.items[0]: 10})
+		second = make_agreement({self.items[1]: 20})
+		first.agreement_items[0].price_list_rate = 11
+		second.agreement_items[0].price_list_rate = 22
+
+		counts = sync_item_prices_batch([first, second])
+
+		self.assertEqual((counts["inserted"], counts["updated"], counts["deleted"]), (0, 2, 0))
+		self.assertEqual(counts["failed_items"], {})
+		self.assertEqual(get_agreement_item_prices(first.name), {self.items[0]: 11})
+		self.assertEqual(get_agreement_item_prices(second.name), {self.items[1]: 22})
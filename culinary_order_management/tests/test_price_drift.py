@@ -0,0 +1,71 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Agreement Price Drift: orijinal ve güncel fiyatlar arasındaki sapma, cache ve
+Item Price değişikliklerinde cache'in geçersiz kılınması.
+"""
+
+import unittest
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management.agreement import _reprice_agreement_items
+from culinary_order_management.culinary_order_management.price_drift import (
+	PRICE_DRIFT_CACHE_KEY,
+	get_price_drift,
+	invalidate_price_drift_cache,
+)
+from culinary_order_management.tests.utils import (
+	TEST_CURRENCY,
+	make_agreement,
+	make_item,
+	make_standard_price,
+)
+
+
+class TestPriceDrift(FrappeTestCase):
+	def setUp(self):
+		invalidate_price_drift_cache()
+		self.item = make_item()
+		self.standard_price = make_standard_price(self.item, 100)
+		self.agreement = make_agreement({self.item: 100}, discount_rate=10)
+
+	def tearDown(self):
+		frappe.db.rollback()
+		invalidate_price_drift_cache()
+
+	def _row(self):
+		rows = [r for r in get_price_drift(customer=self.agreement.customer) if r["item_code"] == self.item]
+		self.assertEqual(len(rows), 1)
+		return rows[0]
+
+	def test_drift_against_original_rates(self):
+		frappe.db.set_value("Item Price", self.standard_price, "price_list_rate", 125)
+		_reprice_agreement_items({self.item: {TEST_CURRENCY: 125}})
+		invalidate_price_drift_cache()
+
+		row = self._row()
+
+		self.assertEqual((row["original_standard"], row["current_standard"]), (100, 125))
+		self.assertEqual((row["standard_drift"], row["standard_drift_pct"]), (25, 25))
+		self.assertEqual((row["original_agreement"], row["current_agreement"]), (100, 112.5))
+		self.assertEqual(row["agreement_drift_pct"], 12.5)
+		self.assertEqual(row["max_drift_pct"], 25)
+
+	def test_result_is_cached_until_item_price_changes(self):
+		self.assertEqual(self._row()["max_drift_pct"], 0)
+		self.assertIsNotNone(frappe.cache().get_value(PRICE_DRIFT_CACHE_KEY))
+
+		# Toplu helper'lar (ORM dışı) cache'i geçersiz kılar
+		_reprice_agreement_items({self.item: {TEST_CURRENCY: 200}})
+		self.assertIsNone(frappe.cache().get_value(PRICE_DRIFT_CACHE_KEY))
+		self.assertEqual(self._row()["current_agreement"], 180)
+
+	def test_threshold_and_filters(self):
+		self.assertEqual(get_price_drift(customer=self.agreement.customer, threshold=1), [])
+		self.assertEqual(get_price_drift(supplier="_Test Unknown Supplier"), [])
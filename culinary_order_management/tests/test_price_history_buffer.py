@@ -0,0 +1,60 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Fiyat geçmişi buffer'ı: satırlar transaction boyunca biriktirilir, commit öncesi tek
+insert ile yazılır, rollback'te atılır.
+"""
+
+import unittest
+from unittest.mock import patch
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management import agreement as agreement_module
+from culinary_order_management.tests.utils import TEST_CURRENCY, make_agreement, make_item
+
+
+class TestPriceHistoryBuffer(FrappeTestCase):
+	def setUp(self):
+		self.item = make_item()
+		self.agreement = make_agreement({self.item: 100})
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def _log(self, new_price):
+		agreement_module.create_price_change_log(self.agreement.name, self.item, 100, new_price, TEST_CURRENCY)
+
+	def _history_count(self) -> int:
+		return frappe.db.count("Agreement Item Price History", {"agreement": self.agreement.name})
+
+	def test_rows_are_written_once_before_commit(self):
+		for new_price in (110, 120, 130):
+			self._log(new_price)
+		self.assertEqual(self._history_count(), 0)
+
+		with patch.object(
+			agreement_module, "_bulk_insert_price_history", wraps=agreement_module._bulk_insert_price_history
+		) as bulk_insert:
+			frappe.db.before_commit.run()
+
+		bulk_insert.assert_called_once()
+		self.assertEqual(len(bulk_insert.call_args.args[0]), 3)
+		self.assertEqual(self._history_count(), 3)
+		self.assertIsNone(frappe.local.agreement_price_history_buffer)
+
+	def test_rollback_discards_buffer(self):
+		self._log(110)
+		frappe.db.rollback()
+
+		self.assertIsNone(frappe.local.agreement_price_history_buffer)
+		self.assertEqual(agreement_module.flush_price_history_buffer(), 0)
+
+	def test_buffer_is_registered_once_per_transaction(self):
+		first = agreement_module._get_price_history_buffer()
+		self.assertIs(agreement_module._get_price_history_buffer(), first)
@@ -0,0 +1,80 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Agreement Item Price History log'u: toplu insert, sayfalı okuma ve ürün bazında özet.
+"""
+
+import unittest
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management.agreement import (
+	_bulk_insert_price_history,
+	get_price_history,
+	get_price_history_summary,
+)
+from culinary_order_management.tests.utils import TEST_CURRENCY, make_agreement, make_item
+
+
+def history_row(agreement_name, item_code, old_price, new_price, change_date, **kwargs):
+	return {
+		"agreement_name": agreement_name,
+		"item_code": item_code,
+		"old_price": old_price,
+		"new_price": new_price,
+		"currency": TEST_CURRENCY,
+		"change_date": change_date,
+		**kwargs,
+	}
+
+
+class TestPriceHistoryLog(FrappeTestCase):
+	def setUp(self):
+		self.items = [make_item(), make_item()]
+		self.agreement = make_agreement({self.items[0]: 100, self.items[1]: 50})
+		_bulk_insert_price_history([
+			history_row(self.agreement.name, self.items[0], 100, 110, "2024-01-10 10:00:00"),
+			history_row(self.agreement.name, self.items[0], 110, 99, "2024-02-10 10:00:00", source="Manual"),
+			history_row(self.agreement.name, self.items[1], 0, 50, "2024-03-10 10:00:00"),
+		])
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_bulk_insert_computes_change_percentage(self):
+		rows = frappe.get_all(
+			"Agreement Item Price History",
+			filters={"agreement": self.agreement.name},
+			fields=["item_code", "change_percentage", "source"],
+			order_by="change_date",
+		)
+		self.assertEqual([round(r.change_percentage, 2) for r in rows], [10.0, -10.0, 0.0])
+		self.assertEqual([r.source for r in rows], ["Automatic", "Manual", "Automatic"])
+
+	def test_history_is_paged_newest_first(self):
+		first_page = get_price_history(self.agreement.name, page_length=2)
+		self.assertEqual(first_page["total"], 3)
+		self.assertTrue(first_page["has_more"])
+		self.assertEqual([r.item_code for r in first_page["rows"]], [self.items[1], self.items[0]])
+
+		second_page = get_price_history(self.agreement.name, start=2, page_length=2)
+		self.assertFalse(second_page["has_more"])
+		self.assertEqual([r.new_agreement_rate for r in second_page["rows"]], [110])
+
+		item_page = get_price_history(self.agreement.name, item_code=self.items[1])
+		self.assertEqual(item_page["total"], 1)
+
+	def test_summary_groups_by_item(self):
+		summary = get_price_history_summary(self.agreement.name)
+
+		self.assertEqual(summary["total"], 3)
+		by_item = {row.item_code: row for row in summary["items"]}
+		self.assertEqual(by_item[self.items[0]].change_count, 2)
+		self.assertEqual((by_item[self.items[0]].min_rate, by_item[self.items[0]].max_rate), (99, 110))
+		# En son değişen item önce
+		self.assertEqual(summary["items"][0].item_code, self.items[1])
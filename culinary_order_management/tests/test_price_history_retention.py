@@ -0,0 +1,183 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Fiyat geçmişi saklama: aylık özet (Compacted) satırları, mevcut özetlerle
+birleştirme ve gzip arşive taşıma / okuma / silme.
+"""
+
+import gzip
+import json
+import os
+import shutil
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management import price_history_retention as retention
+from culinary_order_management.culinary_order_management.agreement import _bulk_insert_price_history
+from culinary_order_management.tests.utils import TEST_CURRENCY, make_agreement, make_item
+
+DETAIL_CUTOFF = "2024-06-01 00:00:00"
+ARCHIVE_CUTOFF = "2023-01-01 00:00:00"
+
+
+def _row(name, change_date, old_price, new_price, source="Automatic", change_count=1, rate_points=None):
+	return frappe._dict(
+		name=name,
+		change_date=change_date,
+		item_code="I",
+		currency="EUR",
+		old_standard_rate=old_price,
+		new_standard_rate=new_price,
+		old_agreement_rate=old_price,
+		new_agreement_rate=new_price,
+		changed_by="Administrator",
+		source=source,
+		change_count=change_count,
+		rate_points=json.dumps(rate_points) if rate_points else None,
+	)
+
+
+class TestMergeGroup(unittest.TestCase):
+	def test_archive_file_end(self):
+		self.assertEqual(
+			retention._archive_file_end("20240105100000-20240220103000-a1b2c3.jsonl.gz"),
+			datetime(2024, 2, 20, 10, 30),
+		)
+		self.assertIsNone(retention._archive_file_end("a1b2c3d4e5.jsonl.gz"))
+
+	def test_merge_detail_rows(self):
+		group = [
+			_row("H-2", "2024-01-20 10:00:00", 110, 105),
+			_row("H-1", "2024-01-05 10:00:00", 100, 110),
+		]
+
+		merged = retention._merge_group("AGR-1", group, "2024-07-01 00:00:00")
+
+		self.assertEqual(merged[6:9], ("AGR-1", "2024-01-20 10:00:00", "I"))
+		# old/new agreement rate, change_percentage, source, change_count
+		self.assertEqual((merged[11], merged[12], merged[14]), (100, 105, 5))
+		self.assertEqual((merged[16], merged[17]), ("Compacted", 2))
+		self.assertEqual(json.loads(merged[18]), [["2024-01-05 10:00:00", 110], ["2024-01-20 10:00:00", 105]])
+
+	def test_merge_into_existing_compacted_row(self):
+		compacted = _row(
+			"H-C", "2024-01-20 10:00:00", 100, 105, source="Compacted", change_count=2,
+			rate_points=[["2024-01-05 10:00:00", 110], ["2024-01-20 10:00:00", 105]],
+		)
+		late = _row("H-3", "2024-01-28 10:00:00", 105, 90)
+
+		merged = retention._merge_group("AGR-1", [compacted, late], "2024-07-01 00:00:00")
+
+		self.assertEqual((merged[7], merged[11], merged[12]), ("2024-01-28 10:00:00", 100, 90))
+		self.assertEqual(merged[17], 3)
+		self.assertEqual([point[1] for point in json.loads(merged[18])], [110, 105, 90])
+
+
+class TestRetention(FrappeTestCase):
+	def setUp(self):
+		self.item = make_item()
+		self.agreement = make_agreement({self.item: 100})
+		# Commit'ler uygulanmaz - test verisi tearDown'da geri alınır
+		patcher = patch.object(frappe.db, "commit")
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def tearDown(self):
+		frappe.db.rollback()
+		shutil.rmtree(retention._archive_dir(self.agreement.name), ignore_errors=True)
+
+	def _insert(self, *changes):
+		_bulk_insert_price_history([
+			{
+				"agreement_name": self.agreement.name,
+				"item_code": self.item,
+				"old_price": old_price,
+				"new_price": new_price,
+				"currency": TEST_CURRENCY,
+				"change_date": change_date,
+			}
+			for change_date, old_price, new_price in changes
+		])
+
+	def _history(self) -> list:
+		return frappe.get_all(
+			"Agreement Item Price History",
+			filters={"agreement": self.agreement.name},
+			fields=["change_date", "source", "change_count", "old_agreement_rate", "new_agreement_rate"],
+			order_by="change_date",
+		)
+
+	def test_compaction_merges_month_groups(self):
+		self._insert(
+			("2024-01-05 10:00:00", 100, 110),
+			("2024-01-20 10:00:00", 110, 105),
+			("2024-02-10 10:00:00", 105, 100),
+			("2024-07-10 10:00:00", 100, 130),
+		)
+
+		removed = retention.compact_agreement_history(self.agreement.name, DETAIL_CUTOFF, ARCHIVE_CUTOFF)
+
+		self.assertEqual(removed, 1)
+		rows = self._history()
+		self.assertEqual([r.source for r in rows], ["Compacted", "Automatic", "Automatic"])
+		self.assertEqual((rows[0].change_count, rows[0].old_agreement_rate, rows[0].new_agreement_rate), (2, 100, 105))
+		self.assertNotIn(self.agreement.name, retention._agreements_to_compact(DETAIL_CUTOFF, ARCHIVE_CUTOFF))
+
+	def test_late_row_is_merged_into_compacted_month(self):
+		self._insert(("2024-01-05 10:00:00", 100, 110), ("2024-01-20 10:00:00", 110, 105))
+		retention.compact_agreement_history(self.agreement.name, DETAIL_CUTOFF, ARCHIVE_CUTOFF)
+		self._insert(("2024-01-28 10:00:00", 105, 90))
+		self.assertIn(self.agreement.name, retention._agreements_to_compact(DETAIL_CUTOFF, ARCHIVE_CUTOFF))
+
+		self.assertEqual(retention.compact_agreement_history(self.agreement.name, DETAIL_CUTOFF, ARCHIVE_CUTOFF), 1)
+
+		rows = self._history()
+		self.assertEqual(len(rows), 1)
+		self.assertEqual((rows[0].change_count, rows[0].old_agreement_rate, rows[0].new_agreement_rate), (3, 100, 90))
+
+	def test_archive_moves_rows_to_files(self):
+		self._insert(
+			("2022-01-05 10:00:00", 100, 110),
+			("2022-03-05 10:00:00", 110, 120),
+			("2022-05-05 10:00:00", 120, 130),
+			("2024-01-05 10:00:00", 130, 140),
+		)
+
+		archived = retention.archive_agreement_history(self.agreement.name, ARCHIVE_CUTOFF, chunk_size=2)
+
+		self.assertEqual(archived, 3)
+		self.assertEqual(len(self._history()), 1)
+		folder = retention._archive_dir(self.agreement.name)
+		self.assertEqual(len([f for f in os.listdir(folder) if f.endswith(".jsonl.gz")]), 2)
+
+		rows = retention.read_archived_history(self.agreement.name)
+		self.assertEqual([r.new_agreement_rate for r in rows], [130, 120, 110])
+		self.assertTrue(all(r.archived for r in rows))
+		# İlk dosya (Ocak-Mart) since'tan önce bitiyor ve açılmıyor
+		recent = retention.read_archived_history(self.agreement.name, self.item, since="2022-04-01")
+		self.assertEqual([r.new_agreement_rate for r in recent], [130])
+		self.assertEqual(retention.read_archived_history(self.agreement.name, "_Test Other Item"), [])
+
+		self.assertEqual(retention.delete_archived_history(self.agreement.name, item_code=self.item), 3)
+		self.assertFalse(os.path.isdir(folder))
+
+	def test_pending_archive_is_dropped_while_rows_exist(self):
+		self._insert(("2022-01-05 10:00:00", 100, 110))
+		name = frappe.db.get_value("Agreement Item Price History", {"agreement": self.agreement.name}, "name")
+		folder = retention._archive_dir(self.agreement.name)
+		os.makedirs(folder, exist_ok=True)
+		tmp_path = os.path.join(folder, "20220105100000-20220105100000-abcdef.jsonl.gz.tmp")
+		with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+			f.write(json.dumps({"name": name, "item_code": self.item}) + "\n")
+
+		retention._recover_pending_archives(folder)
+
+		self.assertEqual(os.listdir(folder), [])
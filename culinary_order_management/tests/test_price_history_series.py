@@ -0,0 +1,82 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Fiyat geçmişi grafiği: LTTB seyreltme ve periyot bazlı seri.
+"""
+
+import unittest
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management.agreement import (
+	_bulk_insert_price_history,
+	_lttb,
+	get_price_history_series,
+)
+from culinary_order_management.tests.utils import TEST_CURRENCY, make_agreement, make_item
+
+
+class TestLttb(unittest.TestCase):
+	def test_short_series_is_returned_as_is(self):
+		points = [(float(x), float(x), x) for x in range(5)]
+		self.assertIs(_lttb(points, 10), points)
+		self.assertIs(_lttb(points, 2), points)
+
+	def test_keeps_endpoints_and_spikes(self):
+		points = [(float(x), 10.0, x) for x in range(100)]
+		points[37] = (37.0, 50.0, 37)
+		points[71] = (71.0, -20.0, 71)
+
+		sampled = _lttb(points, 10)
+
+		self.assertEqual(len(sampled), 10)
+		self.assertEqual((sampled[0], sampled[-1]), (points[0], points[-1]))
+		self.assertIn(points[37], sampled)
+		self.assertIn(points[71], sampled)
+		self.assertEqual([p[0] for p in sampled], sorted(p[0] for p in sampled))
+
+
+class TestPriceHistorySeries(FrappeTestCase):
+	def setUp(self):
+		self.item = make_item()
+		self.agreement = make_agreement({self.item: 100})
+		rates = [("2024-01-05 10:00:00", 100, 110), ("2024-01-20 10:00:00", 110, 105), ("2024-03-02 10:00:00", 105, 120)]
+		_bulk_insert_price_history([
+			{
+				"agreement_name": self.agreement.name,
+				"item_code": self.item,
+				"old_price": old_price,
+				"new_price": new_price,
+				"currency": TEST_CURRENCY,
+				"change_date": change_date,
+			}
+			for change_date, old_price, new_price in rates
+		])
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_item_series_by_month(self):
+		series = get_price_history_series(self.agreement.name, self.item, bucket="month")
+
+		self.assertEqual(series["bucket"], "month")
+		points = {p.period: p for p in series["points"]}
+		self.assertEqual(list(points), ["2024-01", "2024-03"])
+		january = points["2024-01"]
+		self.assertEqual((january.min_rate, january.max_rate, january.last_rate, january.changes), (105, 110, 105, 2))
+
+	def test_auto_bucket_uses_history_span(self):
+		# 57 günlük geçmiş -> gün bucket'ı
+		series = get_price_history_series(self.agreement.name, self.item)
+		self.assertEqual(series["bucket"], "day")
+		self.assertEqual(len(series["points"]), 3)
+
+	def test_lttb_series(self):
+		series = get_price_history_series(self.agreement.name, self.item, method="lttb", max_points=2)
+		self.assertEqual(series["method"], "lttb")
+		self.assertEqual([p["rate"] for p in series["points"]], [110, 105, 120])
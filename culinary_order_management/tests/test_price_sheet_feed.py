@@ -0,0 +1,119 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Müşteri price sheet feed'i: tam liste, versiyon sonrası delta (upsert / delete),
+budanan aralık için reset ve müşteri yetki kontrolü.
+"""
+
+import unittest
+from unittest.mock import patch
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+	from frappe.utils import add_days, getdate, nowdate
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management.price_sheet_feed import (
+	PRICE_EVENT_DOCTYPE,
+	_current_version,
+	get_price_sheet,
+	get_price_sheet_changes,
+	prune_price_events,
+	record_price_events,
+)
+from culinary_order_management.tests.utils import TEST_CURRENCY, make_agreement, make_customer, make_item
+
+
+class TestPriceSheetFeed(FrappeTestCase):
+	def setUp(self):
+		self.items = [make_item() for _i in range(3)]
+		self.agreement = make_agreement({self.items[0]: 10, self.items[1]: 20})
+		self.customer = self.agreement.customer
+		# prune_price_events commit'leri uygulanmaz - test verisi tearDown'da geri alınır
+		patcher = patch.object(frappe.db, "commit")
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def tearDown(self):
+		frappe.set_user("Administrator")
+		frappe.db.rollback()
+
+	def _item_price(self, item_code: str) -> str:
+		return frappe.db.get_value("Item Price", {"agreement": self.agreement.name, "item_code": item_code})
+
+	def test_price_sheet_lists_effective_prices(self):
+		sheet = get_price_sheet(self.customer)
+
+		self.assertEqual(sheet["version"], _current_version())
+		self.assertEqual(
+			[row[:3] for row in sheet["items"]],
+			sorted([[self.items[0], TEST_CURRENCY, 10], [self.items[1], TEST_CURRENCY, 20]]),
+		)
+
+	def test_newest_valid_from_wins(self):
+		frappe.get_doc({
+			"doctype": "Item Price",
+			"price_list": self.customer,
+			"item_code": self.items[0],
+			"currency": TEST_CURRENCY,
+			"price_list_rate": 8,
+			"valid_from": nowdate(),
+			"valid_upto": add_days(nowdate(), 5),
+		}).insert(ignore_permissions=True)
+
+		sheet = get_price_sheet(self.customer)
+
+		row = next(row for row in sheet["items"] if row[0] == self.items[0])
+		self.assertEqual(row, [self.items[0], TEST_CURRENCY, 8, getdate(add_days(nowdate(), 5))])
+
+	def test_changes_return_upserts_and_deletes(self):
+		version = get_price_sheet(self.customer)["version"]
+
+		item_price = frappe.get_doc("Item Price", self._item_price(self.items[0]))
+		item_price.price_list_rate = 15
+		item_price.save(ignore_permissions=True)
+		frappe.delete_doc("Item Price", self._item_price(self.items[1]), ignore_permissions=True)
+
+		changes = get_price_sheet_changes(self.customer, version)
+
+		self.assertFalse(changes["reset"])
+		self.assertGreater(changes["version"], version)
+		self.assertEqual([row[:3] for row in changes["upserts"]], [[self.items[0], TEST_CURRENCY, 15]])
+		self.assertEqual(changes["deletes"], [[self.items[1], TEST_CURRENCY]])
+		# Değişiklikten sonra tam liste de yeni fiyatı döner (cache versiyonla geçersizleşir)
+		sheet = get_price_sheet(self.customer)
+		self.assertEqual([row[:3] for row in sheet["items"]], [[self.items[0], TEST_CURRENCY, 15]])
+
+	def test_events_without_price_list_are_skipped(self):
+		version = _current_version()
+		record_price_events([{"price_list": None, "item_code": self.items[2], "currency": TEST_CURRENCY}], "Insert")
+		self.assertEqual(_current_version(), version)
+
+	def test_pruned_range_requires_reset(self):
+		version = get_price_sheet(self.customer)["version"]
+		frappe.db.sql(
+			f"update `tab{PRICE_EVENT_DOCTYPE}` set creation = %(old)s",
+			{"old": add_days(nowdate(), -60)},
+		)
+		self.assertGreater(prune_price_events(), 0)
+		record_price_events(
+			[{"price_list": self.customer, "item_code": self.items[0], "currency": TEST_CURRENCY}], "Update"
+		)
+
+		# Budanan event'i görmemiş istemci tam listeyi yeniden çekmeli
+		self.assertTrue(get_price_sheet_changes(self.customer, version - 1)["reset"])
+		changes = get_price_sheet_changes(self.customer, version)
+		self.assertFalse(changes["reset"])
+		self.assertEqual([row[0] for row in changes["upserts"]], [self.items[0]])
+
+	def test_customer_without_price_list(self):
+		with self.assertRaises(frappe.DoesNotExistError):
+			get_price_sheet(make_customer())
+
+	def test_guest_is_rejected(self):
+		frappe.set_user("Guest")
+		with self.assertRaises(frappe.PermissionError):
+			get_price_sheet_changes(self.customer, 0)
@@ -0,0 +1,78 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+What-if fiyat simülasyonu: CSV ayrıştırma ve önerilen Standard Selling fiyatlarının
+aktif agreement'lara etkisinin (yazma yapmadan) hesaplanması.
+"""
+
+import unittest
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management.price_simulation import _parse_proposed_rates, simulate
+from culinary_order_management.tests.utils import (
+	TEST_CURRENCY,
+	get_agreement_item_prices,
+	make_agreement,
+	make_item,
+	make_standard_price,
+)
+
+
+class TestParseProposedRates(unittest.TestCase):
+	def test_parses_rates_with_default_currency(self):
+		content = "\ufeffItem_Code,New_Standard_Rate,Currency\nA,10.5,\nB,\"7,25\",USD\n,3,\nC,abc,\n"
+
+		rates, errors = _parse_proposed_rates(content, "EUR")
+
+		self.assertEqual(rates, {("A", "EUR"): 10.5, ("B", "USD"): 7.25})
+		self.assertEqual(len(errors), 1)
+		self.assertIn("C", errors[0])
+
+	def test_accepts_rate_column_alias(self):
+		rates, _errors = _parse_proposed_rates("item_code,rate\nA,4\n", "EUR")
+		self.assertEqual(rates, {("A", "EUR"): 4.0})
+
+	def test_missing_columns_throw(self):
+		with self.assertRaises(frappe.ValidationError):
+			_parse_proposed_rates("item_code,qty\nA,1\n", "EUR")
+
+
+class TestSimulate(FrappeTestCase):
+	def setUp(self):
+		self.item = make_item()
+		make_standard_price(self.item, 100)
+		self.plain = make_agreement({self.item: 100})
+		self.discounted = make_agreement({self.item: 90}, discount_rate=10)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_computes_new_rates_without_writing(self):
+		result = simulate({(self.item, TEST_CURRENCY): 120}, company_ccy=TEST_CURRENCY)
+
+		rows = {row["agreement"]: row for row in result["rows"]}
+		self.assertEqual(rows[self.plain.name]["new_agreement_rate"], 120)
+		self.assertEqual(rows[self.plain.name]["delta_pct"], 20)
+		self.assertEqual(rows[self.discounted.name]["new_agreement_rate"], 108)
+		self.assertEqual(rows[self.discounted.name]["delta"], 18)
+		self.assertEqual(rows[self.discounted.name]["current_standard_rate"], 100)
+
+		summary = result["summary"]
+		self.assertEqual((summary["rows"], summary["agreements"], summary["increased"]), (2, 2, 2))
+		self.assertEqual(summary["by_currency"][TEST_CURRENCY]["revenue_impact"], 0)
+
+		self.assertEqual(get_agreement_item_prices(self.plain.name), {self.item: 100})
+		self.assertEqual(get_agreement_item_prices(self.discounted.name), {self.item: 90})
+
+	def test_unchanged_and_unrelated_rates(self):
+		result = simulate({(self.item, TEST_CURRENCY): 100, (self.item, "USD"): 500}, company_ccy=TEST_CURRENCY)
+
+		summary = result["summary"]
+		self.assertEqual((summary["rows"], summary["unchanged"], summary["decreased"]), (2, 2, 0))
+		self.assertEqual(simulate({("_Test Unknown Item", TEST_CURRENCY): 1})["rows"], [])
@@ -0,0 +1,125 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Tarihe göre anlaşma fiyatı: segment lookup'ı, özetlenmiş satırların ara noktaları,
+iptal edilen agreement'lar ve kullanıcının okuyabildiği agreement filtresi.
+"""
+
+import json
+import unittest
+from datetime import datetime
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+	from frappe.utils import add_days, getdate, nowdate
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management.agreement import _bulk_insert_price_history
+from culinary_order_management.culinary_order_management.price_timeline import (
+	PriceTimeline,
+	_as_lookup_time,
+	_Segment,
+	get_agreement_price_on_date,
+)
+from culinary_order_management.tests.utils import TEST_CURRENCY, make_agreement, make_item
+
+
+def _history(change_date, rate, source="Automatic", change_count=1, rate_points=None):
+	return frappe._dict(
+		change_date=change_date,
+		new_agreement_rate=rate,
+		source=source,
+		change_count=change_count,
+		rate_points=json.dumps(rate_points) if rate_points else None,
+	)
+
+
+def _timeline(*segments) -> PriceTimeline:
+	timeline = PriceTimeline()
+	timeline.segments[("C", "I")] = list(segments)
+	return timeline
+
+
+class TestSegmentLookup(unittest.TestCase):
+	def setUp(self):
+		self.segment = _Segment("AGR-1", "EUR", datetime(2024, 1, 1), datetime(2024, 12, 31, 23, 59, 59), 10.0)
+
+	def test_date_only_lookup_uses_end_of_day(self):
+		self.segment.add_history_row(_history("2024-03-05 09:00:00", 12))
+
+		self.assertEqual(_as_lookup_time("2024-03-05"), datetime(2024, 3, 5, 23, 59, 59, 999999))
+		self.assertEqual(_timeline(self.segment).lookup("C", "I", "2024-03-04")["rate"], 10)
+		self.assertEqual(_timeline(self.segment).lookup("C", "I", "2024-03-05")["rate"], 12)
+		self.assertEqual(_timeline(self.segment).lookup("C", "I", "2024-03-05 08:00:00")["rate"], 10)
+
+	def test_compacted_rate_points_are_exact(self):
+		self.segment.add_history_row(_history(
+			"2024-03-20 00:00:00", 14, source="Compacted", change_count=2,
+			rate_points=[["2024-03-05 00:00:00", 12], ["2024-03-20 00:00:00", 14]],
+		))
+
+		found = _timeline(self.segment).lookup("C", "I", "2024-03-10")
+		self.assertEqual((found["rate"], found["approximate"]), (12, False))
+
+	def test_legacy_compacted_month_is_approximate(self):
+		self.segment.add_history_row(_history("2024-03-20 00:00:00", 14, source="Compacted", change_count=3))
+		timeline = _timeline(self.segment)
+
+		self.assertTrue(timeline.lookup("C", "I", "2024-03-10")["approximate"])
+		self.assertFalse(timeline.lookup("C", "I", "2024-02-10")["approximate"])
+		self.assertFalse(timeline.lookup("C", "I", "2024-03-21")["approximate"])
+
+	def test_latest_starting_segment_wins(self):
+		renewal = _Segment("AGR-2", "EUR", datetime(2024, 6, 1), datetime(2025, 5, 31, 23, 59, 59), 11.0)
+		timeline = _timeline(self.segment, renewal)
+
+		self.assertEqual(timeline.lookup("C", "I", "2024-05-31")["agreement"], "AGR-1")
+		self.assertEqual(timeline.lookup("C", "I", "2024-06-01")["agreement"], "AGR-2")
+		self.assertIsNone(timeline.lookup("C", "I", "2025-06-01"))
+
+
+class TestPriceTimelineBuild(FrappeTestCase):
+	def setUp(self):
+		self.item = make_item()
+		self.today = getdate(nowdate())
+		self.agreement = make_agreement({self.item: 100})
+		_bulk_insert_price_history([{
+			"agreement_name": self.agreement.name,
+			"item_code": self.item,
+			"old_price": 100,
+			"new_price": 120,
+			"currency": TEST_CURRENCY,
+			"change_date": f"{add_days(self.today, -5)} 12:00:00",
+		}])
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def _lookup(self, days, agreements=None):
+		timeline = PriceTimeline.build([self.agreement.customer], [self.item], agreements=agreements)
+		return timeline.lookup(self.agreement.customer, self.item, add_days(self.today, days))
+
+	def test_rates_follow_history(self):
+		self.assertIsNone(self._lookup(-11))
+		self.assertEqual(self._lookup(-7)["rate"], 100)
+		self.assertEqual(self._lookup(-3)["rate"], 120)
+		self.assertEqual(self._lookup(-3)["agreement"], self.agreement.name)
+
+	def test_cancelled_agreement_ends_on_cancel(self):
+		self.agreement.cancel()
+
+		self.assertEqual(self._lookup(-3)["rate"], 120)
+		self.assertIsNone(self._lookup(1))
+
+	def test_agreement_filter(self):
+		self.assertIsNone(self._lookup(-3, agreements=[]))
+		self.assertEqual(self._lookup(-3, agreements=[self.agreement.name])["rate"], 120)
+
+	def test_endpoint_returns_rate_on_date(self):
+		found = get_agreement_price_on_date(self.agreement.customer, self.item, str(add_days(self.today, -3)))
+		self.assertEqual(found, {
+			"rate": 120, "currency": TEST_CURRENCY, "agreement": self.agreement.name, "approximate": False,
+		})
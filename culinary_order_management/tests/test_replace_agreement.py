@@ -0,0 +1,75 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+replace_agreement: Item Price satırlarının yeni agreement'a devredilmesi ve sadece
+farkların uygulanması.
+"""
+
+import unittest
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+	from frappe.utils import add_days, getdate, nowdate
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management.doctype.agreement.agreement import replace_agreement
+from culinary_order_management.tests.utils import (
+	get_agreement_item_prices,
+	make_agreement,
+	make_customer,
+	make_item,
+)
+
+
+class TestReplaceAgreement(FrappeTestCase):
+	def setUp(self):
+		self.items = [make_item() for _i in range(3)]
+		self.today = getdate(nowdate())
+		self.old = make_agreement({self.items[0]: 10, self.items[1]: 20})
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def _successor(self, items: dict, **kwargs):
+		return make_agreement(
+			items,
+			customer=kwargs.pop("customer", self.old.customer),
+			supplier=self.old.supplier,
+			valid_to=add_days(self.today, 90),
+			submit=False,
+			**kwargs,
+		)
+
+	def _item_price_names(self, agreement_name: str) -> dict:
+		return dict(frappe.get_all(
+			"Item Price", filters={"agreement": agreement_name}, fields=["item_code", "name"], as_list=True
+		))
+
+	def test_item_prices_are_transferred_and_diffed(self):
+		old_names = self._item_price_names(self.old.name)
+		new = self._successor({self.items[0]: 10, self.items[2]: 30})
+
+		result = replace_agreement(self.old.name, new.name)
+
+		self.assertEqual(result["transferred_prices"], 2)
+		self.assertEqual(frappe.db.get_value("Agreement", self.old.name, "docstatus"), 2)
+		self.assertEqual(get_agreement_item_prices(self.old.name), {})
+		self.assertEqual(get_agreement_item_prices(new.name), {self.items[0]: 10, self.items[2]: 30})
+		# Değişmeyen item'ın satırı silinip yeniden yazılmadı
+		self.assertEqual(self._item_price_names(new.name)[self.items[0]], old_names[self.items[0]])
+		self.assertEqual(
+			frappe.db.get_value("Item Price", old_names[self.items[0]], ["valid_upto", "note"]),
+			(getdate(new.valid_to), new.name),
+		)
+
+	def test_other_customer_uses_full_rewrite(self):
+		new = self._successor({self.items[0]: 12}, customer=make_customer())
+
+		result = replace_agreement(self.old.name, new.name)
+
+		self.assertEqual(result["transferred_prices"], 0)
+		self.assertEqual(get_agreement_item_prices(self.old.name), {})
+		self.assertEqual(get_agreement_item_prices(new.name), {self.items[0]: 12})
@@ -0,0 +1,102 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Debounce'lu reprice kuyruğu: commit sonrası kuyruğa yazma, parça parça boşaltma,
+hata ve yarıda kalan parçalarda item'ların kuyruğa geri konması.
+"""
+
+import unittest
+from unittest.mock import patch
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+	from frappe.utils import add_days, nowdate
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management import reprice_queue
+from culinary_order_management.tests.utils import (
+	TEST_CURRENCY,
+	get_agreement_item_prices,
+	make_agreement,
+	make_item,
+	make_standard_price,
+)
+
+
+def _members(key: str) -> set:
+	return set(reprice_queue._decode(frappe.cache().smembers(key)))
+
+
+class TestRepriceQueue(FrappeTestCase):
+	def setUp(self):
+		self._clear_queue()
+		self.item = make_item()
+
+	def tearDown(self):
+		frappe.db.rollback()
+		self._clear_queue()
+
+	def _clear_queue(self):
+		frappe.cache().delete_value(reprice_queue.REPRICE_QUEUE_KEY)
+		frappe.cache().delete_value(reprice_queue.REPRICE_PROCESSING_KEY)
+
+	def test_enqueue_waits_for_commit(self):
+		reprice_queue.enqueue_item_reprice(self.item)
+		reprice_queue.enqueue_item_reprice(self.item)
+		self.assertEqual(reprice_queue.get_queue_length(), 0)
+
+		frappe.db.after_commit.run()
+		self.assertEqual(_members(reprice_queue.REPRICE_QUEUE_KEY), {self.item})
+
+	def test_enqueue_is_dropped_on_rollback(self):
+		reprice_queue.enqueue_item_reprice(self.item)
+		frappe.db.rollback()
+		frappe.db.after_commit.run()
+		self.assertEqual(reprice_queue.get_queue_length(), 0)
+
+	def test_current_standard_rates_ignore_future_and_expired_prices(self):
+		make_standard_price(self.item, 10, valid_upto=add_days(nowdate(), -5), valid_from=add_days(nowdate(), -30))
+		make_standard_price(self.item, 20, valid_from=add_days(nowdate(), -2))
+		make_standard_price(self.item, 30, valid_from=add_days(nowdate(), 5))
+
+		rates = reprice_queue._get_current_standard_rates([self.item])
+
+		self.assertEqual(rates, {self.item: {TEST_CURRENCY: 20}})
+
+	def test_drain_reprices_queued_items_and_acks(self):
+		agreement = make_agreement({self.item: 100}, discount_rate=50)
+		make_standard_price(self.item, 300)
+		reprice_queue._add_to_queue(self.item)
+
+		with patch.object(frappe.db, "commit"):
+			stats = reprice_queue.drain_reprice_queue(batch_size=10)
+
+		self.assertEqual((stats["items"], stats["updated"], stats["batches"]), (1, 1, 1))
+		self.assertEqual(get_agreement_item_prices(agreement.name), {self.item: 150})
+		self.assertEqual(_members(reprice_queue.REPRICE_QUEUE_KEY), set())
+		self.assertEqual(_members(reprice_queue.REPRICE_PROCESSING_KEY), set())
+
+	def test_failed_batch_is_requeued(self):
+		reprice_queue._add_to_queue(self.item)
+
+		with patch(
+			"culinary_order_management.culinary_order_management.agreement._reprice_agreement_items",
+			side_effect=RuntimeError("boom"),
+		):
+			stats = reprice_queue.drain_reprice_queue(batch_size=10)
+
+		self.assertEqual(stats["batches"], 0)
+		self.assertEqual(_members(reprice_queue.REPRICE_QUEUE_KEY), {self.item})
+		self.assertEqual(_members(reprice_queue.REPRICE_PROCESSING_KEY), set())
+
+	def test_in_flight_items_are_recovered(self):
+		reprice_queue._add_to_queue(self.item)
+		self.assertEqual(reprice_queue._pop_batch(10), [self.item])
+		self.assertEqual(reprice_queue.get_queue_length(), 0)
+
+		self.assertEqual(reprice_queue._recover_in_flight(), 1)
+		self.assertEqual(_members(reprice_queue.REPRICE_QUEUE_KEY), {self.item})
+		self.assertEqual(_members(reprice_queue.REPRICE_PROCESSING_KEY), set())
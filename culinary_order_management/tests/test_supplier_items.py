@@ -0,0 +1,90 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Tedarikçi kataloğu: tek sorguluk fallback selling fiyatları ve keyset sayfalama.
+"""
+
+import unittest
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+	from frappe.utils import add_days, nowdate
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management.agreement import (
+	_get_fallback_selling_rates,
+	get_supplier_items_page,
+	get_supplier_items_with_standard_prices,
+)
+from culinary_order_management.tests.utils import (
+	TEST_CURRENCY,
+	make_item,
+	make_standard_price,
+	make_supplier,
+)
+
+
+def _make_selling_price_list() -> str:
+	return frappe.get_doc({
+		"doctype": "Price List",
+		"price_list_name": f"_Test Culinary Selling {frappe.generate_hash(length=8)}",
+		"selling": 1,
+		"currency": TEST_CURRENCY,
+	}).insert(ignore_permissions=True).name
+
+
+class TestSupplierItems(FrappeTestCase):
+	def setUp(self):
+		self.supplier = make_supplier()
+		# item_name sırası: A, B, C, D, E
+		self.items = [
+			make_item(item_name=f"{letter} {self.supplier}", supplier_items=[{"supplier": self.supplier}])
+			for letter in "EDCBA"
+		][::-1]
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_fallback_uses_latest_current_selling_price(self):
+		price_list = _make_selling_price_list()
+		item_code = self.items[0]
+		for rate, valid_from in ((5, -20), (7, -5), (9, 10)):
+			make_standard_price(item_code, rate, price_list=price_list, valid_from=add_days(nowdate(), valid_from))
+
+		rates = _get_fallback_selling_rates([item_code, self.items[1]], TEST_CURRENCY)
+
+		self.assertEqual(rates, {item_code: 7})
+
+	def test_catalogue_uses_standard_selling_then_fallback(self):
+		make_standard_price(self.items[0], 10)
+		make_standard_price(self.items[1], 20, price_list=_make_selling_price_list())
+
+		rows = {
+			row["item_code"]: row["standard_selling_rate"]
+			for row in get_supplier_items_with_standard_prices(self.supplier, TEST_CURRENCY)
+		}
+
+		self.assertEqual(rows[self.items[0]], 10)
+		self.assertEqual(rows[self.items[1]], 20)
+		self.assertEqual(rows[self.items[2]], 0)
+
+	def test_keyset_pages_cover_catalogue_once(self):
+		seen = []
+		cursor = {}
+		while True:
+			page = get_supplier_items_page(
+				self.supplier,
+				TEST_CURRENCY,
+				after_item_name=cursor.get("item_name"),
+				after_item_code=cursor.get("item_code"),
+				page_length=2,
+			)
+			seen.extend(row["item_code"] for row in page["items"])
+			cursor = page["next_cursor"]
+			if not cursor:
+				break
+
+		self.assertEqual(seen, self.items)
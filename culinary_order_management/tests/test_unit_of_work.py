@@ -0,0 +1,87 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+UnitOfWork: item başına savepoint, hatalı item'ın (ve fiyat geçmişi satırlarının)
+geri alınması, chunk bazlı ara commit.
+"""
+
+import unittest
+from unittest.mock import patch
+
+try:
+	import frappe
+	from frappe.tests.utils import FrappeTestCase
+except ImportError:
+	raise unittest.SkipTest("frappe is not installed")
+
+from culinary_order_management.culinary_order_management.unit_of_work import UnitOfWork
+
+
+def _make_todo(description: str) -> str:
+	return frappe.get_doc({"doctype": "ToDo", "description": description}).insert(ignore_permissions=True).name
+
+
+class TestUnitOfWork(FrappeTestCase):
+	def setUp(self):
+		self.prefix = f"_Test UoW {frappe.generate_hash(length=8)}"
+		# Commit'ler sayılır ama uygulanmaz - test verisi tearDown'da geri alınır
+		patcher = patch.object(frappe.db, "commit")
+		self.commit = patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def _todos(self) -> list:
+		return frappe.get_all(
+			"ToDo", filters={"description": ["like", f"{self.prefix}%"]}, pluck="description", order_by="description"
+		)
+
+	def test_failed_item_is_rolled_back_alone(self):
+		with UnitOfWork() as uow:
+			for key in ("a", "b", "c"):
+				try:
+					with uow.item(key):
+						_make_todo(f"{self.prefix} {key}")
+						if key == "b":
+							raise ValueError("invalid price")
+				except ValueError:
+					pass
+
+		self.assertEqual(self._todos(), [f"{self.prefix} a", f"{self.prefix} c"])
+		self.assertEqual((uow.completed, uow.rolled_back), (2, 1))
+		self.commit.assert_called_once()
+
+	def test_failed_item_drops_its_history_rows(self):
+		frappe.local.agreement_price_history_buffer = [{"item_code": "kept"}]
+		uow = UnitOfWork()
+
+		with self.assertRaises(ValueError):
+			with uow.item("x"):
+				frappe.local.agreement_price_history_buffer.append({"item_code": "dropped"})
+				raise ValueError("invalid price")
+
+		self.assertEqual(frappe.local.agreement_price_history_buffer, [{"item_code": "kept"}])
+		frappe.local.agreement_price_history_buffer = None
+
+	def test_commits_every_chunk(self):
+		with UnitOfWork(chunk_size=2) as uow:
+			for key in range(5):
+				with uow.item(str(key)):
+					_make_todo(f"{self.prefix} {key}")
+
+		# 2 ara commit (item 2 ve 4) + çıkışta tek commit
+		self.assertEqual(self.commit.call_count, 3)
+		self.assertEqual(uow.completed, 5)
+		self.assertEqual(len(self._todos()), 5)
+
+	def test_exception_in_block_rolls_back_everything(self):
+		with self.assertRaises(RuntimeError):
+			with UnitOfWork() as uow:
+				with uow.item("a"):
+					_make_todo(f"{self.prefix} a")
+				raise RuntimeError("worker killed")
+
+		self.assertEqual(self._todos(), [])
+		self.commit.assert_not_called()
@@ -0,0 +1,102 @@
+# Copyright (c) 2024, Culinary Order Management and contributors
+# For license information, please see license.txt
+
+"""
+Test fixture'ları: Item, Customer, Supplier, Standard Selling fiyatı ve Agreement.
+
+Testler bir bench site'ı üzerinde (bench run-tests) çalışır; isimler her çağrıda
+benzersizdir, böylece testler birbirinin verisine dokunmaz.
+"""
+
+import frappe
+from frappe.utils import add_days, nowdate
+
+TEST_CURRENCY = "EUR"
+
+
+def _unique(prefix: str) -> str:
+	return f"{prefix} {frappe.generate_hash(length=8)}"
+
+
+def make_item(item_code: str | None = None, **kwargs) -> str:
+	item = frappe.get_doc({
+		"doctype": "Item",
+		"item_code": item_code or _unique("_Test Culinary Item"),
+		"item_group": "All Item Groups",
+		"stock_uom": "Nos",
+		"is_stock_item": 0,
+		**kwargs,
+	}).insert(ignore_permissions=True)
+	return item.name
+
+
+def make_customer() -> str:
+	customer = frappe.get_doc({
+		"doctype": "Customer",
+		"customer_name": _unique("_Test Culinary Customer"),
+		"customer_group": "All Customer Groups",
+		"territory": "All Territories",
+	}).insert(ignore_permissions=True)
+	return customer.name
+
+
+def make_supplier() -> str:
+	supplier = frappe.get_doc({
+		"doctype": "Supplier",
+		"supplier_name": _unique("_Test Culinary Supplier"),
+		"supplier_group": "All Supplier Groups",
+	}).insert(ignore_permissions=True)
+	return supplier.name
+
+
+def make_standard_price(item_code: str, rate: float, currency: str = TEST_CURRENCY, **kwargs) -> str:
+	item_price = frappe.get_doc({
+		"doctype": "Item Price",
+		"price_list": "Standard Selling",
+		"item_code": item_code,
+		"currency": currency,
+		"price_list_rate": rate,
+		**kwargs,
+	}).insert(ignore_permissions=True)
+	return item_price.name
+
+
+def make_agreement(
+	items: dict,
+	customer: str | None = None,
+	supplier: str | None = None,
+	discount_rate: float = 0,
+	valid_from=None,
+	valid_to=None,
+	submit: bool = True,
+):
+	"""Agreement oluştur (varsayılan: bugün aktif ve submit edilmiş).
+
+	Args:
+		items: {item_code: price_list_rate}
+	"""
+	doc = frappe.get_doc({
+		"doctype": "Agreement",
+		"customer": customer or make_customer(),
+		"supplier": supplier or make_supplier(),
+		"valid_from": valid_from or add_days(nowdate(), -10),
+		"valid_to": valid_to or add_days(nowdate(), 30),
+		"discount_rate": discount_rate,
+		"agreement_items": [
+			{"item_code": item_code, "price_list_rate": rate, "standard_selling_rate": rate, "currency": TEST_CURRENCY}
+			for item_code, rate in items.items()
+		],
+	}).insert(ignore_permissions=True)
+	if submit:
+		doc.submit()
+	return doc
+
+
+def get_agreement_item_prices(agreement_name: str) -> dict:
+	"""Agreement'ın Item Price satırları: {item_code: price_list_rate}."""
+	return {
+		row.item_code: frappe.utils.flt(row.price_list_rate)
+		for row in frappe.get_all(
+			"Item Price", filters={"agreement": agreement_name}, fields=["item_code", "price_list_rate"]
+		)
+	}